@@ -0,0 +1,120 @@
+# coding: utf-8
+"""
+grid 解析基准测试
+
+比较内置解析 (grid_strategies.parse_grid_text) 与 pandas
+(read_csv + to_dict('records')，以及只生成 DataFrame) 解析 10 到 10000 行
+tab 分隔 grid 文本的耗时，并检查两者结果一致。同时输出导入 pandas 的耗时。
+
+用法::
+
+    python benchmarks/grid_parser.py
+    python benchmarks/grid_parser.py --rows 100 --rows 5000 --repeat 20
+"""
+
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# pylint: disable=wrong-import-position
+from easytrader.config import client
+from easytrader.grid_strategies import parse_grid_text, read_grid_dataframe
+
+ROWS = [10, 100, 1000, 10000]
+COLUMNS = [
+    "委托时间",
+    "证券代码",
+    "证券名称",
+    "操作",
+    "备注",
+    "委托数量",
+    "成交数量",
+    "委托价格",
+    "成交均价",
+    "合同编号",
+    "交易市场",
+    "股东代码",
+]
+
+
+def make_grid(rows):
+    lines = ["\t".join(COLUMNS)]
+    for i in range(rows):
+        lines.append(
+            "\t".join(
+                [
+                    "09:{:02d}:{:02d}".format(i // 60 % 60, i % 60),
+                    "{:06d}".format(i % 1000),
+                    "证券{}".format(i % 1000),
+                    "买入" if i % 2 else "卖出",
+                    "已成" if i % 3 else "未成交",
+                    str(100 * (i % 50 + 1)),
+                    str(100 * (i % 50)),
+                    "{:.2f}".format(1 + i % 300 / 100),
+                    "{:.3f}".format(1 + i % 300 / 100),
+                    str(10000 + i),
+                    "深圳Ａ股",
+                    "0123456789",
+                ]
+            )
+        )
+    return "\r\n".join(lines) + "\r\n"
+
+
+def measure(func, repeat):
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        samples.append(time.perf_counter() - start)
+    return statistics.median(samples)
+
+
+def pandas_import_time():
+    code = "import time; s = time.perf_counter(); import pandas; print(time.perf_counter() - s)"
+    output = subprocess.check_output([sys.executable, "-c", code], text=True)
+    return float(output)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument(
+        "--rows", type=int, action="append", help="grid 行数，可以指定多次"
+    )
+    parser.add_argument("--repeat", type=int, default=10, help="每项的执行次数")
+    args = parser.parse_args(argv)
+
+    dtype = client.create("ths").GRID_DTYPE
+    print("pandas import: {:.1f} ms\n".format(pandas_import_time() * 1000))
+    print(
+        "{:>8} {:>14} {:>16} {:>16} {:>8}".format(
+            "rows", "builtin(ms)", "pandas dict(ms)", "pandas df(ms)", "speedup"
+        )
+    )
+    for rows in args.rows or ROWS:
+        data = make_grid(rows)
+        if parse_grid_text(data, dtype) != read_grid_dataframe(data, dtype).to_dict(
+            "records"
+        ):
+            print("{:>8} result mismatch".format(rows))
+            return 1
+        builtin = measure(lambda: parse_grid_text(data, dtype), args.repeat)
+        records = measure(
+            lambda: read_grid_dataframe(data, dtype).to_dict("records"), args.repeat
+        )
+        frame = measure(lambda: read_grid_dataframe(data, dtype), args.repeat)
+        print(
+            "{:>8} {:>14.3f} {:>16.3f} {:>16.3f} {:>7.1f}x".format(
+                rows, builtin * 1000, records * 1000, frame * 1000, records / builtin
+            )
+        )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,231 @@
+# coding: utf-8
+"""
+交易客户端端到端延迟基准测试
+
+在模拟客户端 (easytrader.simclient) 上反复执行 buy, sell, cancel_entrust,
+position, auto_ipo，统计各操作耗时的 p50/p95/p99 以及 perf_clock 记录的各方法耗时，
+并与 benchmarks/baseline.json 对比，超过阈值时返回非零退出码。
+
+用法::
+
+    python benchmarks/trader_latency.py                   # 运行并与基线对比
+    python benchmarks/trader_latency.py --update-baseline # 更新基线
+"""
+
+import argparse
+import collections
+import json
+import math
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# pylint: disable=wrong-import-position
+import easytrader
+from easytrader import simclient
+from easytrader.utils.perf import add_perf_listener, remove_perf_listener
+
+BASELINE_PATH = os.path.join(
+    os.path.dirname(os.path.abspath(__file__)), "baseline.json"
+)
+
+BROKERS = ["ths", "yh_client", "ht_client", "gj_client"]
+OPERATIONS = ["buy", "sell", "cancel_entrust", "position", "auto_ipo"]
+
+# 模拟一台普通配置机器上客户端的响应时间，单位为秒
+LATENCY = {
+    "find": 0.002,
+    "menu_switch": 0.05,
+    "refresh": 0.02,
+    "input": 0.005,
+    "click": 0.01,
+    "key": 0.005,
+    "dialog": 0.08,
+    "grid_copy": 0.02,
+    "grid_save": 0.05,
+}
+
+SECURITY = "162411"
+IPO_SECURITY = "787001"
+
+
+def percentile(samples, q):
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, max(0, math.ceil(q * len(ordered)) - 1))
+    return ordered[index]
+
+
+class MethodRecorder:
+    """通过 perf_clock 监听各方法耗时，按当前操作归类"""
+
+    def __init__(self):
+        self.current = None
+        # {操作: {方法: [总耗时, 调用次数]}}
+        self.methods = collections.defaultdict(
+            lambda: collections.defaultdict(lambda: [0.0, 0])
+        )
+
+    def __call__(self, name, elapsed, cpu):
+        if self.current is not None:
+            stats = self.methods[self.current][name]
+            stats[0] += elapsed
+            stats[1] += 1
+
+
+def setup_trader(broker):
+    user = easytrader.use(broker)
+    app = simclient.attach(user, latency=LATENCY)
+    app.account.add_position(SECURITY, 10**8, 0.5)
+    app.account.add_ipo(IPO_SECURITY, 10.0, 500)
+    return user, app
+
+
+def run_operation(user, app, op):
+    if op == "buy":
+        user.buy(SECURITY, price=0.55, amount=100)
+    elif op == "sell":
+        user.sell(SECURITY, price=0.56, amount=100)
+    elif op == "cancel_entrust":
+        entrust = app.account.order("buy", SECURITY, 0.5, 100)
+        user.cancel_entrust(entrust["合同编号"])
+    elif op == "position":
+        user.position
+    elif op == "auto_ipo":
+        user.auto_ipo()
+    else:
+        raise ValueError("unknown operation {}".format(op))
+
+
+def run_broker(broker, runs, recorder):
+    user, app = setup_trader(broker)
+    samples = collections.defaultdict(list)
+    for _ in range(runs):
+        for op in OPERATIONS:
+            recorder.current = (broker, op)
+            start = time.perf_counter()
+            run_operation(user, app, op)
+            samples[op].append(time.perf_counter() - start)
+            recorder.current = None
+    return samples
+
+
+def summarize(samples):
+    return {
+        op: {
+            "p50": round(percentile(values, 0.5), 4),
+            "p95": round(percentile(values, 0.95), 4),
+            "p99": round(percentile(values, 0.99), 4),
+        }
+        for op, values in samples.items()
+    }
+
+
+def print_report(results, recorder, runs, top):
+    print(
+        "{:<12} {:<16} {:>9} {:>9} {:>9}".format(
+            "broker", "operation", "p50", "p95", "p99"
+        )
+    )
+    for broker, ops in results.items():
+        for op, stats in ops.items():
+            print(
+                "{:<12} {:<16} {:>8.3f}s {:>8.3f}s {:>8.3f}s".format(
+                    broker, op, stats["p50"], stats["p95"], stats["p99"]
+                )
+            )
+    print()
+    print("method breakdown (mean per operation, top {}):".format(top))
+    for (broker, op), methods in recorder.methods.items():
+        print("  {} {}".format(broker, op))
+        ordered = sorted(methods.items(), key=lambda item: -item[1][0])
+        for name, (total, count) in ordered[:top]:
+            print(
+                "    {:<48} {:>8.3f}s {:>6.1f} calls".format(
+                    name, total / runs, count / runs
+                )
+            )
+
+
+def compare(results, baseline, threshold, min_delta):
+    """
+    返回超过基线的项目，耗时同时超过 基线 * (1 + threshold) 与 基线 + min_delta 时视为变慢
+    """
+    regressions = []
+    for broker, ops in results.items():
+        for op, stats in ops.items():
+            base = baseline.get(broker, {}).get(op)
+            if base is None:
+                continue
+            for key in ("p50", "p95"):
+                limit = max(base[key] * (1 + threshold), base[key] + min_delta)
+                if stats[key] > limit:
+                    regressions.append((broker, op, key, base[key], stats[key]))
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--runs", type=int, default=10, help="每个操作的执行次数")
+    parser.add_argument(
+        "--broker", action="append", choices=BROKERS, help="只测试指定券商"
+    )
+    parser.add_argument("--baseline", default=BASELINE_PATH, help="基线文件路径")
+    parser.add_argument(
+        "--update-baseline", action="store_true", help="用本次结果更新基线"
+    )
+    parser.add_argument(
+        "--threshold", type=float, default=0.2, help="允许的相对变慢比例"
+    )
+    parser.add_argument(
+        "--min-delta", type=float, default=0.05, help="允许的绝对变慢秒数"
+    )
+    parser.add_argument("--top", type=int, default=5, help="每个操作显示的方法数")
+    args = parser.parse_args(argv)
+
+    recorder = MethodRecorder()
+    add_perf_listener(recorder)
+    try:
+        results = {
+            broker: summarize(run_broker(broker, args.runs, recorder))
+            for broker in args.broker or BROKERS
+        }
+    finally:
+        remove_perf_listener(recorder)
+
+    print_report(results, recorder, args.runs, args.top)
+
+    if args.update_baseline:
+        baseline = {}
+        if os.path.exists(args.baseline):
+            with open(args.baseline, encoding="utf-8") as f:
+                baseline = json.load(f)
+        baseline.update(results)
+        with open(args.baseline, "w", encoding="utf-8") as f:
+            json.dump(baseline, f, indent=2, sort_keys=True)
+            f.write("\n")
+        print("\nbaseline updated: {}".format(args.baseline))
+        return 0
+
+    if not os.path.exists(args.baseline):
+        print("\nbaseline {} not found, skip comparison".format(args.baseline))
+        return 0
+    with open(args.baseline, encoding="utf-8") as f:
+        baseline = json.load(f)
+    regressions = compare(results, baseline, args.threshold, args.min_delta)
+    print()
+    if not regressions:
+        print("no regression against baseline")
+        return 0
+    for broker, op, key, base, current in regressions:
+        print(
+            "REGRESSION {} {} {}: {:.3f}s -> {:.3f}s".format(
+                broker, op, key, base, current
+            )
+        )
+    return 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,129 @@
+# -*- coding: utf-8 -*-
+import asyncio
+import concurrent.futures
+from typing import Callable, Optional, Union
+
+from easytrader import webtrader
+from easytrader.executor import GuiExecutor, call_trader
+
+# trader 没有对应属性时依次尝试的别名，如 WebTrader 的当日成交为 current_deal
+ALIASES = {
+    "today_trades": ("current_deal",),
+    "today_entrusts": ("entrust",),
+}
+
+
+class AsyncTrader:
+    """
+    trader 的 asyncio 封装，所有交易和查询接口都可以 await。
+
+    客户端 trader 的操作通过 GuiExecutor 在同一个线程中串行执行；
+    网页 trader (如 XueQiuTrader) 的 HTTP 请求互不影响，在线程池中并发执行。
+    RemoteClient 的服务端仍然操作同一个客户端界面，因此默认也串行执行
+    """
+
+    def __init__(
+        self,
+        trader,
+        executor: Optional[GuiExecutor] = None,
+        concurrent_calls: Optional[bool] = None,
+        max_workers: int = 4,
+    ):
+        """
+        :param trader: easytrader.use 返回的 trader
+        :param executor: 串行执行使用的 GuiExecutor，默认新建，
+            多个 AsyncTrader 可以共享同一个 GuiExecutor
+        :param concurrent_calls: 是否允许并发调用，默认网页 trader 并发，其它串行
+        :param max_workers: 并发调用时线程池的线程数
+        """
+        if concurrent_calls is None:
+            concurrent_calls = isinstance(trader, webtrader.WebTrader)
+        if concurrent_calls and executor is not None:
+            raise ValueError("concurrent_calls 与 executor 不能同时设置")
+        self._trader = trader
+        self._owns_executor = False
+        self._executor = None
+        self._pool = None
+        if concurrent_calls:
+            self._pool = concurrent.futures.ThreadPoolExecutor(
+                max_workers, thread_name_prefix="easytrader-async"
+            )
+        elif executor is not None:
+            self._executor = executor
+        else:
+            self._executor = GuiExecutor(trader)
+            self._owns_executor = True
+
+    @property
+    def trader(self):
+        return self._trader
+
+    async def call(
+        self,
+        method: Union[str, Callable],
+        *args,
+        timeout: Optional[float] = None,
+        **kwargs
+    ):
+        """
+        调用 trader 的方法或读取属性
+
+        :param method: 方法名、属性名，或以 trader 为第一个参数的函数
+        :param timeout: 超时秒数，超时抛出 asyncio.TimeoutError。
+            排队中的命令在超时或被取消后不会再执行，已经开始的操作无法中断
+        """
+        method = self._resolve(method)
+        if self._executor is not None:
+            future = self._executor.submit(method, *args, timeout=timeout, **kwargs)
+        else:
+            future = self._pool.submit(
+                call_trader, self._trader, method, *args, **kwargs
+            )
+        # wrap_future 在 await 被取消时同时取消 concurrent.futures.Future
+        return await asyncio.wait_for(asyncio.wrap_future(future), timeout)
+
+    async def buy(self, security, price, amount, timeout=None, **kwargs):
+        return await self.call(
+            "buy", security, price, amount, timeout=timeout, **kwargs
+        )
+
+    async def sell(self, security, price, amount, timeout=None, **kwargs):
+        return await self.call(
+            "sell", security, price, amount, timeout=timeout, **kwargs
+        )
+
+    async def cancel_entrust(self, entrust_no, timeout=None):
+        return await self.call("cancel_entrust", entrust_no, timeout=timeout)
+
+    async def position(self, timeout=None):
+        return await self.call("position", timeout=timeout)
+
+    async def balance(self, timeout=None):
+        return await self.call("balance", timeout=timeout)
+
+    async def today_trades(self, timeout=None):
+        return await self.call("today_trades", timeout=timeout)
+
+    async def today_entrusts(self, timeout=None):
+        return await self.call("today_entrusts", timeout=timeout)
+
+    def close(self, wait: bool = True):
+        """停止自己创建的执行线程，尚未开始的命令被取消"""
+        if self._owns_executor:
+            self._executor.shutdown(wait=wait, cancel_pending=True)
+        if self._pool is not None:
+            self._pool.shutdown(wait=wait)
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        await asyncio.get_event_loop().run_in_executor(None, self.close)
+
+    def _resolve(self, method):
+        if callable(method) or hasattr(type(self._trader), method):
+            return method
+        for alias in ALIASES.get(method, ()):
+            if hasattr(type(self._trader), alias):
+                return alias
+        return method
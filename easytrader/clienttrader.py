@@ -1,30 +1,48 @@
 # -*- coding: utf-8 -*-
 import abc
+import collections
+import datetime
 import functools
 import logging
 import os
 import re
 import sys
 import time
-from typing import Type, Union
+from typing import Optional, Type, Union
 
 import hashlib, binascii
 
 import easyutils
-from pywinauto import findwindows, timings
-
-from easytrader import grid_strategies, pop_dialog_handler, refresh_strategies
+from pywinauto import timings
+
+from easytrader import (
+    dialog_watcher,
+    exceptions,
+    grid_strategies,
+    pop_dialog_handler,
+    refresh_strategies,
+)
 from easytrader.config import client
+from easytrader.dialog_watcher import IDialogWatcher
 from easytrader.grid_strategies import IGridStrategy
 from easytrader.log import logger
+from easytrader.login_flow import LoginFlow
 from easytrader.refresh_strategies import IRefreshStrategy
 from easytrader.utils.misc import file2dict
-from easytrader.utils.perf import perf_clock
+from easytrader.utils.perf import OrderTimer, perf_clock
+from easytrader.utils import budget, tracing
+from easytrader.utils.security_table import SecurityTable
+from easytrader.utils.wait_model import WaitModel
+from easytrader.utils.win_gui import ElementNotFoundError
 
-if not sys.platform.startswith("darwin"):
+if sys.platform == "win32":
     import pywinauto
     import pywinauto.clipboard
 
+# set_result_format 支持的查询结果格式
+RESULT_FORMATS = ("records", "dataframe", "numpy")
+
+
 class IClientTrader(abc.ABC):
     @property
     @abc.abstractmethod
@@ -45,7 +63,7 @@ class IClientTrader(abc.ABC):
         pass
 
     @abc.abstractmethod
-    def wait(self, seconds: float):
+    def wait(self, seconds: float, op: Optional[str] = None):
         """Wait for operation return"""
         pass
 
@@ -59,12 +77,116 @@ class IClientTrader(abc.ABC):
         pass
 
 
+class _NullContext:
+    """不做任何事的 context manager，代替 Python 3.7 才有的 contextlib.nullcontext"""
+
+    def __enter__(self):
+        return None
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        return False
+
+
+_NULL_CONTEXT = _NullContext()
+
+
+def query_cache(f):
+    """
+    查询结果缓存，开启 enable_query_cache 后在 ttl 内直接返回上次的查询结果
+    """
+
+    @functools.wraps(f)
+    def wrapper(self):
+        if self._query_cache_ttl is None:
+            return f(self)
+        cached = self._query_cache.get(f.__name__)
+        if cached is not None and cached[0] > time.monotonic():
+            return cached[1]
+        result = f(self)
+        self._store_query_cache(f.__name__, result)
+        return result
+
+    return wrapper
+
+
+def order_timing(f):
+    """
+    开启 enable_order_timing 后记录委托各阶段耗时，嵌套调用时只记录最外层
+    """
+
+    @functools.wraps(f)
+    def wrapper(self, security, *args, **kwargs):
+        if self._order_timing is None or self._order_timer is not None:
+            return f(self, security, *args, **kwargs)
+        attach, callback = self._order_timing
+        timer = OrderTimer(f.__name__, self.broker_type, security)
+        self._order_timer = timer
+        try:
+            result = f(self, security, *args, **kwargs)
+        except Exception as e:
+            self._order_timer = None
+            if callback is not None:
+                callback(timer.finish(e))
+            raise
+        self._order_timer = None
+        record = timer.finish()
+        if callback is not None:
+            callback(record)
+        if attach and isinstance(result, dict):
+            result = dict(result, timing=record)
+        return result
+
+    return wrapper
+
+
+def clear_query_cache_after(f):
+    """交易、撤单等会改变账户状态的操作完成后清空查询缓存"""
+
+    @functools.wraps(f)
+    def wrapper(self, *args, **kwargs):
+        try:
+            return f(self, *args, **kwargs)
+        finally:
+            self.clear_query_cache()
+
+    return wrapper
+
+
+class PywinautoWindowBackend(dialog_watcher.IWindowBackend):
+    """通过比较主窗口与顶层窗口的句柄判断是否存在弹窗"""
+
+    def __init__(self, trader: IClientTrader):
+        self._trader = trader
+
+    def top_dialog(self):
+        try:
+            top_window = self._trader.app.top_window().wrapper_object()
+            if self._trader.main.wrapper_object() != top_window:
+                return top_window.handle
+        except (
+            ElementNotFoundError,
+            timings.TimeoutError,
+            RuntimeError,
+        ):
+            logger.debug("check pop dialog failed", exc_info=True)
+        return None
+
+
 class ClientTrader(IClientTrader):
     _editor_need_type_keys = False
     # The strategy to use for getting grid data
     grid_strategy: Union[IGridStrategy, Type[IGridStrategy]] = grid_strategies.Copy
     _grid_strategy_instance: IGridStrategy = None
     refresh_strategy: IRefreshStrategy = refresh_strategies.Switch()
+    # The watcher used to wait for pop dialogs
+    pop_dialog_watcher: IDialogWatcher = dialog_watcher.Polling()
+    # 下单、撤单后等待结果弹窗的最短时间。开启 adaptive wait 后不低于该值，
+    # 避免等待时间被快速样本压得过短，漏掉稍晚弹出的委托结果
+    trade_dialog_min_timeout = 0.5
+    # batch_trade 中各交易方向对应的页面，按执行顺序排列，先卖后买
+    _BATCH_TRADE_MENUS = collections.OrderedDict(
+        [("sell", ["卖出[F2]"]), ("buy", ["买入[F1]"])]
+    )
 
     def enable_type_keys_for_editor(self):
         """
@@ -72,6 +194,85 @@ class ClientTrader(IClientTrader):
         """
         self._editor_need_type_keys = True
 
+    def enable_query_cache(self, ttl=1.0):
+        """
+        缓存 position, today_entrusts, today_trades, cancel_entrusts 的查询结果，
+        ttl 秒内重复查询直接返回缓存，调用 buy, sell, cancel_entrust 等操作后缓存自动失效。
+        注意返回的是同一个对象，请勿修改
+        :param ttl: 缓存有效期，单位为秒，为 None 时关闭缓存
+        """
+        self._query_cache_ttl = ttl
+        self.clear_query_cache()
+
+    def clear_query_cache(self):
+        self._query_cache.clear()
+
+    def _store_query_cache(self, name, result):
+        if self._query_cache_ttl is not None:
+            self._query_cache[name] = (time.monotonic() + self._query_cache_ttl, result)
+
+    def set_result_format(self, result_format="records"):
+        """
+        设置 position, today_entrusts, today_trades, cancel_entrusts 及 snapshot 中
+        对应查询的返回格式，其他接口及内部逻辑仍使用 list of dict
+        :param result_format: 'records' 为 list of dict, 'dataframe' 为 pandas.DataFrame,
+            'numpy' 为 numpy 结构化数组 (numpy.recarray)，后两者直接由 grid 解析结果生成，
+            不再逐行创建 dict
+        """
+        if result_format not in RESULT_FORMATS:
+            raise ValueError(
+                "result_format must be one of {}".format(", ".join(RESULT_FORMATS))
+            )
+        self._result_format = result_format
+        self.clear_query_cache()
+
+    def enable_order_timing(self, attach=True, callback=None):
+        """
+        记录每次委托 (buy, sell, market_buy, market_sell 等) 各阶段的耗时:
+        menu_switch, field_entry, submit, dialog_wait, dialog_handle
+        :param attach: 是否在委托结果中增加 timing 字段
+        :param callback: 每次委托结束后以耗时记录为参数调用，委托失败时同样调用
+        """
+        self._order_timing = (attach, callback)
+
+    def disable_order_timing(self):
+        self._order_timing = None
+
+    def _timing_phase(self, name):
+        if self._order_timer is None:
+            return _NULL_CONTEXT
+        return self._order_timer.phase(name)
+
+    def enable_adaptive_wait(self, path="wait_model.json", **kwargs):
+        """
+        根据界面实际响应速度自动调整各操作的等待时间，统计结果保存在 path 中，
+        重启后继续使用
+        :param path: 统计结果保存路径，为 None 时只在内存中统计
+        :param kwargs: 传递给 WaitModel 的其他参数
+        """
+        self._wait_model = WaitModel(path, **kwargs)
+
+    def set_security_table(self, table):
+        """
+        设置证券参考数据，下单前在本地按最小价格变动单位修正价格，
+        超出涨跌停范围的委托直接抛出 TradeError，不再操作客户端
+        :param table: SecurityTable 或 SecurityTable.load 支持的文件路径，为 None 时关闭
+        """
+        if isinstance(table, str):
+            table = SecurityTable.load(table)
+        self._security_table = table
+
+    def _check_trade_price(self, security, price):
+        """返回修正精度后的价格"""
+        if self._security_table is None:
+            return price
+        return self._security_table.check_price(security, price)
+
+    def _round_price(self, security, price):
+        if self._security_table is None:
+            return easyutils.round_price_by_code(price, security[-6:])
+        return self._security_table.round_price(security, price)
+
     @property
     def grid_strategy_instance(self):
         if self._grid_strategy_instance is None:
@@ -88,6 +289,22 @@ class ClientTrader(IClientTrader):
         self._app = None
         self._main = None
         self._toolbar = None
+        self._window_backend = PywinautoWindowBackend(self)
+        self._wait_model: Optional[WaitModel] = None
+        self._control_cache = {}
+        self._control_cache_main = None
+        # 当前左侧菜单选中的页面 (path, item, main)
+        self._current_menu = None
+        self._query_cache_ttl = None
+        self._query_cache = {}
+        # 下拉框选项的序号 {(control_id, 交易所, 选项): 序号}
+        self._combo_index_cache = {}
+        self._security_table: Optional[SecurityTable] = None
+        # (attach, callback)，为 None 时不记录委托耗时
+        self._order_timing = None
+        self._order_timer: Optional[OrderTimer] = None
+        # position, today_entrusts, today_trades, cancel_entrusts 的返回格式
+        self._result_format = "records"
 
     @property
     def app(self):
@@ -123,67 +340,236 @@ class ClientTrader(IClientTrader):
         return "ths"
 
     @property
+    @perf_clock
     def balance(self):
-        self._switch_left_menus(["查询[F4]", "资金股票"])
+        self._switch_left_menus(self._config.BALANCE_MENU_PATH)
 
-        return self._get_balance_from_statics()
+        return self._get_balance()
 
     def _init_toolbar(self):
         self._toolbar = self._main.child_window(class_name="ToolbarWindow32")
 
+    def _get_balance(self):
+        return self._get_balance_from_statics()
+
     def _get_balance_from_statics(self):
         result = {}
         for key, control_id in self._config.BALANCE_CONTROL_ID_GROUP.items():
-            result[key] = float(
-                self._main.child_window(
-                    control_id=control_id, class_name="Static"
-                ).window_text()
-            )
+            result[key] = float(self._get_control(control_id, "Static").window_text())
         return result
 
     @property
+    @query_cache
+    @perf_clock
     def position(self):
-        self._switch_left_menus(["查询[F4]", "资金股票"])
+        self._switch_left_menus(self._config.POSITION_MENU_PATH)
 
-        return self._get_grid_data(self._config.COMMON_GRID_CONTROL_ID)
+        return self._query_grid_data(self._config.COMMON_GRID_CONTROL_ID)
 
     @property
+    @query_cache
+    @perf_clock
     def today_entrusts(self):
-        self._switch_left_menus(["查询[F4]", "当日委托"])
+        self._switch_left_menus(self._config.TODAY_ENTRUSTS_MENU_PATH)
 
-        return self._get_grid_data(self._config.COMMON_GRID_CONTROL_ID)
+        return self._query_grid_data(self._config.COMMON_GRID_CONTROL_ID)
 
     @property
+    @query_cache
+    @perf_clock
     def today_trades(self):
-        self._switch_left_menus(["查询[F4]", "当日成交"])
+        self._switch_left_menus(self._config.TODAY_TRADES_MENU_PATH)
 
-        return self._get_grid_data(self._config.COMMON_GRID_CONTROL_ID)
+        return self._query_grid_data(self._config.COMMON_GRID_CONTROL_ID)
+
+    @perf_clock
+    def snapshot(self):
+        """
+        一次性获取资金、持仓、当日委托和当日成交。
+        按页面分组读取，资金与持仓共用同一页面，当前所在页面优先读取，减少页面切换。
+        客户端只能读取当前页面的数据，且 F5 只刷新当前页面，
+        因此每个页面切换后各刷新一次，同一页面的数据在一次刷新后全部读取
+        :return: {'timestamp': 读取开始时间, 'balance': 资金, 'position': 持仓,
+            'today_entrusts': 当日委托, 'today_trades': 当日成交}
+        """
+        readers = [
+            ("balance", self._config.BALANCE_MENU_PATH, self._get_balance),
+            ("position", self._config.POSITION_MENU_PATH, self._get_common_grid_data),
+            (
+                "today_entrusts",
+                self._config.TODAY_ENTRUSTS_MENU_PATH,
+                self._get_common_grid_data,
+            ),
+            (
+                "today_trades",
+                self._config.TODAY_TRADES_MENU_PATH,
+                self._get_common_grid_data,
+            ),
+        ]
+        pages = collections.OrderedDict()
+        for name, path, reader in readers:
+            pages.setdefault(tuple(path), []).append((name, reader))
+        for path in pages:
+            if self._is_current_menu(path):
+                pages.move_to_end(path, last=False)
+                break
+
+        result = {"timestamp": datetime.datetime.now()}
+        for path, page_readers in pages.items():
+            self._switch_left_menus(list(path))
+            for name, reader in page_readers:
+                result[name] = reader()
+        for name in ("position", "today_entrusts", "today_trades"):
+            self._store_query_cache(name, result[name])
+        return result
+
+    def _get_common_grid_data(self):
+        return self._query_grid_data(self._config.COMMON_GRID_CONTROL_ID)
 
     @property
+    @query_cache
+    @perf_clock
     def cancel_entrusts(self):
-        self.refresh()
-        self._switch_left_menus(["撤单[F3]"])
+        self._switch_cancel_page()
+
+        return self._query_grid_data(self._config.COMMON_GRID_CONTROL_ID)
+
+    def _get_cancel_entrusts(self):
+        self._switch_cancel_page()
 
         return self._get_grid_data(self._config.COMMON_GRID_CONTROL_ID)
 
+    def _switch_cancel_page(self):
+        self.refresh()
+        self._switch_left_menus(["撤单[F3]"])
+
     @perf_clock
     def cancel_entrust(self, entrust_no):
-        self.refresh()
-        for i, entrust in enumerate(self.cancel_entrusts):
-            if entrust[self._config.CANCEL_ENTRUST_ENTRUST_FIELD] == entrust_no:
-                self._cancel_entrust_by_double_click(i)
-                return self._handle_pop_dialogs()
-        return {"message": "委托单状态错误不能撤单, 该委托单可能已经成交或者已撤"}
+        return self.cancel_entrusts_by_ids([entrust_no])[entrust_no]
 
-    def cancel_all_entrusts(self):
-        self.refresh()
-        self._switch_left_menus(["撤单[F3]"])
+    @perf_clock
+    @clear_query_cache_after
+    def cancel_entrusts_by_ids(self, entrust_nos):
+        """
+        批量撤单，只读取一次撤单列表，按行号从下往上撤销，保证未撤销行的行号不变
+        :param entrust_nos: 委托单号列表
+        :return: {委托单号: 撤单结果}，撤单结果与 cancel_entrust 一致
+        """
+        return self._cancel_entrusts_in_grid(self._get_cancel_entrusts(), entrust_nos)
 
-        # 点击全部撤销控件
-        self._app.top_window().child_window(
-            control_id=self._config.TRADE_CANCEL_ALL_ENTRUST_CONTROL_ID, class_name="Button", title_re="""全撤.*"""
-        ).click()
-        self.wait(0.2)
+    def _cancel_entrusts_in_grid(self, entrusts, entrust_nos):
+        """
+        在当前撤单列表中撤销指定委托
+        :param entrusts: 当前撤单页面读取的撤单列表
+        :param entrust_nos: 委托单号列表
+        """
+        rows = {}
+        for i, entrust in enumerate(entrusts):
+            rows.setdefault(str(entrust[self._config.CANCEL_ENTRUST_ENTRUST_FIELD]), i)
+
+        results = collections.OrderedDict()
+        targets = []
+        for entrust_no in entrust_nos:
+            if entrust_no in results:
+                continue
+            row = rows.get(str(entrust_no))
+            if row is None:
+                results[entrust_no] = {
+                    "message": "委托单状态错误不能撤单, 该委托单可能已经成交或者已撤"
+                }
+            else:
+                results[entrust_no] = None
+                targets.append((row, entrust_no))
+
+        for row, entrust_no in sorted(targets, key=lambda t: t[0], reverse=True):
+            self._cancel_entrust_by_double_click(row)
+            results[entrust_no] = self._handle_pop_dialogs()
+        return results
+
+    @perf_clock
+    @clear_query_cache_after
+    def cancel_all_entrusts(self, side=None, securities=None, older_than=None):
+        """
+        撤销全部委托，或按条件撤销部分委托。
+        只按买卖方向撤单且配置中设置了撤买、撤卖按钮时使用对应按钮，
+        其他情况只读取一次撤单列表，筛选后逐个撤销
+        :param side: 只撤销买单 'buy' 或卖单 'sell'，默认不限
+        :param securities: 只撤销指定证券的委托，类似 ['162411', 'sz000001']
+        :param older_than: 只撤销 older_than 秒之前提交的委托
+        :return: 通过全撤、撤买、撤卖按钮撤单时返回 None，否则返回 {委托单号: 撤单结果}。
+            撤买、撤卖按钮默认为 None，按方向撤单时逐个撤销
+        """
+        buttons = {
+            None: (self._config.TRADE_CANCEL_ALL_ENTRUST_CONTROL_ID, "全撤.*"),
+            "buy": (self._config.TRADE_CANCEL_BUY_ENTRUST_CONTROL_ID, "撤买.*"),
+            "sell": (self._config.TRADE_CANCEL_SELL_ENTRUST_CONTROL_ID, "撤卖.*"),
+        }
+        if side not in buttons:
+            raise ValueError("不支持的撤单方向: {}".format(side))
+
+        control_id, title_re = buttons[side]
+        if securities is None and older_than is None and control_id is not None:
+            self.refresh()
+            self._switch_left_menus(["撤单[F3]"])
+            self._cancel_by_button(control_id, title_re)
+            return None
+
+        entrusts = self._get_cancel_entrusts()
+
+        if securities is not None:
+            securities = {str(security)[-6:] for security in securities}
+        now = datetime.datetime.now()
+        entrust_nos = [
+            entrust[self._config.CANCEL_ENTRUST_ENTRUST_FIELD]
+            for entrust in entrusts
+            if self._match_cancel_filter(entrust, side, securities, older_than, now)
+        ]
+        return self._cancel_entrusts_in_grid(entrusts, entrust_nos)
+
+    def _match_cancel_filter(self, entrust, side, securities, older_than, now):
+        if side is not None:
+            action = str(entrust[self._config.CANCEL_ENTRUST_SIDE_FIELD])
+            if ("买" if side == "buy" else "卖") not in action:
+                return False
+        if securities is not None:
+            code = str(entrust[self._config.CANCEL_ENTRUST_SECURITY_FIELD])
+            if code.zfill(6) not in securities:
+                return False
+        if older_than is not None:
+            entrust_time = self._parse_entrust_time(
+                entrust[self._config.CANCEL_ENTRUST_TIME_FIELD], now
+            )
+            if entrust_time is None:
+                return False
+            if (now - entrust_time).total_seconds() < older_than:
+                return False
+        return True
+
+    @staticmethod
+    def _parse_entrust_time(value, now):
+        value = str(value).strip()
+        for fmt in ("%H:%M:%S", "%H%M%S"):
+            try:
+                entrust_time = datetime.datetime.strptime(value, fmt).time()
+            except ValueError:
+                continue
+            return datetime.datetime.combine(now.date(), entrust_time)
+        return None
+
+    def _cancel_by_button(self, control_id, title_re):
+        """
+        点击撤单页面的全撤、撤买或撤卖按钮并确认。
+        同一控件 id 在不同券商的客户端中可能是其他按钮，文字不符时不点击并抛出异常
+        :param title_re: 按钮文字需要匹配的正则，类似 '全撤.*'
+        """
+        button = self._get_control(control_id, "Button")
+        title = button.window_text()
+        if not re.match(title_re, title):
+            raise exceptions.TradeError(
+                "撤单按钮 {} 的文字为 {}，与 {} 不符".format(control_id, title, title_re)
+            )
+        button.click()
+        self.wait(0.2, "cancel_all")
 
         # 等待出现 确认兑换框
         if self.is_exist_pop_dialog():
@@ -193,36 +579,127 @@ class ClientTrader(IClientTrader):
                 btn = w["是(Y)"]
                 if btn is not None:
                     btn.click()
-                    self.wait(0.2)
+                    self.wait(0.2, "confirm_dialog")
 
         # 如果出现了确认窗口
         self.close_pop_dialog()
 
     @perf_clock
+    @order_timing
     def repo(self, security, price, amount, **kwargs):
         self._switch_left_menus(["债券回购", "融资回购（正回购）"])
 
         return self.trade(security, price, amount)
 
     @perf_clock
+    @order_timing
     def reverse_repo(self, security, price, amount, **kwargs):
         self._switch_left_menus(["债券回购", "融劵回购（逆回购）"])
 
         return self.trade(security, price, amount)
 
     @perf_clock
+    @order_timing
     def buy(self, security, price, amount, **kwargs):
+        price = self._check_trade_price(security, price)
         self._switch_left_menus(["买入[F1]"])
 
         return self.trade(security, price, amount)
 
     @perf_clock
+    @order_timing
     def sell(self, security, price, amount, **kwargs):
+        price = self._check_trade_price(security, price)
         self._switch_left_menus(["卖出[F2]"])
 
         return self.trade(security, price, amount)
 
     @perf_clock
+    def batch_trade(self, orders):
+        """
+        批量限价委托，先卖后买，同方向的委托在同一页面连续提交，减少页面切换。
+        所有委托在第一次操作界面之前完成校验，单个委托出错不影响其他委托。
+        委托确认框为模态窗口，关闭前无法在交易页面输入下一笔委托，
+        因此各委托的输入与弹窗处理依次进行
+        :param orders: 委托列表，每个委托为 dict，
+            类似 {'action': 'buy', 'security': '162411', 'price': 0.55, 'amount': 100},
+            action 可选 ['buy', 'sell']
+        :return: 与 orders 顺序一致的结果列表，
+            成功时为 {'entrust_no': '委托单号'}，失败时为 {'error': '错误信息'}
+        """
+        start = time.monotonic()
+        results = [None] * len(orders)
+        params = [None] * len(orders)
+        for i, order in enumerate(orders):
+            try:
+                params[i] = self._check_batch_order(order)
+            except exceptions.TradeError as e:
+                results[i] = {"error": str(e)}
+
+        for action, menu_path in self._BATCH_TRADE_MENUS.items():
+            indexes = [
+                i
+                for i, order in enumerate(orders)
+                if results[i] is None and order["action"] == action
+            ]
+            if not indexes:
+                continue
+            self._switch_left_menus(menu_path)
+            for i in indexes:
+                try:
+                    results[i] = self.trade(*params[i])
+                # pylint: disable=broad-except
+                except Exception as e:
+                    logger.exception("batch_trade order %s failed", orders[i])
+                    results[i] = {"error": str(e)}
+                    # 关闭残留弹窗失败时继续提交后续委托，由后续委托的结果反映界面状态
+                    try:
+                        self.close_pop_dialog()
+                    # pylint: disable=broad-except
+                    except Exception:
+                        logger.exception("batch_trade close pop dialog failed")
+
+        cost = time.monotonic() - start
+        logger.debug(
+            "batch_trade %d orders in %.2f sec, %.1f orders/min",
+            len(orders),
+            cost,
+            len(orders) / cost * 60 if cost > 0 else 0,
+        )
+        return results
+
+    def _check_batch_order(self, order):
+        """
+        校验 batch_trade 的单个委托
+        :return: trade 的参数 (security, price, amount)
+        """
+        if not isinstance(order, dict):
+            raise exceptions.TradeError("委托格式错误: {!r}".format(order))
+        missing = [
+            key for key in ("action", "security", "price", "amount") if key not in order
+        ]
+        if missing:
+            raise exceptions.TradeError("委托缺少字段: {}".format(", ".join(missing)))
+        if order["action"] not in self._BATCH_TRADE_MENUS:
+            raise exceptions.TradeError("不支持的交易类型: {}".format(order["action"]))
+        security = order["security"]
+        if not isinstance(security, str) or not security[-6:].isdigit():
+            raise exceptions.TradeError("证券代码错误: {!r}".format(security))
+        try:
+            price = float(order["price"])
+            amount = int(order["amount"])
+        except (TypeError, ValueError):
+            raise exceptions.TradeError(
+                "价格或数量错误: {!r}, {!r}".format(order["price"], order["amount"])
+            )
+        if price <= 0 or amount <= 0:
+            raise exceptions.TradeError(
+                "价格和数量需要大于 0: {!r}, {!r}".format(price, amount)
+            )
+        return security, self._check_trade_price(security, price), amount
+
+    @perf_clock
+    @order_timing
     def market_buy(self, security, amount, ttype=None, limit_price=None, **kwargs):
         """
         市价买入
@@ -240,6 +717,7 @@ class ClientTrader(IClientTrader):
         return self.market_trade(security, amount, ttype, limit_price=limit_price)
 
     @perf_clock
+    @order_timing
     def market_sell(self, security, amount, ttype=None, limit_price=None, **kwargs):
         """
         市价卖出
@@ -255,6 +733,8 @@ class ClientTrader(IClientTrader):
 
         return self.market_trade(security, amount, ttype, limit_price=limit_price)
 
+    @order_timing
+    @clear_query_cache_after
     def market_trade(self, security, amount, ttype=None, limit_price=None, **kwargs):
         """
         市价交易
@@ -266,146 +746,235 @@ class ClientTrader(IClientTrader):
 
         :return: {'entrust_no': '委托单号'}
         """
+        with self._timing_phase("field_entry"):
+            self._set_market_trade_fields(security, amount, ttype, limit_price)
+        with self._timing_phase("submit"):
+            self._submit_trade()
+
+        return self._handle_pop_dialogs(
+            handler_class=pop_dialog_handler.TradePopDialogHandler
+        )
+
+    def _set_market_trade_fields(self, security, amount, ttype, limit_price):
         code = security[-6:]
         self._type_edit_control_keys(self._config.TRADE_SECURITY_CONTROL_ID, code)
         if ttype is not None:
-            retry = 0
-            retry_max = 10
-            while retry < retry_max:
+            # 输入证券代码后客户端才会加载对应交易所的市价类型
+            exchange = easyutils.get_stock_type(security)
+
+            def select():
                 try:
-                    self._set_market_trade_type(ttype)
-                    break
-                except:
-                    retry += 1
-                    self.wait(0.1)
-        self._set_market_trade_params(security, amount, limit_price=limit_price)
-        self._submit_trade()
+                    return self._select_market_trade_type(ttype, exchange)
+                except ElementNotFoundError:
+                    return False
 
-        return self._handle_pop_dialogs(
-            handler_class=pop_dialog_handler.TradePopDialogHandler
-        )
+            if not self.wait_until(select, "market_type", 1):
+                logger.warning("market trade type %s not found, use default", ttype)
+        self._set_market_trade_params(security, amount, limit_price=limit_price)
 
-    def _set_market_trade_type(self, ttype):
+    def _set_market_trade_type(self, ttype, exchange=None):
         """根据选择的市价交易类型选择对应的下拉选项"""
-        selects = self._main.child_window(
-            control_id=self._config.TRADE_MARKET_TYPE_CONTROL_ID, class_name="ComboBox"
+        if not self._select_market_trade_type(ttype, exchange):
+            raise TypeError("不支持对应的市价类型: {}".format(ttype))
+
+    def _select_market_trade_type(self, ttype, exchange=None):
+        """
+        :param exchange: 'sh' 或 'sz'，两个交易所的市价类型选项不同，分别缓存选项序号
+        :return: 是否选中
+        """
+        pattern = re.compile(ttype)
+        return self._select_combo_item(
+            self._config.TRADE_MARKET_TYPE_CONTROL_ID,
+            (exchange, ttype),
+            lambda text: pattern.search(text) is not None,
         )
-        for i, text in enumerate(selects.texts()):
-            # skip 0 index, because 0 index is current select index
-            if i == 0:
-                if re.search(ttype, text):  # 当前已经选中
-                    return
-                else:
-                    continue
-            if re.search(ttype, text):
-                selects.select(i - 1)
-                return
-        raise TypeError("不支持对应的市价类型: {}".format(ttype))
 
     def _set_stock_exchange_type(self, ttype):
         """根据选择的市价交易类型选择对应的下拉选项"""
-        selects = self._main.child_window(
-            control_id=self._config.TRADE_STOCK_EXCHANGE_CONTROL_ID, class_name="ComboBox"
-        )
+        ttype = ttype.strip()
+        if not self._select_combo_item(
+            self._config.TRADE_STOCK_EXCHANGE_CONTROL_ID,
+            ttype,
+            lambda text: text.strip() == ttype,
+        ):
+            raise TypeError("不支持对应的市场类型: {}".format(ttype))
+
+    def _select_combo_item(self, control_id, key, match):
+        """
+        选择下拉框中符合 match 的选项。选项序号在第一次查找后缓存，
+        之后直接按序号选择，选中的文本不符合 (客户端选项变化) 时重新查找
+        :param key: 缓存的键，选项列表不同的情况 (如不同交易所) 需要使用不同的键
+        :param match: 判断选项文本是否符合的函数
+        :return: 是否选中
+        """
+        selects = self._get_control(control_id, "ComboBox")
+        cache_key = (control_id, key)
+        index = self._combo_index_cache.get(cache_key)
+        if index is not None:
+            try:
+                if selects.selected_index() != index:
+                    selects.select(index)
+                if match(selects.selected_text()):
+                    return True
+            except (IndexError, ValueError):
+                pass
+            del self._combo_index_cache[cache_key]
 
-        for i, text in enumerate(selects.texts()):
-            # skip 0 index, because 0 index is current select index
-            if i == 0:
-                if ttype.strip() == text.strip():  # 当前已经选中
-                    return
-                else:
-                    continue
-            if ttype.strip() == text.strip():
-                selects.select(i - 1)
-                return
-        raise TypeError("不支持对应的市场类型: {}".format(ttype))
+        # texts() 的第 0 项为当前选中的文本
+        for i, text in enumerate(selects.texts()[1:]):
+            if match(text):
+                if selects.selected_index() != i:
+                    selects.select(i)
+                self._combo_index_cache[cache_key] = i
+                return True
+        return False
 
+    @perf_clock
+    @clear_query_cache_after
     def auto_ipo(self):
+        """
+        批量申购当日所有可申购的新股
+        :return: {'message': 申购结果}，客户端对整批申购只给出一个提示，
+            需要每只新股各自的结果时使用 auto_ipo_one
+        """
         self._switch_left_menus(self._config.AUTO_IPO_MENU_PATH)
 
         stock_list = self._get_grid_data(self._config.COMMON_GRID_CONTROL_ID)
 
         if len(stock_list) == 0:
             return {"message": "今日无新股"}
-        invalid_list_idx = [
-            i for i, v in enumerate(stock_list) if v[self.config.AUTO_IPO_NUMBER] <= 0
-        ]
+        invalid_list_idx = self._get_invalid_ipo_rows(stock_list)
 
         if len(stock_list) == len(invalid_list_idx):
             return {"message": "没有发现可以申购的新股"}
 
         self._click(self._config.AUTO_IPO_SELECT_ALL_BUTTON_CONTROL_ID)
-        self.wait(0.1)
+        self.wait(0.1, "ipo_select")
 
+        # 表格控件只解析一次，依次取消选中不可申购的行
+        grid = self._get_control(
+            self._config.COMMON_GRID_CONTROL_ID, "CVirtualGridCtrl"
+        )
         for row in invalid_list_idx:
-            self._click_grid_by_row(row)
-        self.wait(0.1)
+            grid.click(coords=self._get_grid_row_coords(row))
+        if invalid_list_idx:
+            self.wait(0.1, "ipo_select")
 
         self._click(self._config.AUTO_IPO_BUTTON_CONTROL_ID)
-        self.wait(0.1)
 
         return self._handle_pop_dialogs()
 
+    @perf_clock
+    @clear_query_cache_after
     def auto_ipo_one(self):
+        """
+        逐只申购当日所有可申购的新股，不可申购的新股直接跳过
+        :return: {'message': 'success', 'results': {证券代码: 该新股的申购结果}}
+        """
         self._switch_left_menus(self._config.AUTO_IPO_MENU_PATH_ONE)
 
         stock_list = self._get_grid_data(self._config.COMMON_GRID_CONTROL_ID)
 
         if len(stock_list) == 0:
             return {"message": "今日无新股"}
-        invalid_list_idx = [
-            i for i, v in enumerate(stock_list) if v[self.config.AUTO_IPO_NUMBER] <= 0
-        ]
+        invalid_list_idx = self._get_invalid_ipo_rows(stock_list)
 
         if len(stock_list) == len(invalid_list_idx):
-            return {"message": "没有发现可以申购的新股"}
+            return {
+                "message": "没有发现可以申购的新股",
+                "results": self._ipo_one_results(stock_list, {}),
+            }
 
+        grid = self._get_control(
+            self._config.COMMON_GRID_CONTROL_ID, "CVirtualGridCtrl"
+        )
+        row_results = {}
         for row in range(len(stock_list)):
-            self._double_click_grid_by_row(row)
+            if row in invalid_list_idx:
+                continue
+            grid.double_click(coords=self._get_grid_row_coords(row))
             self._click(self._config.AUTO_IPO_STATIC_CONTROL_ID, "Static")
             self._click(self._config.AUTO_IPO_BUTTON_CONTROL_ID)
-            self.wait(0.1)
-            self._handle_pop_dialogs()
-        self.wait(0.1)
+            row_results[row] = self._handle_pop_dialogs()
 
-        return self._handle_pop_dialogs()
+        return {
+            "message": "success",
+            "results": self._ipo_one_results(stock_list, row_results),
+        }
 
-    def _click_grid_by_row(self, row):
+    def _get_invalid_ipo_rows(self, stock_list):
+        return [
+            i for i, v in enumerate(stock_list) if v[self.config.AUTO_IPO_NUMBER] <= 0
+        ]
+
+    def _ipo_one_results(self, stock_list, row_results):
+        """
+        :param row_results: {行号: 该行申购后弹窗的处理结果}，跳过的行不在其中
+        :return: {证券代码: 申购结果}
+        """
+        security_field = self._config.AUTO_IPO_SECURITY_FIELD
+        results = collections.OrderedDict()
+        for row, stock in enumerate(stock_list):
+            results[str(stock[security_field])] = row_results.get(
+                row, {"message": "可申购数量为0"}
+            )
+        return results
+
+    def _get_grid_row_coords(self, row):
         x = self._config.COMMON_GRID_LEFT_MARGIN
         y = (
             self._config.COMMON_GRID_FIRST_ROW_HEIGHT
             + self._config.COMMON_GRID_ROW_HEIGHT * row
         )
-        self._app.top_window().child_window(
-            control_id=self._config.COMMON_GRID_CONTROL_ID,
-            class_name="CVirtualGridCtrl",
-        ).click(coords=(x, y))
+        return x, y
+
+    def _click_grid_by_row(self, row):
+        self._get_control(
+            self._config.COMMON_GRID_CONTROL_ID, "CVirtualGridCtrl"
+        ).click(coords=self._get_grid_row_coords(row))
 
     def _double_click_grid_by_row(self, row):
-        x = self._config.COMMON_GRID_LEFT_MARGIN
-        y = (
-            self._config.COMMON_GRID_FIRST_ROW_HEIGHT
-            + self._config.COMMON_GRID_ROW_HEIGHT * row
-        )
-        self._app.top_window().child_window(
-            control_id=self._config.COMMON_GRID_CONTROL_ID,
-            class_name="CVirtualGridCtrl",
-        ).double_click(coords=(x, y))
+        self._get_control(
+            self._config.COMMON_GRID_CONTROL_ID, "CVirtualGridCtrl"
+        ).double_click(coords=self._get_grid_row_coords(row))
 
     @perf_clock
-    def is_exist_pop_dialog(self):
-        self.wait(0.5)  # wait dialog display
-        try:
-            return (
-                self._main.wrapper_object() != self._app.top_window().wrapper_object()
-            )
-        except (
-            findwindows.ElementNotFoundError,
-            timings.TimeoutError,
-            RuntimeError,
-        ) as ex:
-            logger.exception("check pop dialog timeout")
-            return False
+    def is_exist_pop_dialog(self, timeout=None):
+        """
+        等待弹窗出现，弹窗出现后立即返回，最长等待时间由 pop_dialog_watcher 决定
+        :param timeout: 最长等待时间，单位为秒，默认使用 pop_dialog_watcher 的配置
+        """
+        return self._wait_pop_dialog(timeout) is not None
+
+    def _wait_pop_dialog(self, timeout=None, ignore=(), op="pop_dialog", expected=False):
+        """
+        :param op: 记录弹出时间使用的操作名
+        :param expected: 弹窗是否必然出现，为 True 时超时也计入统计，
+            使之后的等待时间变长
+        """
+        default = self.pop_dialog_watcher.timeout
+        if timeout is None:
+            timeout = self._wait_timeout(default, op)
+        start = time.monotonic()
+        dialog = self.pop_dialog_watcher.wait(self._window_backend, timeout, ignore)
+        if dialog is not None:
+            self._record_wait(op, time.monotonic() - start, default)
+        elif expected and self._wait_model is not None:
+            self._wait_model.record_timeout(self.broker_type, op, timeout, default)
+        return dialog
+
+    def _wait_trade_dialog(self, ignore=()):
+        """
+        等待下单、撤单等操作的结果弹窗。
+        已经处理过弹窗 (ignore 不为空) 后的超时是正常结束，不计为未等到
+        """
+        timeout = max(
+            self._wait_timeout(self.pop_dialog_watcher.timeout, "trade_dialog"),
+            self.trade_dialog_min_timeout,
+        )
+        return self._wait_pop_dialog(
+            timeout, ignore, "trade_dialog", expected=not ignore
+        )
 
     @perf_clock
     def close_pop_dialog(self):
@@ -414,9 +983,9 @@ class ClientTrader(IClientTrader):
                 w = self._app.top_window()
                 if w is not None:
                     w.close()
-                    self.wait(0.2)
+                    self.wait(0.2, "close_dialog")
         except (
-                findwindows.ElementNotFoundError,
+                ElementNotFoundError,
                 timings.TimeoutError,
                 RuntimeError,
         ) as ex:
@@ -425,51 +994,109 @@ class ClientTrader(IClientTrader):
     def _run_exe_path(self, exe_path):
         return os.path.join(os.path.dirname(exe_path), "xiadan.exe")
 
-    def wait(self, seconds):
-        time.sleep(seconds)
+    def wait(self, seconds, op=None):
+        """
+        等待界面响应
+        :param seconds: 默认等待时间，单位为秒
+        :param op: 操作名，开启 adaptive wait 后根据该操作的历史响应时间调整等待时间
+        """
+        seconds = self._wait_timeout(seconds, op)
+        with tracing.span("sleep", op=op, seconds=seconds), budget.charge("sleep"):
+            time.sleep(seconds)
+
+    def wait_until(self, predicate, op, timeout, interval=0.05):
+        """
+        轮询直到 predicate 返回真值或超时，并记录界面实际就绪所需的时间
+        :param predicate: 无参数的判断函数
+        :param op: 操作名
+        :param timeout: 最长等待时间，单位为秒
+        :param interval: 轮询间隔
+        :return: 是否在超时前就绪
+        """
+        with tracing.span("wait_until", op=op, timeout=timeout):
+            start = time.monotonic()
+            deadline = start + timeout
+            while True:
+                if predicate():
+                    self._record_wait(op, time.monotonic() - start, timeout)
+                    return True
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return False
+                with budget.charge("sleep"):
+                    time.sleep(min(interval, remaining))
+
+    def _wait_timeout(self, seconds, op):
+        if op is None or self._wait_model is None:
+            return seconds
+        return self._wait_model.timeout(self.broker_type, op, seconds)
+
+    def _record_wait(self, op, elapsed, default):
+        if self._wait_model is not None:
+            self._wait_model.record(self.broker_type, op, elapsed, default)
 
     def exit(self):
+        if self._wait_model is not None:
+            self._wait_model.save()
         self._app.kill()
 
-    def _close_prompt_windows(self):
-        self.wait(1)
-        for window in self._app.windows(class_name="#32770", visible_only=True):
-            title = window.window_text()
-            if title != self._config.TITLE:
-                logging.info("close " + title)
+    def _close_prompt_windows(self, timeout=1, max_windows=10):
+        """
+        关闭登录后陆续弹出的提示窗口，直到 timeout 秒内没有新的提示窗口出现
+        :param timeout: 等待下一个提示窗口的时间，开启 adaptive wait 后按历史弹出时间调整
+        :param max_windows: 最多关闭的窗口数
+        """
+        closed = set()
+
+        def prompt_windows():
+            return [
+                window
+                for window in self._app.windows(class_name="#32770", visible_only=True)
+                if window.handle not in closed
+                and window.window_text() != self._config.TITLE
+            ]
+
+        timeout = self._wait_timeout(timeout, "prompt_windows")
+        while len(closed) < max_windows and self.wait_until(
+            prompt_windows, "prompt_windows", timeout
+        ):
+            for window in prompt_windows():
+                logging.info("close " + window.window_text())
                 window.close()
-                self.wait(0.2)
-        self.wait(1)
+                closed.add(window.handle)
 
     def close_pormpt_window_no_wait(self):
         for window in self._app.windows(class_name="#32770"):
             if window.window_text() != self._config.TITLE:
                 window.close()
 
+    @order_timing
+    @clear_query_cache_after
     def trade(self, security, price, amount):
-        self._set_trade_params(security, price, amount)
+        with self._timing_phase("field_entry"):
+            self._set_trade_params(security, price, amount)
 
-        self._submit_trade_by_shortcut()
+        with self._timing_phase("submit"):
+            self._submit_trade_by_shortcut()
 
         return self._handle_pop_dialogs(
             handler_class=pop_dialog_handler.TradePopDialogHandler
         )
 
     def _click(self, control_id, class_name="Button"):
+        # 按钮可能位于弹窗等子窗口上，在顶层窗口中查找，不使用主窗口的控件缓存
         self._app.top_window().child_window(
             control_id=control_id, class_name=class_name
         ).click()
 
     @perf_clock
     def _submit_trade(self):
-        time.sleep(0.2)
-        self._main.child_window(
-            control_id=self._config.TRADE_SUBMIT_CONTROL_ID, class_name="Button"
-        ).click()
+        self.wait(0.2, "submit")
+        self._get_control(self._config.TRADE_SUBMIT_CONTROL_ID, "Button").click()
 
     @perf_clock
     def _submit_trade_by_shortcut(self):
-        time.sleep(0.1)
+        self.wait(0.1, "submit")
         self._app.top_window().type_keys('{ENTER}')
 
     @perf_clock
@@ -479,20 +1106,24 @@ class ClientTrader(IClientTrader):
         )
 
     @perf_clock
-    def _get_pop_dialog_title(self):
+    def _get_pop_dialog_title(self, dialog):
+        """
+        :param dialog: 弹窗监视器返回的弹窗句柄
+        """
         return (
-            self._app.top_window()
+            self._app.window(handle=dialog)
             .child_window(control_id=self._config.POP_DIALOD_TITLE_CONTROL_ID)
             .window_text()
         )
 
+    @perf_clock
     def _set_trade_params(self, security, price, amount):
         code = security[-6:]
 
         self._type_edit_control_keys(self._config.TRADE_SECURITY_CONTROL_ID, code)
 
         # wait security input finish
-        self.wait(0.1)
+        self.wait(0.1, "security_input")
 
         # 设置交易所
         if security.lower().startswith("sz"):
@@ -500,11 +1131,11 @@ class ClientTrader(IClientTrader):
         if security.lower().startswith("sh"):
             self._set_stock_exchange_type("上海Ａ股")
 
-        self.wait(0.1)
+        self.wait(0.1, "exchange_select")
 
         self._type_edit_control_keys(
             self._config.TRADE_PRICE_CONTROL_ID,
-            easyutils.round_price_by_code(price, code),
+            self._round_price(security, price),
         )
         self._type_edit_control_keys(
             self._config.TRADE_AMOUNT_CONTROL_ID, str(int(amount))
@@ -514,12 +1145,12 @@ class ClientTrader(IClientTrader):
         self._type_edit_control_keys(
             self._config.TRADE_AMOUNT_CONTROL_ID, str(int(amount))
         )
-        self.wait(0.1)
+        self.wait(0.1, "amount_input")
         price_control = None
         if str(security).startswith("68"):  # 科创板存在限价
             try:
-                price_control = self._main.child_window(
-                    control_id=self._config.TRADE_PRICE_CONTROL_ID, class_name="Edit"
+                price_control = self._get_control(
+                    self._config.TRADE_PRICE_CONTROL_ID, "Edit"
                 )
             except:
                 pass
@@ -529,21 +1160,51 @@ class ClientTrader(IClientTrader):
     def _get_grid_data(self, control_id):
         return self.grid_strategy_instance.get(control_id)
 
+    def _query_grid_data(self, control_id):
+        """按 set_result_format 设置的格式返回 grid 数据"""
+        if self._result_format == "records":
+            return self._get_grid_data(control_id)
+        df = self.grid_strategy_instance.get_dataframe(control_id)
+        if self._result_format == "numpy" and df is not None:
+            return df.to_records(index=False)
+        return df
+
     def _type_keys(self, control_id, text):
-        self._main.child_window(control_id=control_id, class_name="Edit").set_edit_text(
-            text
-        )
+        self._get_control(control_id, "Edit").set_edit_text(text)
 
     def _type_edit_control_keys(self, control_id, text):
+        editor = self._get_control(control_id, "Edit")
         if not self._editor_need_type_keys:
-            self._main.child_window(
-                control_id=control_id, class_name="Edit"
-            ).set_edit_text(text)
+            editor.set_edit_text(text)
         else:
-            editor = self._main.child_window(control_id=control_id, class_name="Edit")
             editor.select()
             editor.type_keys(text)
 
+    def _get_control(self, control_id, class_name):
+        """
+        返回主窗口中指定的控件，解析结果会被缓存，避免每次重新搜索窗口树。
+        缓存的控件不可见（已切换页面或已被销毁）时重新解析，主窗口变化时清空缓存
+        """
+        if self._control_cache_main is not self._main:
+            self._control_cache = {}
+            self._control_cache_main = self._main
+        key = (control_id, class_name)
+        control = self._control_cache.get(key)
+        if control is None or not self._is_control_alive(control):
+            control = self._main.child_window(
+                control_id=control_id, class_name=class_name
+            ).wrapper_object()
+            self._control_cache[key] = control
+        return control
+
+    @staticmethod
+    def _is_control_alive(control):
+        try:
+            return control.is_visible()
+        # pylint: disable=broad-except
+        except Exception:
+            return False
+
     def type_edit_control_keys(self, editor, text):
         if not self._editor_need_type_keys:
             editor.set_edit_text(text)
@@ -558,15 +1219,40 @@ class ClientTrader(IClientTrader):
 
     @perf_clock
     def _switch_left_menus(self, path, sleep=0.2):
-        self.close_pop_dialog()
-        self._get_left_menus_handle().get_item(path).select()
-        self._app.top_window().type_keys('{F5}')
-        self.wait(sleep)
+        with self._timing_phase("menu_switch"):
+            self.close_pop_dialog()
+            if self._is_current_menu(path):
+                # 已经在目标页面，只需刷新数据
+                self._app.top_window().type_keys('{F5}')
+                return
+            item = self._get_left_menus_handle().get_item(path)
+            item.select()
+            self._current_menu = (tuple(path), item, self._main)
+            self._app.top_window().type_keys('{F5}')
+            self.wait(sleep, "menu_switch")
+
+    def _is_current_menu(self, path):
+        """
+        判断当前是否已经位于 path 对应的页面，
+        用户手动切换页面或者主窗口变化后返回 False
+        """
+        if self._current_menu is None:
+            return False
+        current_path, item, main = self._current_menu
+        if current_path != tuple(path) or main is not self._main:
+            return False
+        try:
+            return item.is_selected()
+        # pylint: disable=broad-except
+        except Exception:
+            return False
 
     def _switch_left_menus_by_shortcut(self, shortcut, sleep=0.5):
         self.close_pop_dialog()
         self._app.top_window().type_keys(shortcut)
-        self.wait(sleep)
+        if shortcut != "{F5}":
+            self._current_menu = None
+        self.wait(sleep, "menu_switch")
 
     @functools.lru_cache()
     def _get_left_menus_handle(self):
@@ -592,9 +1278,8 @@ class ClientTrader(IClientTrader):
             self._config.CANCEL_ENTRUST_GRID_FIRST_ROW_HEIGHT
             + self._config.CANCEL_ENTRUST_GRID_ROW_HEIGHT * row
         )
-        self._app.top_window().child_window(
-            control_id=self._config.COMMON_GRID_CONTROL_ID,
-            class_name="CVirtualGridCtrl",
+        self._get_control(
+            self._config.COMMON_GRID_CONTROL_ID, "CVirtualGridCtrl"
         ).double_click(coords=(x, y))
 
     def refresh(self):
@@ -605,24 +1290,132 @@ class ClientTrader(IClientTrader):
     def _handle_pop_dialogs(self, handler_class=pop_dialog_handler.PopDialogHandler):
         handler = handler_class(self._app)
 
-        while self.is_exist_pop_dialog():
-            try:
-                title = self._get_pop_dialog_title()
-            except pywinauto.findwindows.ElementNotFoundError:
-                return {"message": "success"}
+        # 已处理的弹窗关闭需要时间，等待时忽略它们，避免重复处理
+        handled = set()
+        while True:
+            with self._timing_phase("dialog_wait"):
+                dialog = self._wait_trade_dialog(ignore=handled)
+            if dialog is None:
+                break
+            with self._timing_phase("dialog_handle"):
+                try:
+                    title = self._get_pop_dialog_title(dialog)
+                except ElementNotFoundError:
+                    return {"message": "success"}
 
-            result = handler.handle(title)
+                result = handler.handle(title)
             if result:
                 return result
+            handled.add(dialog)
         return {"message": "success"}
 
 
 class BaseLoginClientTrader(ClientTrader):
-    @abc.abstractmethod
+    """
+    需要登录的客户端，登录流程由 LoginFlow 状态机驱动，
+    子类实现 _fill_login_form, _submit_login 等界面操作
+    """
+
+    # 登录窗口是否有验证码
+    login_captcha = False
+    login_max_attempts = 5
+    login_form_timeout = 30
+    login_submit_timeout = 10
+    login_main_timeout = 30
+
+    def __init__(self):
+        super().__init__()
+        self._login_flow = None
+
+    @property
+    def login_timings(self):
+        """最近一次登录各状态的耗时，单位为秒"""
+        if self._login_flow is None:
+            return {}
+        return dict(self._login_flow.timings)
+
     def login(self, user, password, exe_path, comm_password=None, **kwargs):
-        """Login Client Trader"""
+        """
+        登录客户端，客户端已经登录时直接连接
+        :param user: 账号
+        :param password: 明文密码
+        :param exe_path: 客户端路径
+        :param comm_password: 通讯密码
+        """
+        self._login_flow = LoginFlow(
+            self,
+            max_attempts=self.login_max_attempts,
+            form_timeout=self.login_form_timeout,
+            submit_timeout=self.login_submit_timeout,
+            main_timeout=self.login_main_timeout,
+        )
+        self._login_flow.run(user, password, exe_path, comm_password)
+
+    def _connect_client(self, exe_path, timeout):
+        return pywinauto.Application().connect(
+            path=self._run_exe_path(exe_path), timeout=timeout
+        )
+
+    def _start_client(self, exe_path):
+        return pywinauto.Application().start(exe_path)
+
+    def _is_login_form_ready(self):
+        try:
+            editor = self._app.top_window().Edit1
+        except RuntimeError:
+            # 登录窗口尚未出现
+            return False
+        return self._is_control_ready(editor)
+
+    @staticmethod
+    def _is_control_ready(control):
+        try:
+            return (
+                control.exists(timeout=0)
+                and control.is_visible()
+                and control.is_enabled()
+            )
+        except (ElementNotFoundError, RuntimeError):
+            return False
+
+    @abc.abstractmethod
+    def _fill_login_form(self, user, password, comm_password):
+        """填写账号密码"""
+        pass
+
+    def _input_verify_code(self):
+        """识别并填写验证码，login_captcha 为 True 时每次提交前调用"""
         pass
 
+    @abc.abstractmethod
+    def _submit_login(self):
+        """点击登录按钮"""
+        pass
+
+    @staticmethod
+    def _is_login_window_closed(login_window):
+        try:
+            return not (login_window.exists(timeout=0) and login_window.is_visible())
+        except (ElementNotFoundError, RuntimeError):
+            return True
+
+    def _dismiss_login_error(self):
+        """关闭登录失败的提示，准备重新提交"""
+        try:
+            self._app.top_window()["确定"].click()
+        # pylint: disable=broad-except
+        except Exception:
+            pass
+
+    def _attach_main_window(self):
+        self._main = self._app.window(title=self._config.TITLE)
+
+    def _is_main_window_ready(self):
+        return self._is_control_ready(self._main)
+
+    def _after_login(self):
+        self._close_prompt_windows()
+
     def prepare(
         self,
         config_path=None,
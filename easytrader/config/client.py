@@ -28,6 +28,10 @@ class CommonConfig:
 
     # 撤销界面上， 全部撤销按钮
     TRADE_CANCEL_ALL_ENTRUST_CONTROL_ID = 30001
+    # 撤销界面上， 撤买、撤卖按钮。各券商客户端的按钮 id 未经核实，默认为 None，
+    # 按方向撤单时读取撤单列表逐个撤销。确认客户端中的按钮 id 后可在配置中设置
+    TRADE_CANCEL_BUY_ENTRUST_CONTROL_ID = None
+    TRADE_CANCEL_SELL_ENTRUST_CONTROL_ID = None
 
     TRADE_SECURITY_CONTROL_ID = 1032
     TRADE_PRICE_CONTROL_ID = 1033
@@ -71,6 +75,9 @@ class CommonConfig:
     }
 
     CANCEL_ENTRUST_ENTRUST_FIELD = "合同编号"
+    CANCEL_ENTRUST_SIDE_FIELD = "操作"
+    CANCEL_ENTRUST_SECURITY_FIELD = "证券代码"
+    CANCEL_ENTRUST_TIME_FIELD = "委托时间"
     CANCEL_ENTRUST_GRID_LEFT_MARGIN = 50
     CANCEL_ENTRUST_GRID_FIRST_ROW_HEIGHT = 30
     CANCEL_ENTRUST_GRID_ROW_HEIGHT = 16
@@ -81,6 +88,7 @@ class CommonConfig:
     AUTO_IPO_MENU_PATH_ONE = ["新股申购", "新股申购"]
     AUTO_IPO_MENU_PATH = ["新股申购", "批量新股申购"]
     AUTO_IPO_NUMBER = '申购数量'
+    AUTO_IPO_SECURITY_FIELD = "证券代码"
 
 
 class YH(CommonConfig):
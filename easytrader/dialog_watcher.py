@@ -0,0 +1,130 @@
+# -*- coding: utf-8 -*-
+import abc
+import threading
+import time
+from typing import Hashable, Iterable, Optional
+
+
+class IWindowBackend(abc.ABC):
+    @abc.abstractmethod
+    def top_dialog(self) -> Optional[Hashable]:
+        """
+        返回当前位于主窗口之上的弹窗标识（通常为窗口句柄），无弹窗时返回 None
+        """
+        pass
+
+
+class IDialogWatcher(abc.ABC):
+    # 默认最长等待时间，单位为秒
+    timeout: float
+
+    @abc.abstractmethod
+    def wait(
+        self,
+        backend: IWindowBackend,
+        timeout: Optional[float] = None,
+        ignore: Iterable[Hashable] = (),
+    ) -> Optional[Hashable]:
+        """
+        等待弹窗出现
+
+        :param backend: 窗口后端
+        :param timeout: 最长等待时间，单位为秒，为 None 时使用默认值
+        :param ignore: 需要忽略的弹窗标识，通常为刚刚处理过、正在关闭的弹窗
+        :return: 出现的弹窗标识，超时未出现时返回 None
+        """
+        pass
+
+
+class Sleep(IDialogWatcher):
+    """固定等待 timeout 秒后检查一次，与旧版 is_exist_pop_dialog 行为一致"""
+
+    def __init__(self, timeout: float = 0.5):
+        self.timeout = timeout
+
+    def wait(self, backend, timeout=None, ignore=()):
+        time.sleep(self.timeout if timeout is None else timeout)
+        dialog = backend.top_dialog()
+        if dialog is None or dialog in ignore:
+            return None
+        return dialog
+
+
+class Polling(IDialogWatcher):
+    """
+    以逐步放大的间隔轮询顶层窗口，弹窗出现后立即返回，
+    超过 timeout 仍未出现则返回 None
+    """
+
+    def __init__(
+        self,
+        timeout: float = 0.5,
+        min_interval: float = 0.01,
+        max_interval: float = 0.1,
+        backoff: float = 1.5,
+    ):
+        """
+        :param timeout: 默认最长等待时间
+        :param min_interval: 首次轮询间隔
+        :param max_interval: 轮询间隔上限
+        :param backoff: 每次未发现弹窗后轮询间隔的放大倍数
+        """
+        self.timeout = timeout
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.backoff = backoff
+
+    def wait(self, backend, timeout=None, ignore=()):
+        timeout = self.timeout if timeout is None else timeout
+        deadline = time.monotonic() + timeout
+        interval = self.min_interval
+        while True:
+            dialog = backend.top_dialog()
+            if dialog is not None and dialog not in ignore:
+                return dialog
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return None
+            time.sleep(min(interval, remaining))
+            interval = min(interval * self.backoff, self.max_interval)
+
+
+class FakeWindowBackend(IWindowBackend):
+    """
+    用于测试的窗口后端，可以指定弹窗在若干秒后出现，
+    不依赖 Windows 即可测量不同 watcher 的等待时间
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._dialogs = []
+        self._next_handle = 1
+        self.probe_count = 0
+
+    def pop(self, delay: float = 0.0) -> int:
+        """
+        在 delay 秒后弹出一个新窗口
+
+        :return: 新窗口的标识
+        """
+        with self._lock:
+            handle = self._next_handle
+            self._next_handle += 1
+            self._dialogs.append((time.monotonic() + delay, handle))
+        return handle
+
+    def close(self, handle: Optional[int] = None):
+        """关闭指定弹窗，未指定时关闭最上层弹窗"""
+        with self._lock:
+            if handle is None:
+                if self._dialogs:
+                    self._dialogs.pop()
+                return
+            self._dialogs = [d for d in self._dialogs if d[1] != handle]
+
+    def top_dialog(self):
+        with self._lock:
+            self.probe_count += 1
+            now = time.monotonic()
+            visible = [handle for at, handle in self._dialogs if at <= now]
+        return visible[-1] if visible else None
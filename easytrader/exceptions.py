@@ -9,3 +9,21 @@ class NotLoginError(Exception):
     def __init__(self, result=None):
         super(NotLoginError, self).__init__()
         self.result = result
+
+
+class CommandExpiredError(Exception):
+    """命令超过截止时间仍未开始执行"""
+
+    pass
+
+
+class WorkerProcessError(Exception):
+    """账户工作进程启动失败或异常退出"""
+
+    pass
+
+
+class LoginError(Exception):
+    """客户端登录失败"""
+
+    pass
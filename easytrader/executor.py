@@ -0,0 +1,240 @@
+# -*- coding: utf-8 -*-
+import enum
+import functools
+import itertools
+import queue
+import sys
+import threading
+import time
+from concurrent.futures import Future
+from typing import Callable, Optional, Union
+
+from easytrader import exceptions
+from easytrader.log import logger
+from easytrader.utils import tracing
+
+
+class Priority(enum.IntEnum):
+    """命令优先级，数值越小越先执行"""
+
+    CANCEL = 0
+    ORDER = 1
+    QUERY = 2
+
+
+# 未在表中的方法和属性按查询处理
+METHOD_PRIORITIES = {
+    "cancel_entrust": Priority.CANCEL,
+    "cancel_entrusts_by_ids": Priority.CANCEL,
+    "cancel_all_entrusts": Priority.CANCEL,
+    "buy": Priority.ORDER,
+    "sell": Priority.ORDER,
+    "market_buy": Priority.ORDER,
+    "market_sell": Priority.ORDER,
+    "market_trade": Priority.ORDER,
+    "trade": Priority.ORDER,
+    "batch_trade": Priority.ORDER,
+    "repo": Priority.ORDER,
+    "reverse_repo": Priority.ORDER,
+    "auto_ipo": Priority.ORDER,
+    "auto_ipo_one": Priority.ORDER,
+}
+
+
+def call_trader(trader, method: Union[str, Callable], *args, **kwargs):
+    """
+    调用 trader 的方法或读取属性
+
+    :param method: 方法名、属性名，或以 trader 为第一个参数的函数
+    """
+    if callable(method):
+        return method(trader, *args, **kwargs)
+    if isinstance(getattr(type(trader), method, None), property):
+        return getattr(trader, method)
+    return getattr(trader, method)(*args, **kwargs)
+
+
+class _Command:
+    def __init__(self, target, args, kwargs, deadline):
+        self.target = target
+        self.args = args
+        self.kwargs = kwargs
+        self.deadline = deadline
+        self.future = Future()
+        # 提交命令时的 span，执行时作为父 span
+        self.trace_parent = tracing.current_span()
+
+
+class GuiExecutor:
+    """
+    在单独的线程中串行执行对同一个客户端的所有操作。
+    命令按 撤单 > 下单 > 查询 的优先级排队，同一优先级先进先出，
+    调用方立即得到 Future，多个线程可以同时提交命令而不会打乱界面状态
+    """
+
+    def __init__(
+        self,
+        trader=None,
+        factory: Optional[Callable] = None,
+        name: str = "easytrader-gui",
+    ):
+        """
+        :param trader: 已连接的 trader
+        :param factory: 创建并连接 trader 的函数，在执行线程中调用，
+            使客户端窗口对象只在执行线程中创建和使用，与 trader 二选一
+        :param name: 执行线程名
+        """
+        if (trader is None) == (factory is None):
+            raise ValueError("trader 与 factory 必须且只能设置一个")
+        self._trader = trader
+        self._factory = factory
+        self._ready = Future()
+        if trader is not None:
+            self._ready.set_result(trader)
+        self._queue = queue.PriorityQueue()
+        self._seq = itertools.count()
+        self._lock = threading.Lock()
+        self._shutdown = False
+        self._thread = threading.Thread(target=self._run, name=name, daemon=True)
+        self._thread.start()
+
+    @property
+    def trader(self):
+        """执行线程持有的 trader，使用 factory 时等待创建完成"""
+        return self._ready.result()
+
+    def submit(
+        self,
+        method: Union[str, Callable],
+        *args,
+        priority: Optional[int] = None,
+        timeout: Optional[float] = None,
+        deadline: Optional[float] = None,
+        **kwargs
+    ) -> Future:
+        """
+        提交命令
+
+        :param method: trader 的方法名或属性名，如 'buy', 'position'，
+            也可以是以 trader 为第一个参数的函数
+        :param priority: 优先级，默认按 METHOD_PRIORITIES 确定
+        :param timeout: 命令需要在提交后 timeout 秒内开始执行，否则以 CommandExpiredError 结束
+        :param deadline: 同 timeout，以 time.monotonic() 表示的截止时间
+        :return: 命令结果的 Future
+        """
+        if priority is None:
+            priority = METHOD_PRIORITIES.get(method, Priority.QUERY)
+        if timeout is not None:
+            timeout_deadline = time.monotonic() + timeout
+            deadline = (
+                timeout_deadline
+                if deadline is None
+                else min(deadline, timeout_deadline)
+            )
+        command = _Command(method, args, kwargs, deadline)
+        with self._lock:
+            if self._shutdown:
+                raise RuntimeError("executor has been shut down")
+            self._queue.put((priority, next(self._seq), command))
+        return command.future
+
+    def call(self, method: Union[str, Callable], *args, **kwargs):
+        """提交命令并等待结果，参数同 submit"""
+        return self.submit(method, *args, **kwargs).result()
+
+    def proxy(self) -> "TraderProxy":
+        """返回同步调用的代理对象，可以替代 trader 在多个线程中直接使用"""
+        return TraderProxy(self)
+
+    def shutdown(self, wait: bool = True, cancel_pending: bool = False):
+        """
+        停止接受新命令，已提交的命令执行完后退出执行线程
+
+        :param wait: 是否等待执行线程退出
+        :param cancel_pending: 是否取消尚未开始执行的命令
+        """
+        with self._lock:
+            if not self._shutdown:
+                self._shutdown = True
+                if cancel_pending:
+                    self._cancel_pending()
+                self._queue.put((sys.maxsize, next(self._seq), None))
+        if wait:
+            self._thread.join()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.shutdown()
+
+    def _cancel_pending(self):
+        while True:
+            try:
+                item = self._queue.get_nowait()
+            except queue.Empty:
+                return
+            if item[2] is not None:
+                item[2].future.cancel()
+
+    def _run(self):
+        if self._factory is not None:
+            try:
+                self._trader = self._factory()
+            # pylint: disable=broad-except
+            except Exception as e:
+                logger.exception("create trader failed")
+                self._ready.set_exception(e)
+                with self._lock:
+                    self._shutdown = True
+                    self._cancel_pending()
+                return
+            self._ready.set_result(self._trader)
+
+        while True:
+            _, _, command = self._queue.get()
+            if command is None:
+                return
+            self._execute(command)
+
+    def _execute(self, command: _Command):
+        if not command.future.set_running_or_notify_cancel():
+            return
+        if command.deadline is not None and time.monotonic() > command.deadline:
+            command.future.set_exception(
+                exceptions.CommandExpiredError(
+                    "{} expired before execution".format(command.target)
+                )
+            )
+            return
+        try:
+            result = self._invoke(command)
+        # pylint: disable=broad-except
+        except Exception as e:
+            command.future.set_exception(e)
+        else:
+            command.future.set_result(result)
+
+    def _invoke(self, command: _Command):
+        with tracing.attach(command.trace_parent):
+            return call_trader(
+                self._trader, command.target, *command.args, **command.kwargs
+            )
+
+
+class TraderProxy:
+    """将方法调用和属性读取转发到 GuiExecutor 并等待结果"""
+
+    def __init__(self, executor: GuiExecutor):
+        self._executor = executor
+
+    def __getattr__(self, name):
+        if name.startswith("_"):
+            raise AttributeError(name)
+        trader = self._executor.trader
+        if isinstance(getattr(type(trader), name, None), property):
+            return self._executor.call(name)
+        attr = getattr(trader, name)
+        if not callable(attr):
+            return attr
+        return functools.partial(self._executor.call, name)
@@ -13,6 +13,7 @@ import requests
 
 from easytrader import exceptions
 from easytrader.log import logger
+from easytrader.utils import tracing
 
 
 class BaseFollower(metaclass=abc.ABCMeta):
@@ -179,9 +180,10 @@ class BaseFollower(metaclass=abc.ABCMeta):
         :param interval: 轮询策略的时间间隔，单位为秒"""
         while True:
             try:
-                transactions = self.query_strategy_transaction(
-                    strategy, **kwargs
-                )
+                with tracing.span("follower.query", strategy=name):
+                    transactions = self.query_strategy_transaction(
+                        strategy, **kwargs
+                    )
             # pylint: disable=broad-except
             except Exception as e:
                 logger.exception("无法获取策略 %s 调仓信息, 错误: %s, 跳过此次调仓查询", name, e)
@@ -208,7 +210,15 @@ class BaseFollower(metaclass=abc.ABCMeta):
                     trade_cmd["price"],
                     trade_cmd["datetime"],
                 )
-                self.trade_queue.put(trade_cmd)
+                with tracing.span(
+                    "follower.signal",
+                    strategy=name,
+                    stock_code=trade_cmd["stock_code"],
+                    action=trade_cmd["action"],
+                ):
+                    # 交易线程以该 span 为父 span 执行指令
+                    trade_cmd["trace_span"] = tracing.current_span()
+                    self.trade_queue.put(trade_cmd)
                 self.add_cmd_to_expired_cmds(trade_cmd)
             try:
                 for _ in range(interval):
@@ -350,9 +360,15 @@ class BaseFollower(metaclass=abc.ABCMeta):
         """
         while True:
             trade_cmd = self.trade_queue.get()
-            self._execute_trade_cmd(
-                trade_cmd, users, expire_seconds, entrust_prop, send_interval
-            )
+            with tracing.attach(trade_cmd.get("trace_span")), tracing.span(
+                "follower.execute",
+                strategy=trade_cmd["strategy_name"],
+                stock_code=trade_cmd["stock_code"],
+                action=trade_cmd["action"],
+            ):
+                self._execute_trade_cmd(
+                    trade_cmd, users, expire_seconds, entrust_prop, send_interval
+                )
             time.sleep(send_interval)
 
     def query_strategy_transaction(self, strategy, **kwargs):
@@ -1,26 +1,134 @@
 # -*- coding: utf-8 -*-
 import abc
 import io
+import sys
 import tempfile
 import os
 import xlrd
-from io import StringIO
-from typing import TYPE_CHECKING, Dict, List, Optional
+from typing import TYPE_CHECKING, Callable, Dict, List, Optional
 
-import pandas as pd
-import pywinauto.keyboard
-import pywinauto.mouse
-import pywinauto
-import pywinauto.clipboard
+if sys.platform == "win32":
+    import pywinauto.keyboard
+    import pywinauto.mouse
+    import pywinauto
+    import pywinauto.clipboard
 
 from easytrader.log import logger
+from easytrader.utils import budget
 from easytrader.utils.captcha import captcha_recognize
 from easytrader.utils.win_gui import SetForegroundWindow, ShowWindow, win32defines
 
 if TYPE_CHECKING:
     # pylint: disable=unused-import
+    import pandas as pd
+
     from easytrader import clienttrader
 
+_BOOL_VALUES = {
+    "True": True,
+    "TRUE": True,
+    "true": True,
+    "False": False,
+    "FALSE": False,
+    "false": False,
+}
+
+
+def _column_names(header: List[str]) -> List[str]:
+    """与 pandas 一致，空列名改为 'Unnamed: 序号'，重复列名依次加 '.1', '.2' 后缀"""
+    names = []
+    seen = {}
+    for i, name in enumerate(header):
+        if not name:
+            name = "Unnamed: {}".format(i)
+        if name in seen:
+            seen[name] += 1
+            name = "{}.{}".format(name, seen[name])
+        seen.setdefault(name, 0)
+        names.append(name)
+    return names
+
+
+def _is_ascii(text: str) -> bool:
+    # str.isascii 需要 Python 3.7
+    try:
+        text.encode("ascii")
+    except UnicodeEncodeError:
+        return False
+    return True
+
+
+def _convert_column(values, converter: Optional[Callable]) -> list:
+    if converter is str:
+        return values
+    if converter is not None:
+        return [converter(v) for v in values]
+    joined = "".join(values)
+    # int() 和 float() 还接受下划线、全角数字以及 nan, inf，pandas 不会转换这些值
+    if _is_ascii(joined) and "_" not in joined:
+        try:
+            return [int(v) for v in values]
+        except ValueError:
+            pass
+        if "n" not in joined and "N" not in joined:
+            try:
+                return [float(v) for v in values]
+            except ValueError:
+                pass
+    if all(v in _BOOL_VALUES for v in values):
+        return [_BOOL_VALUES[v] for v in values]
+    return values
+
+
+def parse_grid_text(
+    data: str, dtype: Optional[Dict[str, Callable]] = None
+) -> List[Dict]:
+    """
+    解析 tab 分隔的 grid 文本，不依赖 pandas，结果与
+    pd.read_csv(delimiter='\\t', dtype=dtype, na_filter=False).to_dict('records') 一致
+
+    dtype 中的列按指定类型转换，其余列全部为整数时转为 int，全部为数字时转为 float，
+    全部为 True/False 时转为 bool，否则保留字符串。忽略空行，缺少的字段补为空字符串，
+    多出的字段被丢弃，不处理引号
+
+    :param data: 第一行为列名
+    :param dtype: {列名: 类型}，如 config.GRID_DTYPE
+    :return: list of dict
+    """
+    lines = [line for line in data.splitlines() if line]
+    if not lines:
+        raise ValueError("grid data is empty")
+    names = _column_names(lines[0].split("\t"))
+    width = len(names)
+    rows = []
+    for line in lines[1:]:
+        row = line.split("\t")
+        if len(row) != width:
+            row = (row + [""] * width)[:width]
+        rows.append(row)
+    if not rows:
+        return []
+    dtype = dtype or {}
+    columns = [
+        _convert_column(list(values), dtype.get(name))
+        for name, values in zip(names, zip(*rows))
+    ]
+    return [dict(zip(names, values)) for values in zip(*columns)]
+
+
+def read_grid_dataframe(
+    data: str, dtype: Optional[Dict[str, Callable]] = None
+) -> "pd.DataFrame":
+    """将 tab 分隔的 grid 文本解析为 DataFrame，只在此时导入 pandas"""
+    import pandas as pd
+
+    return pd.read_csv(
+        io.StringIO(data),
+        delimiter="\t",
+        dtype=dtype,
+        na_filter=False,
+    )
+
 
 class IGridStrategy(abc.ABC):
     @abc.abstractmethod
@@ -33,6 +141,17 @@ class IGridStrategy(abc.ABC):
         """
         pass
 
+    def get_dataframe(self, control_id: int) -> "pd.DataFrame":
+        """
+        获取 grid 数据并以 DataFrame 返回，默认由 get 的结果构造，
+        可以直接解析为 DataFrame 的策略应覆盖该方法以免逐行创建 dict
+
+        :param control_id: grid 的 control id
+        """
+        import pandas as pd
+
+        return pd.DataFrame(self.get(control_id))
+
     @abc.abstractmethod
     def set_trader(self, trader: "clienttrader.IClientTrader"):
         pass
@@ -79,21 +198,28 @@ class Copy(BaseStrategy):
     _need_captcha_reg = True
 
     def get(self, control_id: int) -> List[Dict]:
+        return self._format_grid_data(self._get_grid_content(control_id))
+
+    def get_dataframe(self, control_id: int) -> "pd.DataFrame":
+        return self._format_grid_dataframe(self._get_grid_content(control_id))
+
+    def _get_grid_content(self, control_id: int) -> str:
         grid = self._get_grid(control_id)
         self._set_foreground(grid)
         grid.type_keys("^A^C", set_foreground=False)
-        content = self._get_clipboard_data()
-        return self._format_grid_data(content)
+        return self._get_clipboard_data()
 
     def _format_grid_data(self, data: str) -> List[Dict]:
         try:
-            df = pd.read_csv(
-                io.StringIO(data),
-                delimiter="\t",
-                dtype=self._trader.config.GRID_DTYPE,
-                na_filter=False,
-            )
-            return df.to_dict("records")
+            with budget.charge("parse"):
+                return parse_grid_text(data, self._trader.config.GRID_DTYPE)
+        except:
+            Copy._need_captcha_reg = True
+
+    def _format_grid_dataframe(self, data: str) -> "pd.DataFrame":
+        try:
+            with budget.charge("parse"):
+                return read_grid_dataframe(data, self._trader.config.GRID_DTYPE)
         except:
             Copy._need_captcha_reg = True
 
@@ -135,7 +261,7 @@ class Copy(BaseStrategy):
                             found = True
                             break
                     count -= 1
-                    self._trader.wait(0.1)
+                    self._trader.wait(0.1, "captcha")
                     self._trader.app.top_window().window(
                         control_id=0x965, class_name="Static"
                     ).click()
@@ -146,24 +272,27 @@ class Copy(BaseStrategy):
         count = 5
         while count > 0:
             try:
-                return pywinauto.clipboard.GetData()
+                with budget.charge("grid_io"):
+                    return self._read_clipboard()
             # pylint: disable=broad-except
             except Exception as e:
                 count -= 1
                 logger.exception("%s, retry ......", e)
 
+    def _read_clipboard(self) -> str:
+        return pywinauto.clipboard.GetData()
+
 
 class WMCopy(Copy):
     """
     通过复制 grid 内容到剪切板再读取来获取 grid 内容
     """
 
-    def get(self, control_id: int) -> List[Dict]:
+    def _get_grid_content(self, control_id: int) -> str:
         grid = self._get_grid(control_id)
         grid.post_message(win32defines.WM_COMMAND, 0xE122, 0)
-        self._trader.wait(0.1)
-        content = self._get_clipboard_data()
-        return self._format_grid_data(content)
+        self._trader.wait(0.1, "grid_copy")
+        return self._get_clipboard_data()
 
 
 class Xls(BaseStrategy):
@@ -179,6 +308,13 @@ class Xls(BaseStrategy):
         self.tmp_folder = tmp_folder
 
     def get(self, control_id: int) -> List[Dict]:
+        return self._format_grid_data(self._save_grid(control_id))
+
+    def get_dataframe(self, control_id: int) -> "pd.DataFrame":
+        return self._format_grid_dataframe(self._save_grid(control_id))
+
+    def _save_grid(self, control_id: int) -> str:
+        """将 grid 另存为文件，返回文件路径"""
         grid = self._get_grid(control_id)
 
         # ctrl+s 保存 grid 内容为 xls 文件
@@ -188,38 +324,42 @@ class Xls(BaseStrategy):
         while count > 0:
             if self._trader.is_exist_pop_dialog():
                 break
-            self._trader.wait(0.2)
+            self._trader.wait(0.2, "xls_save_dialog")
             count -= 1
         else:
             self._set_foreground(grid)  # setFocus buggy, instead of SetForegroundWindow
             grid.type_keys("^s", set_foreground=False)
-            self._trader.wait(0.5)
+            self._trader.wait(0.5, "xls_save_dialog")
         temp_path = tempfile.mktemp(suffix=".xls", dir=self.tmp_folder)
         self._set_foreground(self._trader.app.top_window())
 
         # alt+s保存，alt+y替换已存在的文件
         self._trader.app.top_window().Edit1.set_edit_text(temp_path)
-        self._trader.wait(0.1)
+        self._trader.wait(0.1, "xls_save_path")
         self._trader.app.top_window().type_keys("%{s}%{y}", set_foreground=False)
         # Wait until file save complete otherwise pandas can not find file
-        self._trader.wait(0.2)
+        self._trader.wait(0.2, "xls_save")
         if self._trader.is_exist_pop_dialog():
             self._trader.app.top_window().Button2.click()
-            self._trader.wait(0.2)
+            self._trader.wait(0.2, "close_dialog")
 
-        return self._format_grid_data(temp_path)
+        return temp_path
 
     def _format_grid_data(self, data: str) -> List[Dict]:
-        with open(data, encoding="gbk", errors="replace") as f:
-            content = f.read()
-
-        df = pd.read_csv(
-            StringIO(content),
-            delimiter="\t",
-            dtype=self._trader.config.GRID_DTYPE,
-            na_filter=False,
-        )
-        return df.to_dict("records")
+        content = self._read_grid_file(data)
+        with budget.charge("parse"):
+            return parse_grid_text(content, self._trader.config.GRID_DTYPE)
+
+    def _format_grid_dataframe(self, data: str) -> "pd.DataFrame":
+        content = self._read_grid_file(data)
+        with budget.charge("parse"):
+            return read_grid_dataframe(content, self._trader.config.GRID_DTYPE)
+
+    @staticmethod
+    def _read_grid_file(path: str) -> str:
+        with budget.charge("grid_io"):
+            with open(path, encoding="gbk", errors="replace") as f:
+                return f.read()
 
 
 class Xls97(BaseStrategy):
@@ -248,7 +388,7 @@ class Xls97(BaseStrategy):
         pywinauto.mouse.move(coords=(x, y))
         pywinauto.mouse.click(coords=(x, y))
         for _ in range(30):
-            self._trader.wait(0.1)
+            self._trader.wait(0.1, "xls_save_dialog")
             if '另存为' in self._trader.app.top_window().texts():
                 self._set_foreground(self._trader.app.top_window())
                 break
@@ -264,17 +404,19 @@ class Xls97(BaseStrategy):
         #
         try:
             for _ in range(30):
-                self._trader.wait(0.1)
+                self._trader.wait(0.1, "xls_save")
                 if os.path.exists(temp_path) and os.path.getsize(temp_path) > 0:
-                    self._trader.wait(0.1)
+                    self._trader.wait(0.1, "xls_save")
                     break
-            data = xlrd.open_workbook(temp_path, encoding_override='GBK')
+            with budget.charge("grid_io"):
+                data = xlrd.open_workbook(temp_path, encoding_override='GBK')
             table = data.sheets()[0]
             #
             nrows = table.nrows
-            for i in range(nrows):
-                # print(table.row_values(i))
-                result.append(table.row_values(i))
+            with budget.charge("parse"):
+                for i in range(nrows):
+                    # print(table.row_values(i))
+                    result.append(table.row_values(i))
             for i in range(len(result[-1])):
                 if result[-1][i] != '':
                     break
@@ -1,14 +1,17 @@
 # -*- coding: utf-8 -*-
 
-import pywinauto
-import pywinauto.clipboard
-
 from easytrader import grid_strategies
 from . import clienttrader
 
 
 class HTClientTrader(clienttrader.BaseLoginClientTrader):
     grid_strategy = grid_strategies.Xls
+    # 账号密码错误时重试没有意义，登录失败时不再自动重新提交
+    login_max_attempts = 1
+    # 提交后等待登录窗口关闭的时间，华泰服务器验证较慢，与主窗口的等待时间取相同上限
+    login_submit_timeout = 100
+    # 旧版登录后最多等待 100 秒主窗口就绪
+    login_main_timeout = 100
 
     @property
     def broker_type(self):
@@ -26,36 +29,19 @@ class HTClientTrader(clienttrader.BaseLoginClientTrader):
         self._editor_need_type_keys = False
         if comm_password is None:
             raise ValueError("华泰必须设置通讯密码")
+        super().login(user, password, exe_path, comm_password, **kwargs)
 
-        try:
-            self._app = pywinauto.Application().connect(
-                path=self._run_exe_path(exe_path), timeout=1
-            )
-        # pylint: disable=broad-except
-        except Exception:
-            self._app = pywinauto.Application().start(exe_path)
-
-            # wait login window ready
-            while True:
-                try:
-                    self._app.top_window().Edit1.wait("ready")
-                    break
-                except RuntimeError:
-                    pass
-            self._app.top_window().Edit1.set_focus()
-            self._app.top_window().Edit1.type_keys(user)
-            self._app.top_window().Edit2.type_keys(password)
-
-            self._app.top_window().Edit3.set_edit_text(comm_password)
+    def _fill_login_form(self, user, password, comm_password):
+        self._app.top_window().Edit1.set_focus()
+        self._app.top_window().Edit1.type_keys(user)
+        self._app.top_window().Edit2.type_keys(password)
+        self._app.top_window().Edit3.set_edit_text(comm_password)
 
-            self._app.top_window().button0.click()
+    def _submit_login(self):
+        self._app.top_window().button0.click()
 
-            self._app = pywinauto.Application().connect(
-                path=self._run_exe_path(exe_path), timeout=10
-            )
+    def _attach_main_window(self):
         self._main = self._app.window(title="网上股票交易系统5.0")
-        self._main.wait ( "exists enabled visible ready" , timeout=100 )
-        self._close_prompt_windows ( )
 
     @property
     def balance(self):
@@ -66,11 +52,7 @@ class HTClientTrader(clienttrader.BaseLoginClientTrader):
     def _get_balance_from_statics(self):
         result = {}
         for key, control_id in self._config.BALANCE_CONTROL_ID_GROUP.items():
-            result[key] = float(
-                self._main.child_window(
-                    control_id=control_id, class_name="Static"
-                ).window_text()
-            )
+            result[key] = float(self._get_control(control_id, "Static").window_text())
         return result
 
 
@@ -1,7 +1,6 @@
 # -*- coding: utf-8 -*-
 
 import pywinauto
-import pywinauto.clipboard
 
 from easytrader import grid_strategies
 from . import clienttrader
@@ -42,13 +41,8 @@ class HTZQClientTrader(clienttrader.BaseLoginClientTrader):
                     break
                 except RuntimeError:
                     pass
-            self._app.top_window().Edit1.set_focus()
-            self._app.top_window().Edit1.type_keys(user)
-            self._app.top_window().Edit2.type_keys(password)
-
-            self._app.top_window().Edit3.type_keys(comm_password)
-
-            self._app.top_window().button0.click()
+            self._fill_login_form(user, password, comm_password)
+            self._submit_login()
 
             # detect login is success or not
             self._app.top_window().wait_not("exists", 100)
@@ -59,3 +53,12 @@ class HTZQClientTrader(clienttrader.BaseLoginClientTrader):
         self._close_prompt_windows()
         self._main = self._app.window(title="网上股票交易系统5.0")
 
+    def _fill_login_form(self, user, password, comm_password):
+        self._app.top_window().Edit1.set_focus()
+        self._app.top_window().Edit1.type_keys(user)
+        self._app.top_window().Edit2.type_keys(password)
+
+        self._app.top_window().Edit3.type_keys(comm_password)
+
+    def _submit_login(self):
+        self._app.top_window().button0.click()
@@ -0,0 +1,131 @@
+# -*- coding: utf-8 -*-
+import collections
+import enum
+import time
+
+from easytrader import exceptions
+from easytrader.log import logger
+
+
+class LoginState(enum.Enum):
+    STARTING = "starting"
+    FORM_READY = "form_ready"
+    CAPTCHA = "captcha"
+    SUBMITTED = "submitted"
+    MAIN_READY = "main_ready"
+
+
+class LoginFlow:
+    """
+    客户端登录状态机:
+
+        STARTING -> FORM_READY -> [CAPTCHA ->] SUBMITTED -> MAIN_READY
+
+    各步骤通过轮询界面状态推进，不使用固定的等待时间，验证码识别失败等情况最多重试 max_attempts 次。
+    界面操作由 trader 的 _start_client, _fill_login_form 等方法完成，
+    timings 记录每个状态停留的时间
+    """
+
+    def __init__(
+        self,
+        trader,
+        max_attempts: int = 5,
+        form_timeout: float = 30,
+        submit_timeout: float = 10,
+        main_timeout: float = 30,
+    ):
+        """
+        :param trader: BaseLoginClientTrader
+        :param max_attempts: 登录最多尝试的次数
+        :param form_timeout: 等待登录窗口就绪的秒数
+        :param submit_timeout: 每次提交后等待登录窗口关闭的秒数
+        :param main_timeout: 等待主窗口就绪的秒数
+        """
+        self._trader = trader
+        self.max_attempts = max_attempts
+        self.form_timeout = form_timeout
+        self.submit_timeout = submit_timeout
+        self.main_timeout = main_timeout
+        self.state = None
+        self.attempts = 0
+        self.timings = collections.OrderedDict()
+        self._state_start = None
+
+    def run(self, user, password, exe_path, comm_password=None):
+        trader = self._trader
+        self._enter(LoginState.STARTING)
+        try:
+            # 客户端已经登录时直接连接
+            trader._app = trader._connect_client(exe_path, timeout=1)
+        # pylint: disable=broad-except
+        except Exception:
+            trader._app = trader._start_client(exe_path)
+            self._login(user, password, comm_password)
+            trader._app = trader._connect_client(exe_path, timeout=10)
+
+        trader._attach_main_window()
+        if not trader.wait_until(
+            trader._is_main_window_ready, "main_window", self.main_timeout
+        ):
+            raise exceptions.LoginError(
+                "main window not ready in {}s".format(self.main_timeout)
+            )
+        self._enter(LoginState.MAIN_READY)
+        trader._after_login()
+        self._finish()
+
+    def _login(self, user, password, comm_password):
+        trader = self._trader
+        if not trader.wait_until(
+            trader._is_login_form_ready, "login_form", self.form_timeout
+        ):
+            raise exceptions.LoginError(
+                "login form not ready in {}s".format(self.form_timeout)
+            )
+        self._enter(LoginState.FORM_READY)
+        login_window = trader._app.top_window()
+        trader._fill_login_form(user, password, comm_password)
+
+        while self.attempts < self.max_attempts:
+            self.attempts += 1
+            try:
+                if trader.login_captcha:
+                    self._enter(LoginState.CAPTCHA)
+                    trader._input_verify_code()
+                self._enter(LoginState.SUBMITTED)
+                trader._submit_login()
+            # pylint: disable=broad-except
+            except Exception:
+                logger.exception("login attempt %s failed", self.attempts)
+                continue
+            if trader.wait_until(
+                lambda: trader._is_login_window_closed(login_window),
+                "login_submit",
+                self.submit_timeout,
+            ):
+                return
+            logger.info("login attempt %s rejected", self.attempts)
+            trader._dismiss_login_error()
+        raise exceptions.LoginError(
+            "login failed after {} attempts".format(self.attempts)
+        )
+
+    def _enter(self, state: LoginState):
+        self._record()
+        self.state = state
+        self._state_start = time.monotonic()
+
+    def _record(self):
+        if self.state is None:
+            return
+        elapsed = time.monotonic() - self._state_start
+        self.timings[self.state.value] = self.timings.get(self.state.value, 0) + elapsed
+
+    def _finish(self):
+        self._record()
+        self._state_start = time.monotonic()
+        logger.info(
+            "login finished after %s attempts, %s",
+            self.attempts,
+            ", ".join("{} {:.3f}s".format(k, v) for k, v in self.timings.items()),
+        )
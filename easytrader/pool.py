@@ -0,0 +1,273 @@
+# -*- coding: utf-8 -*-
+import collections
+import itertools
+import multiprocessing
+import pickle
+import threading
+from concurrent.futures import Future, wait
+from typing import Callable, Dict, Iterable, Optional, Union
+
+from easytrader import exceptions
+from easytrader.executor import call_trader
+from easytrader.log import logger
+
+
+def _create_trader(spec):
+    if callable(spec):
+        return spec()
+    # pylint: disable=import-outside-toplevel
+    import easytrader
+
+    spec = dict(spec)
+    broker = spec.pop("broker")
+    connect = spec.pop("connect", None)
+    prepare = spec.pop("prepare", None)
+    trader = easytrader.use(broker, **spec)
+    if prepare is not None:
+        trader.prepare(**prepare)
+    elif connect is not None:
+        trader.connect(**connect)
+    return trader
+
+
+def _picklable_error(error):
+    try:
+        pickle.dumps(error)
+    # pylint: disable=broad-except
+    except Exception:
+        return exceptions.WorkerProcessError(repr(error))
+    return error
+
+
+def _worker_main(conn, account_id, spec):
+    """工作进程入口，创建 trader 后按顺序执行父进程发来的命令"""
+    try:
+        trader = _create_trader(spec)
+    # pylint: disable=broad-except
+    except Exception as e:
+        logger.exception("account %s: create trader failed", account_id)
+        conn.send((None, False, _picklable_error(e)))
+        return
+    conn.send((None, True, None))
+
+    while True:
+        try:
+            message = conn.recv()
+        except EOFError:
+            return
+        if message is None:
+            return
+        request_id, method, args, kwargs = message
+        try:
+            response = (request_id, True, call_trader(trader, method, *args, **kwargs))
+        # pylint: disable=broad-except
+        except Exception as e:
+            response = (request_id, False, _picklable_error(e))
+        try:
+            conn.send(response)
+        # pylint: disable=broad-except
+        except Exception as e:
+            conn.send((request_id, False, _picklable_error(e)))
+
+
+class _Worker:
+    def __init__(self, account_id, spec, context):
+        self.account_id = account_id
+        self.conn, child_conn = context.Pipe()
+        self.process = context.Process(
+            target=_worker_main,
+            args=(child_conn, account_id, spec),
+            name="easytrader-{}".format(account_id),
+            daemon=True,
+        )
+        self.process.start()
+        child_conn.close()
+        self._ids = itertools.count()
+        self._pending = {}
+        self._lock = threading.Lock()
+        self._closed = False
+        self._reader = None
+
+    def wait_ready(self, timeout):
+        if not self.conn.poll(timeout):
+            raise exceptions.WorkerProcessError(
+                "account {} not ready in {}s".format(self.account_id, timeout)
+            )
+        try:
+            _, ok, error = self.conn.recv()
+        except EOFError:
+            raise exceptions.WorkerProcessError(
+                "account {} exited on start".format(self.account_id)
+            )
+        if not ok:
+            raise error
+        self._reader = threading.Thread(
+            target=self._read,
+            name="easytrader-{}-reader".format(self.account_id),
+            daemon=True,
+        )
+        self._reader.start()
+
+    def submit(self, method, args, kwargs) -> Future:
+        future = Future()
+        with self._lock:
+            if self._closed:
+                raise exceptions.WorkerProcessError(
+                    "account {} worker is closed".format(self.account_id)
+                )
+            request_id = next(self._ids)
+            self._pending[request_id] = future
+            try:
+                self.conn.send((request_id, method, args, kwargs))
+            except Exception:
+                del self._pending[request_id]
+                raise
+        return future
+
+    def close(self, timeout):
+        with self._lock:
+            if not self._closed:
+                self._closed = True
+                try:
+                    self.conn.send(None)
+                except (OSError, ValueError):
+                    pass
+        self.process.join(timeout)
+        if self.process.is_alive():
+            self.process.terminate()
+            self.process.join()
+        if self._reader is not None:
+            self._reader.join()
+        self.conn.close()
+
+    def _read(self):
+        while True:
+            try:
+                request_id, ok, value = self.conn.recv()
+            except (EOFError, OSError):
+                break
+            with self._lock:
+                future = self._pending.pop(request_id)
+            if ok:
+                future.set_result(value)
+            else:
+                future.set_exception(value)
+
+        with self._lock:
+            self._closed = True
+            pending, self._pending = self._pending, {}
+        for future in pending.values():
+            future.set_exception(
+                exceptions.WorkerProcessError(
+                    "account {} worker exited".format(self.account_id)
+                )
+            )
+
+
+class TraderPool:
+    """
+    多账户进程池，每个账户在单独的进程中持有自己的 trader，
+    命令按账户 id 通过管道发送到对应进程，同一账户的命令按顺序执行，不同账户之间并行执行
+    """
+
+    def __init__(
+        self,
+        accounts: Dict[str, Union[dict, Callable]],
+        start_timeout: float = 60,
+        start_method: Optional[str] = None,
+    ):
+        """
+        :param accounts: {账户 id: 账户配置}，账户配置为 dict 或返回 trader 的函数。
+            dict 中 broker 为券商名，prepare 或 connect 为对应方法的参数，其余传给 easytrader.use，
+            如 {'ht': {'broker': 'ht_client', 'prepare': {'config_path': 'ht.json'}},
+                'ths': {'broker': 'ths', 'connect': {'exe_path': r'C:\\同花顺\\xiadan.exe'}}}。
+            函数需要能被 pickle，即定义在模块顶层
+        :param start_timeout: 等待所有账户登录完成的秒数
+        :param start_method: multiprocessing 启动方式，默认使用平台默认值
+        """
+        context = multiprocessing.get_context(start_method)
+        self._workers = collections.OrderedDict()
+        try:
+            for account_id, spec in accounts.items():
+                self._workers[account_id] = _Worker(account_id, spec, context)
+            # 各进程同时登录，总耗时取决于最慢的账户
+            for worker in self._workers.values():
+                worker.wait_ready(start_timeout)
+        except BaseException:
+            self.close()
+            raise
+
+    @property
+    def accounts(self):
+        return list(self._workers)
+
+    def submit(self, account_id, method: Union[str, Callable], *args, **kwargs):
+        """
+        向账户发送命令
+
+        :param account_id: 账户 id
+        :param method: trader 的方法名或属性名，如 'buy', 'position'，
+            也可以是以 trader 为第一个参数的模块顶层函数
+        :return: 命令结果的 Future
+        """
+        try:
+            worker = self._workers[account_id]
+        except KeyError:
+            raise ValueError("unknown account {}".format(account_id))
+        return worker.submit(method, args, kwargs)
+
+    def call(self, account_id, method: Union[str, Callable], *args, **kwargs):
+        """向账户发送命令并等待结果，参数同 submit"""
+        return self.submit(account_id, method, *args, **kwargs).result()
+
+    def broadcast(
+        self,
+        method: Union[str, Callable],
+        *args,
+        accounts: Optional[Iterable] = None,
+        return_exceptions: bool = False,
+        timeout: Optional[float] = None,
+        **kwargs
+    ):
+        """
+        向多个账户同时发送同一命令并等待全部完成，如 pool.broadcast('position')
+
+        :param accounts: 账户 id 列表，默认所有账户
+        :param return_exceptions: 为 True 时出错账户的结果为异常对象，否则等待全部完成后抛出第一个异常
+        :param timeout: 等待秒数，超时未完成的账户结果为 TimeoutError
+        :return: {账户 id: 结果}，顺序同 accounts
+        """
+        futures = collections.OrderedDict(
+            (account_id, self.submit(account_id, method, *args, **kwargs))
+            for account_id in (self.accounts if accounts is None else accounts)
+        )
+        wait(futures.values(), timeout)
+
+        results = collections.OrderedDict()
+        for account_id, future in futures.items():
+            if not future.done():
+                error = TimeoutError("account {} {} timeout".format(account_id, method))
+            else:
+                error = future.exception()
+            if error is None:
+                results[account_id] = future.result()
+            elif return_exceptions:
+                results[account_id] = error
+            else:
+                raise error
+        return results
+
+    def close(self, timeout: float = 10):
+        """通知所有工作进程退出，超时未退出的进程被强制结束"""
+        for worker in self._workers.values():
+            try:
+                worker.close(timeout)
+            # pylint: disable=broad-except
+            except Exception:
+                logger.exception("close account %s failed", worker.account_id)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
@@ -1,61 +1,148 @@
 # coding:utf-8
 import re
+import threading
 import time
-from typing import Optional
+from typing import Callable, Iterable, Optional
 
 from easytrader import exceptions
+from easytrader.utils import budget
 from easytrader.utils.perf import perf_clock
 from easytrader.utils.win_gui import SetForegroundWindow, ShowWindow, win32defines
 
 
+class Rule:
+    """
+    弹窗处理规则，标题 (及内容) 匹配时依次执行 action 和 result
+
+    :param name: 规则名，用于统计
+    :param title: 标题正则，使用 re.search 匹配
+    :param content: 内容正则，设置后读取弹窗内容并匹配
+    :param action: 处理弹窗的方法名，如 'submit_by_shortcut', 'submit_by_click', 'close'，
+        为 None 时不操作弹窗
+    :param result: 以弹窗内容为参数返回处理结果的函数，返回 None 时继续等待下一个弹窗
+    :param extract: 是否需要读取弹窗内容，设置 content 时总是读取
+    """
+
+    def __init__(
+        self,
+        name: str,
+        title: str,
+        content: Optional[str] = None,
+        action: Optional[str] = None,
+        result: Optional[Callable[[str], Optional[dict]]] = None,
+        extract: bool = False,
+    ):
+        self.name = name
+        self.title = re.compile(title)
+        self.content = re.compile(content) if content is not None else None
+        self.action = action
+        self.result = result
+        self.extract = extract or content is not None
+
+    def __repr__(self):
+        return "Rule({!r})".format(self.name)
+
+
+class RuleSet:
+    """按顺序匹配的规则表，正则在创建时编译"""
+
+    def __init__(self, rules: Iterable[Rule]):
+        self.rules = list(rules)
+
+    def prepend(self, *rules: Rule) -> "RuleSet":
+        """返回优先匹配 rules 的新规则表，用于券商定制"""
+        return RuleSet(list(rules) + self.rules)
+
+    def match(self, title: str, get_content: Callable[[], str]) -> Optional[Rule]:
+        for rule in self.rules:
+            if not rule.title.search(title):
+                continue
+            if rule.content is not None and not rule.content.search(get_content()):
+                continue
+            return rule
+        return None
 
-class EnterDialogHandler:
-    def __init__(self, app):
-        self._app = app
 
-    @staticmethod
-    def _set_foreground(window):
-        if window.has_style(win32defines.WS_MINIMIZE):  # if minimized
-            ShowWindow(window.wrapper_object(), 9)  # restore window state
-        else:
-            SetForegroundWindow(window.wrapper_object())  # bring to front
+_stats_lock = threading.Lock()
+# {规则: [命中次数, 总耗时]}
+_rule_stats = {}
 
-    @perf_clock
-    def handle(self, title):
-        if any(s in title for s in {"提示信息", "委托确认", "撤单确认"}):
-            self._submit_by_click()
-            return None
 
-        content = self._extract_content()
-        self._close()
-        return {"message": content}
+def get_rule_stats() -> dict:
+    """
+    返回各规则的命中次数与处理耗时，
+    如 {'TradePopDialogHandler.entrust_success': {'hits': 3, 'total': 0.42, 'mean': 0.14}}
+    """
+    with _stats_lock:
+        return {
+            name: {"hits": hits, "total": total, "mean": total / hits}
+            for name, (hits, total) in _rule_stats.items()
+        }
 
-    def _extract_content(self):
-        return self._app.top_window().TspSkinPanel.rectangle()
 
-    @staticmethod
-    def _extract_entrust_id(content):
-        return re.search(r"[\da-zA-Z]+", content).group()
+def reset_rule_stats():
+    with _stats_lock:
+        _rule_stats.clear()
 
-    def _submit_by_click(self):
-        try:
-            self._app.top_window()["确定"].click()
-        except Exception as ex:
-            self._app.Window_(best_match="Dialog", top_level_only=True).ChildWindow(
-                best_match="确定"
-            ).click()
 
-    def _submit_by_shortcut(self):
-        self._set_foreground(self._app.top_window())
-        self._app.top_window().type_keys("%Y", set_foreground=False)
+def _record_rule(name, elapsed):
+    with _stats_lock:
+        stats = _rule_stats.setdefault(name, [0, 0.0])
+        stats[0] += 1
+        stats[1] += elapsed
+
+
+def _extract_entrust_id(content):
+    return re.search(r"[\da-zA-Z]+", content).group()
 
-    def _close(self):
-        self._app.top_window().close()
+
+def _message(content):
+    return {"message": content}
+
+
+def _unknown_message(content):
+    return {"message": "unknown message: {}".format(content)}
+
+
+def _entrust_success(content):
+    return {"entrust_no": _extract_entrust_id(content)}
+
+
+def _trade_error(content):
+    with budget.charge("sleep"):
+        time.sleep(0.05)
+    raise exceptions.TradeError(content)
 
 
 class PopDialogHandler:
+    rules = RuleSet(
+        [
+            Rule(
+                "confirm",
+                "提示信息|委托确认|网上交易用户协议|撤单确认",
+                action="submit_by_shortcut",
+            ),
+            Rule(
+                "message",
+                "提示",
+                action="submit_by_click",
+                result=_message,
+                extract=True,
+            ),
+            Rule(
+                "unknown",
+                "",
+                action="close",
+                result=_unknown_message,
+                extract=True,
+            ),
+        ]
+    )
+
     def __init__(self, app):
         self._app = app
+        self._window = None
+        self._content = None
 
     @staticmethod
     def _set_foreground(window):
@@ -65,79 +152,96 @@ class PopDialogHandler:
             SetForegroundWindow(window.wrapper_object())  # bring to front
 
     @perf_clock
-    def handle(self, title):
-        if any(s in title for s in {"提示信息", "委托确认", "网上交易用户协议", "撤单确认"}):
-            self._submit_by_shortcut()
+    def handle(self, title) -> Optional[dict]:
+        start = time.perf_counter()
+        # 同一个弹窗只查找一次窗口、读取一次内容
+        self._window = None
+        self._content = None
+        rule = self.rules.match(title, self._get_content)
+        if rule is None:
             return None
-
-        if "提示" in title:
-            content = self._extract_content()
-            self._submit_by_click()
-            return {"message": content}
-
-        content = self._extract_content()
-        self._close()
-        return {"message": "unknown message: {}".format(content)}
+        try:
+            content = self._get_content() if rule.extract else None
+            if rule.action is not None:
+                getattr(self, "_" + rule.action)()
+            return rule.result(content) if rule.result is not None else None
+        finally:
+            _record_rule(
+                "{}.{}".format(type(self).__name__, rule.name),
+                time.perf_counter() - start,
+            )
+
+    def _top_window(self):
+        if self._window is None:
+            self._window = self._app.top_window()
+        return self._window
+
+    def _get_content(self):
+        if self._content is None:
+            self._content = self._extract_content()
+        return self._content
 
     def _extract_content(self):
-        return self._app.top_window().Static.window_text()
+        return self._top_window().Static.window_text()
 
     @staticmethod
     def _extract_entrust_id(content):
-        return re.search(r"[\da-zA-Z]+", content).group()
+        return _extract_entrust_id(content)
 
     def _submit_by_click(self):
         try:
-            self._app.top_window()["确定"].click()
+            self._top_window()["确定"].click()
         except Exception as ex:
             self._app.Window_(best_match="Dialog", top_level_only=True).ChildWindow(
                 best_match="确定"
             ).click()
 
     def _submit_by_shortcut(self):
-        self._set_foreground(self._app.top_window())
-        self._app.top_window().type_keys("%Y", set_foreground=False)
+        window = self._top_window()
+        self._set_foreground(window)
+        window.type_keys("%Y", set_foreground=False)
 
     def _close(self):
-        self._app.top_window().close()
+        self._top_window().close()
 
 
-class TradePopDialogHandler(PopDialogHandler):
-    @perf_clock
-    def handle(self, title) -> Optional[dict]:
-        if title == "委托确认":
-            self._submit_by_shortcut()
-            return None
-
-        if title == "提示信息":
-            content = self._extract_content()
-            if "超出涨跌停" in content:
-                self._submit_by_shortcut()
-                return None
-
-            if "委托价格的小数价格应为" in content:
-                self._submit_by_shortcut()
-                return None
+class EnterDialogHandler(PopDialogHandler):
+    rules = RuleSet(
+        [
+            Rule("confirm", "提示信息|委托确认|撤单确认", action="submit_by_click"),
+            Rule("message", "", action="close", result=_message, extract=True),
+        ]
+    )
 
-            if "逆回购" in content:
-                self._submit_by_shortcut()
-                return None
-
-            if "正回购" in content:
-                self._submit_by_shortcut()
-                return None
+    def _extract_content(self):
+        return self._top_window().TspSkinPanel.rectangle()
 
-            return None
 
-        if title == "提示":
-            content = self._extract_content()
-            if "成功" in content:
-                entrust_no = self._extract_entrust_id(content)
-                self._submit_by_click()
-                return {"entrust_no": entrust_no}
-
-            self._submit_by_click()
-            time.sleep(0.05)
-            raise exceptions.TradeError(content)
-        self._close()
-        return None
+class TradePopDialogHandler(PopDialogHandler):
+    rules = RuleSet(
+        [
+            Rule("entrust_confirm", "^委托确认$", action="submit_by_shortcut"),
+            Rule(
+                "price_warning",
+                "^提示信息$",
+                content="超出涨跌停|委托价格的小数价格应为|逆回购|正回购",
+                action="submit_by_shortcut",
+            ),
+            Rule("info", "^提示信息$", extract=True),
+            Rule(
+                "entrust_success",
+                "^提示$",
+                content="成功",
+                action="submit_by_click",
+                result=_entrust_success,
+            ),
+            Rule(
+                "trade_error",
+                "^提示$",
+                action="submit_by_click",
+                result=_trade_error,
+                extract=True,
+            ),
+            Rule("unknown", "", action="close"),
+        ]
+    )
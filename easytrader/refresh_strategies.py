@@ -1,14 +1,15 @@
 # -*- coding: utf-8 -*-
 import abc
 import io
+import sys
 import tempfile
 from io import StringIO
 from typing import TYPE_CHECKING, Dict, List, Optional
 
-import pandas as pd
-import pywinauto.mouse
-import pywinauto
-import pywinauto.clipboard
+if sys.platform == "win32":
+    import pywinauto.mouse
+    import pywinauto
+    import pywinauto.clipboard
 
 from easytrader.log import logger
 from easytrader.utils.captcha import captcha_recognize
@@ -79,4 +80,4 @@ class Panelbar(IRefreshStrategy):
         x, y = rect.right - self.refresh_btn_offset, (rect.top + rect.bottom) // 2
         pywinauto.mouse.move(coords=(x, y))
         pywinauto.mouse.click(coords=(x, y))
-        self._trader.wait(0.5)
+        self._trader.wait(0.5, "refresh")
@@ -6,7 +6,7 @@ import os
 import re
 import sys
 import time
-from typing import Type, Union
+from typing import Optional, Type, Union
 import xlrd
 
 import hashlib, binascii
@@ -16,13 +16,21 @@ from pywinauto import findwindows, timings
 from pywinauto import mouse, keyboard
 import pandas as pd
 
-from easytrader import grid_strategies, pop_dialog_handler, refresh_strategies
+from easytrader import (
+    dialog_watcher,
+    grid_strategies,
+    pop_dialog_handler,
+    refresh_strategies,
+)
+from easytrader.clienttrader import PywinautoWindowBackend
 from easytrader.config import client
+from easytrader.dialog_watcher import IDialogWatcher
 from easytrader.grid_strategies import IGridStrategy
 from easytrader.log import logger
 from easytrader.refresh_strategies import IRefreshStrategy
 from easytrader.utils.misc import file2dict
 from easytrader.utils.perf import perf_clock
+from easytrader.utils.wait_model import WaitModel
 
 if not sys.platform.startswith("darwin"):
     import pywinauto
@@ -48,7 +56,7 @@ class IClientTrader(abc.ABC):
         pass
 
     @abc.abstractmethod
-    def wait(self, seconds: float):
+    def wait(self, seconds: float, op: Optional[str] = None):
         """Wait for operation return"""
         pass
 
@@ -63,6 +71,11 @@ class RicheTrader(IClientTrader):
     grid_strategy: Union[IGridStrategy, Type[IGridStrategy]] = grid_strategies.Xls97
     _grid_strategy_instance: IGridStrategy = None
     refresh_strategy: IRefreshStrategy = refresh_strategies.Panelbar(85)
+    # The watcher used to wait for pop dialogs
+    pop_dialog_watcher: IDialogWatcher = dialog_watcher.Polling(timeout=0.25)
+    # 下单、撤单后等待结果弹窗的最短时间。开启 adaptive wait 后不低于该值，
+    # 避免等待时间被快速样本压得过短，漏掉稍晚弹出的委托结果
+    trade_dialog_min_timeout = 0.25
 
     def enable_type_keys_for_editor(self):
         """
@@ -70,6 +83,15 @@ class RicheTrader(IClientTrader):
         """
         self._editor_need_type_keys = True
 
+    def enable_adaptive_wait(self, path="wait_model.json", **kwargs):
+        """
+        根据界面实际响应速度自动调整各操作的等待时间，统计结果保存在 path 中，
+        重启后继续使用
+        :param path: 统计结果保存路径，为 None 时只在内存中统计
+        :param kwargs: 传递给 WaitModel 的其他参数
+        """
+        self._wait_model = WaitModel(path, **kwargs)
+
     @property
     def grid_strategy_instance(self):
         if self._grid_strategy_instance is None:
@@ -86,6 +108,8 @@ class RicheTrader(IClientTrader):
         self._app = None
         self._main = None
         self._toolbar = None
+        self._window_backend = PywinautoWindowBackend(self)
+        self._wait_model: Optional[WaitModel] = None
 
     @property
     def app(self):
@@ -127,14 +151,14 @@ class RicheTrader(IClientTrader):
             x, y = rect.right - 85, (rect.top + rect.bottom) // 2
             mouse.move(coords=(x, y))
             mouse.click(coords=(x, y))
-            time.sleep(0.5)
+            time.sleep(self._wait_timeout(0.5, "refresh"))
         x, y = rect.right - 20, (rect.top + rect.bottom) // 2
         mouse.move(coords=(x, y))
         mouse.click(coords=(x, y))
-        time.sleep(1.5)
+        time.sleep(self._wait_timeout(1.5, "xls_save_dialog"))
         self.app.top_window().type_keys("^C", set_foreground=False)
         self.app.top_window().type_keys("%{s}%{y}", set_foreground=False)
-        time.sleep(1)
+        time.sleep(self._wait_timeout(1, "xls_save"))
         #
         try:
             file_name = pywinauto.clipboard.GetData()
@@ -233,7 +257,7 @@ class RicheTrader(IClientTrader):
 
     def cancel_all_entrusts(self):
         self._switch_left_menus_by_shortcut("{F8}A")
-        self.wait(0.2)
+        self.wait(0.2, "cancel_all")
         # 等待出现 确认兑换框
         if self.is_exist_pop_dialog():
             # 点击是 按钮
@@ -242,7 +266,7 @@ class RicheTrader(IClientTrader):
                 btn = w["确定"]
                 if btn is not None:
                     btn.click()
-                    self.wait(0.2)
+                    self.wait(0.2, "confirm_dialog")
         # 如果出现了确认窗口
         self.close_pop_dialog()
 
@@ -297,9 +321,9 @@ class RicheTrader(IClientTrader):
         x, y = (rect.left + rect.right) // 2, (rect.top + rect.bottom) // 2
         mouse.move(coords=(x, y))
         mouse.click(coords=(x, y))
-        self.wait(1)
+        self.wait(1, "ipo_select")
         self._app.top_window().type_keys('%{U}')
-        self.wait(1)
+        self.wait(1, "ipo_select")
         btn = self._app.top_window().child_window(
             title='确认申购', class_name="TspSkinButton"
         )
@@ -324,19 +348,42 @@ class RicheTrader(IClientTrader):
         ).click(coords=(x, y))
 
     @perf_clock
-    def is_exist_pop_dialog(self):
-        self.wait(0.5)  # wait dialog display
-        try:
-            return (
-                self._main.wrapper_object() != self._app.top_window().wrapper_object()
-            )
-        except (
-            findwindows.ElementNotFoundError,
-            timings.TimeoutError,
-            RuntimeError,
-        ) as ex:
-            logger.exception("check pop dialog timeout")
-            return False
+    def is_exist_pop_dialog(self, timeout=None):
+        """
+        等待弹窗出现，弹窗出现后立即返回，最长等待时间由 pop_dialog_watcher 决定
+        :param timeout: 最长等待时间，单位为秒，默认使用 pop_dialog_watcher 的配置
+        """
+        return self._wait_pop_dialog(timeout) is not None
+
+    def _wait_pop_dialog(self, timeout=None, ignore=(), op="pop_dialog", expected=False):
+        """
+        :param op: 记录弹出时间使用的操作名
+        :param expected: 弹窗是否必然出现，为 True 时超时也计入统计，
+            使之后的等待时间变长
+        """
+        default = self.pop_dialog_watcher.timeout
+        if timeout is None:
+            timeout = self._wait_timeout(default, op)
+        start = time.monotonic()
+        dialog = self.pop_dialog_watcher.wait(self._window_backend, timeout, ignore)
+        if dialog is not None:
+            self._record_wait(op, time.monotonic() - start, default)
+        elif expected and self._wait_model is not None:
+            self._wait_model.record_timeout(self.broker_type, op, timeout, default)
+        return dialog
+
+    def _wait_trade_dialog(self, ignore=()):
+        """
+        等待下单、撤单等操作的结果弹窗。
+        已经处理过弹窗 (ignore 不为空) 后的超时是正常结束，不计为未等到
+        """
+        timeout = max(
+            self._wait_timeout(self.pop_dialog_watcher.timeout, "trade_dialog"),
+            self.trade_dialog_min_timeout,
+        )
+        return self._wait_pop_dialog(
+            timeout, ignore, "trade_dialog", expected=not ignore
+        )
 
     @perf_clock
     def close_pop_dialog(self):
@@ -345,7 +392,7 @@ class RicheTrader(IClientTrader):
                 w = self._app.top_window()
                 if w is not None:
                     w.close()
-                    self.wait(0.2)
+                    self.wait(0.2, "close_dialog")
         except (
                 findwindows.ElementNotFoundError,
                 timings.TimeoutError,
@@ -356,21 +403,37 @@ class RicheTrader(IClientTrader):
     def _run_exe_path(self, exe_path):
         return os.path.join(os.path.dirname(exe_path), "xiadan.exe")
 
-    def wait(self, seconds):
-        time.sleep(seconds*0.5)
+    def wait(self, seconds, op=None):
+        """
+        等待界面响应，默认等待时间为 seconds 的一半
+        :param seconds: 默认等待时间，单位为秒
+        :param op: 操作名，开启 adaptive wait 后根据该操作的历史响应时间调整等待时间
+        """
+        time.sleep(self._wait_timeout(seconds * 0.5, op))
+
+    def _wait_timeout(self, seconds, op):
+        if op is None or self._wait_model is None:
+            return seconds
+        return self._wait_model.timeout(self.broker_type, op, seconds)
+
+    def _record_wait(self, op, elapsed, default):
+        if self._wait_model is not None:
+            self._wait_model.record(self.broker_type, op, elapsed, default)
 
     def exit(self):
+        if self._wait_model is not None:
+            self._wait_model.save()
         self._app.kill()
 
     def _close_prompt_windows(self):
-        self.wait(1)
+        self.wait(1, "prompt_windows")
         for window in self._app.windows(class_name="#32770", visible_only=True):
             title = window.window_text()
             if title != self._config.TITLE:
                 logging.info("close " + title)
                 window.close()
-                self.wait(0.2)
-        self.wait(1)
+                self.wait(0.2, "close_dialog")
+        self.wait(1, "prompt_windows")
 
     def close_pormpt_window_no_wait(self):
         for window in self._app.windows(class_name="#32770"):
@@ -384,7 +447,7 @@ class RicheTrader(IClientTrader):
                 btn.print_ctrl_ids()
             except Exception as e:
                 print(e)
-                self.wait(0.1)
+                self.wait(0.1, "trade_button")
         self._set_trade_params(security, price, amount)
 
         self._submit_trade(title)
@@ -411,10 +474,11 @@ class RicheTrader(IClientTrader):
         )
 
     @perf_clock
-    def _get_pop_dialog_title(self):
-        return (
-            self._app.top_window().window_text()
-        )
+    def _get_pop_dialog_title(self, dialog):
+        """
+        :param dialog: 弹窗监视器返回的弹窗句柄
+        """
+        return self._app.window(handle=dialog).window_text()
 
     def _set_trade_params(self, security, price, amount):
         code = security[-6:]
@@ -426,7 +490,7 @@ class RicheTrader(IClientTrader):
         # panel.print_ctrl_ids()
         # wait security input finish
         for _ in range(30):
-            self.wait(0.1)
+            self.wait(0.1, "security_input")
             editor = panel.Edit4
             texts = editor.texts()
             if len(texts) > 0 and len(texts[0]) > 0:
@@ -451,7 +515,7 @@ class RicheTrader(IClientTrader):
         # panel.print_ctrl_ids()
         # wait security input finish
         for _ in range(30):
-            self.wait(0.1)
+            self.wait(0.1, "security_input")
             edit4 = panel.Edit4
             texts = edit4.texts()
             if len(texts) > 0 and float(texts[0]) > 0.01:
@@ -506,11 +570,11 @@ class RicheTrader(IClientTrader):
         x, y = (rect.left + rect.right) // 2, rect.top + 100
         mouse.move(coords=(x, y))
         mouse.click(coords=(x, y))
-        self.wait(sleep)
+        self.wait(sleep, "menu_switch")
         z = y + 30
         mouse.move(coords=(x, z))
         mouse.click(coords=(x, z))
-        self.wait(sleep)
+        self.wait(sleep, "menu_switch")
         try:
             btn = self._main.child_window(
                 title='批量申购', class_name="TspSkinButton"
@@ -520,15 +584,15 @@ class RicheTrader(IClientTrader):
             print('异常', e)
             mouse.move(coords=(x, y))
             mouse.click(coords=(x, y))
-            self.wait(sleep)
+            self.wait(sleep, "menu_switch")
             mouse.move(coords=(x, z))
             mouse.click(coords=(x, z))
-            self.wait(sleep)
+            self.wait(sleep, "menu_switch")
 
     def _switch_left_menus_by_shortcut(self, shortcut, sleep=0.5):
         self.close_pop_dialog()
         self._app.top_window().type_keys(shortcut)
-        self.wait(sleep)
+        self.wait(sleep, "menu_switch")
 
     @functools.lru_cache()
     def _get_left_menus_handle(self):
@@ -556,7 +620,7 @@ class RicheTrader(IClientTrader):
         )
         panel = self._main.child_window(title='bgpanel', class_name='TspSkinPanel')
         panel.child_window(title='', class_name="TAdvStringGrid").double_click(coords=(x, y))
-        self.wait(0.2)
+        self.wait(0.2, "cancel_entrust")
         # 等待出现 确认兑换框
         if self.is_exist_pop_dialog():
             # 点击是 按钮
@@ -569,7 +633,7 @@ class RicheTrader(IClientTrader):
                     x, y = (rc.left+rc.right)//2, (rc.top + rc.bottom)//2
                     mouse.move(coords=(x, y))
                     mouse.click(coords=(x, y))
-                    self.wait(0.2)
+                    self.wait(0.2, "confirm_dialog")
 
     def refresh(self, panel):
         self.refresh_strategy.set_trader(self)
@@ -580,9 +644,14 @@ class RicheTrader(IClientTrader):
     def _handle_pop_dialogs(self, handler_class=pop_dialog_handler.PopDialogHandler):
         handler = handler_class(self._app)
         titles = []
-        while self.is_exist_pop_dialog():
+        # 已处理的弹窗关闭需要时间，等待时忽略它们，避免重复处理
+        handled = set()
+        while True:
+            dialog = self._wait_trade_dialog(ignore=handled)
+            if dialog is None:
+                break
             try:
-                title = self._get_pop_dialog_title()
+                title = self._get_pop_dialog_title(dialog)
             except pywinauto.findwindows.ElementNotFoundError:
                 return {"message": "success"}
             titles.append(title)
@@ -590,6 +659,7 @@ class RicheTrader(IClientTrader):
             if result:
                 result['titles'] = titles
                 return result
+            handled.add(dialog)
         return {"message": "success"}
 
 
@@ -0,0 +1,1282 @@
+# -*- coding: utf-8 -*-
+"""
+模拟的同花顺下单客户端，不依赖 Windows 与真实客户端即可运行 ClientTrader 的
+买入、卖出、撤单、查询及新股申购流程，用于在 Linux / CI 中测试、分析性能。
+
+使用方法::
+
+    user = easytrader.use("ths")
+    app = simclient.attach(user, latency={"dialog": 0.05})
+    app.account.add_position("162411", 1000, 0.5)
+    user.buy("162411", price=0.55, amount=100)
+"""
+
+import collections
+import datetime
+import itertools
+import re
+import threading
+import time
+from typing import Callable, Dict, List, Optional, Tuple
+
+from pywinauto import timings
+
+from easytrader import grid_strategies
+from easytrader.config import client
+from easytrader.utils import budget
+from easytrader.utils.win_gui import ElementNotFoundError, win32defines
+
+# 默认各操作的模拟耗时，单位为秒
+DEFAULT_LATENCY = {
+    "find": 0.0,  # 在窗口树中查找控件
+    "menu_switch": 0.0,  # 切换左侧菜单页面
+    "refresh": 0.0,  # F5 刷新
+    "input": 0.0,  # 输入框、下拉框输入
+    "click": 0.0,  # 点击按钮、表格
+    "key": 0.0,  # 发送快捷键
+    "dialog": 0.0,  # 操作完成到弹窗出现
+    "grid_copy": 0.0,  # 复制表格内容到剪贴板
+    "grid_save": 0.0,  # 表格另存为文件
+}
+
+SZ_MARKET_TRADE_TYPES = [
+    "对手方最优价格",
+    "本方最优价格",
+    "即时成交剩余撤销",
+    "最优五档即时成交剩余撤销",
+    "全额成交或撤销",
+]
+SH_MARKET_TRADE_TYPES = ["最优五档成交剩余撤销", "最优五档成交剩余转限价"]
+
+STOCK_EXCHANGES = ["深圳Ａ股", "上海Ａ股"]
+
+
+class SimulatedReject(Exception):
+    """模拟柜台拒绝委托"""
+
+    pass
+
+
+class SimulatedAccount:
+    """模拟的资金账户，保存资金、持仓、当日委托、当日成交及可申购新股"""
+
+    ENTRUST_COLUMNS = [
+        "委托时间",
+        "证券代码",
+        "证券名称",
+        "操作",
+        "委托数量",
+        "成交数量",
+        "委托价格",
+        "成交均价",
+        "合同编号",
+        "备注",
+    ]
+    TRADE_COLUMNS = [
+        "成交时间",
+        "证券代码",
+        "证券名称",
+        "操作",
+        "成交数量",
+        "成交均价",
+        "成交金额",
+        "合同编号",
+    ]
+    POSITION_COLUMNS = [
+        "证券代码",
+        "证券名称",
+        "股票余额",
+        "可用余额",
+        "成本价",
+        "市价",
+        "市值",
+    ]
+
+    ACTIONS = {"buy": "证券买入", "sell": "证券卖出", "ipo": "新股申购"}
+
+    def __init__(self, cash: float = 1000000.0, default_price: float = 10.0):
+        """
+        :param cash: 初始可用资金
+        :param default_price: 未设置行情的证券使用的市价
+        """
+        self.cash = cash
+        self.frozen = 0.0
+        self.default_price = default_price
+        self.positions = collections.OrderedDict()
+        self.prices = {}
+        self.names = {}
+        self.entrusts = []
+        self.trades = []
+        self.ipo_list = []
+        self._entrust_no = itertools.count(10001)
+        self._lock = threading.RLock()
+
+    def name(self, code: str) -> str:
+        return self.names.get(code, "模拟" + code)
+
+    def price(self, code: str) -> float:
+        return self.prices.get(code, self.default_price)
+
+    def set_price(self, code: str, price: float):
+        self.prices[code] = price
+
+    def add_position(
+        self,
+        code: str,
+        amount: int,
+        cost: float,
+        price: Optional[float] = None,
+        name: Optional[str] = None,
+    ):
+        """
+        增加持仓
+
+        :param code: 六位证券代码
+        :param amount: 股票余额，全部可用
+        :param cost: 成本价
+        :param price: 市价，默认等于成本价
+        :param name: 证券名称
+        """
+        with self._lock:
+            if name is not None:
+                self.names[code] = name
+            self.prices.setdefault(code, cost if price is None else price)
+            self.positions[code] = {"amount": amount, "available": amount, "cost": cost}
+
+    def add_ipo(self, code: str, price: float, amount: int, name: Optional[str] = None):
+        """
+        增加今日可申购的新股
+
+        :param amount: 可申购数量，为 0 时不可申购
+        """
+        if name is not None:
+            self.names[code] = name
+        self.ipo_list.append({"code": code, "price": price, "amount": amount})
+
+    def order(self, side: str, code: str, price: float, amount: int) -> dict:
+        """
+        委托下单，校验失败时抛出 SimulatedReject
+
+        :param side: 'buy', 'sell' 或 'ipo'
+        :return: 委托记录
+        """
+        if not re.match(r"^\d{6}$", code):
+            raise SimulatedReject("证券代码错误")
+        if price <= 0:
+            raise SimulatedReject("委托价格必须大于0")
+        if amount <= 0:
+            raise SimulatedReject("委托数量必须大于0")
+        with self._lock:
+            if side == "buy":
+                if amount % 100 != 0:
+                    raise SimulatedReject("买入数量必须为100的整数倍")
+                cost = price * amount
+                if cost > self.cash:
+                    raise SimulatedReject("可用资金不足")
+                self.cash -= cost
+                self.frozen += cost
+            elif side == "sell":
+                position = self.positions.get(code)
+                if position is None or position["available"] < amount:
+                    raise SimulatedReject("可用股份不足")
+                position["available"] -= amount
+            entrust = {
+                "委托时间": datetime.datetime.now().strftime("%H:%M:%S"),
+                "证券代码": code,
+                "证券名称": self.name(code),
+                "操作": self.ACTIONS[side],
+                "委托数量": amount,
+                "成交数量": 0,
+                "委托价格": price,
+                "成交均价": 0.0,
+                "合同编号": str(next(self._entrust_no)),
+                "备注": "已报",
+                "side": side,
+            }
+            self.entrusts.append(entrust)
+            return entrust
+
+    def _find_entrust(self, entrust_no: str) -> Optional[dict]:
+        for entrust in self.entrusts:
+            if entrust["合同编号"] == str(entrust_no):
+                return entrust
+        return None
+
+    @staticmethod
+    def is_open(entrust: dict) -> bool:
+        return entrust["side"] != "ipo" and entrust["备注"] in ("已报", "部成")
+
+    def open_entrusts(self) -> List[dict]:
+        """可撤委托"""
+        with self._lock:
+            return [e for e in self.entrusts if self.is_open(e)]
+
+    def cancel(self, entrust_no: str) -> bool:
+        with self._lock:
+            entrust = self._find_entrust(entrust_no)
+            if entrust is None or not self.is_open(entrust):
+                return False
+            left = entrust["委托数量"] - entrust["成交数量"]
+            if entrust["side"] == "buy":
+                amount = left * entrust["委托价格"]
+                self.frozen -= amount
+                self.cash += amount
+            else:
+                self.positions[entrust["证券代码"]]["available"] += left
+            entrust["备注"] = "已撤" if entrust["成交数量"] == 0 else "部撤"
+            return True
+
+    def fill(
+        self,
+        entrust_no: str,
+        amount: Optional[int] = None,
+        price: Optional[float] = None,
+    ):
+        """
+        模拟委托成交
+
+        :param amount: 成交数量，默认全部成交
+        :param price: 成交价格，默认为委托价格
+        """
+        with self._lock:
+            entrust = self._find_entrust(entrust_no)
+            if entrust is None or not self.is_open(entrust):
+                raise ValueError("委托 {} 不可成交".format(entrust_no))
+            left = entrust["委托数量"] - entrust["成交数量"]
+            amount = left if amount is None else min(amount, left)
+            price = entrust["委托价格"] if price is None else price
+            code = entrust["证券代码"]
+            if entrust["side"] == "buy":
+                self.frozen -= entrust["委托价格"] * amount
+                self.cash += (entrust["委托价格"] - price) * amount
+                position = self.positions.setdefault(
+                    code, {"amount": 0, "available": 0, "cost": price}
+                )
+                total = position["amount"] + amount
+                position["cost"] = (
+                    position["cost"] * position["amount"] + price * amount
+                ) / total
+                position["amount"] = total
+                position["available"] += amount
+            else:
+                self.cash += price * amount
+                position = self.positions[code]
+                position["amount"] -= amount
+                if position["amount"] == 0:
+                    del self.positions[code]
+            traded = entrust["成交数量"] + amount
+            entrust["成交均价"] = (
+                entrust["成交均价"] * entrust["成交数量"] + price * amount
+            ) / traded
+            entrust["成交数量"] = traded
+            entrust["备注"] = "已成" if traded == entrust["委托数量"] else "部成"
+            self.trades.append(
+                {
+                    "成交时间": datetime.datetime.now().strftime("%H:%M:%S"),
+                    "证券代码": code,
+                    "证券名称": entrust["证券名称"],
+                    "操作": entrust["操作"],
+                    "成交数量": amount,
+                    "成交均价": price,
+                    "成交金额": price * amount,
+                    "合同编号": entrust["合同编号"],
+                }
+            )
+
+    def balance(self) -> Dict[str, float]:
+        with self._lock:
+            market_value = sum(
+                p["amount"] * self.price(code) for code, p in self.positions.items()
+            )
+            return {
+                "资金余额": self.cash + self.frozen,
+                "冻结资金": self.frozen,
+                "可用金额": self.cash,
+                "可取金额": self.cash,
+                "股票市值": market_value,
+                "总资产": self.cash + self.frozen + market_value,
+            }
+
+    def position_rows(self) -> List[dict]:
+        with self._lock:
+            return [
+                {
+                    "证券代码": code,
+                    "证券名称": self.name(code),
+                    "股票余额": p["amount"],
+                    "可用余额": p["available"],
+                    "成本价": p["cost"],
+                    "市价": self.price(code),
+                    "市值": p["amount"] * self.price(code),
+                }
+                for code, p in self.positions.items()
+            ]
+
+
+def _format_cell(value) -> str:
+    if isinstance(value, float):
+        return "{:.3f}".format(value)
+    return str(value)
+
+
+def _to_tsv(columns: List[str], rows: List[dict]) -> str:
+    lines = ["\t".join(columns)]
+    for row in rows:
+        lines.append("\t".join(_format_cell(row.get(c, "")) for c in columns))
+    return "\r\n".join(lines) + "\r\n"
+
+
+def _match_best(controls: List["_SimControl"], name: str) -> Optional["_SimControl"]:
+    """pywinauto best_match 的简化版本：先按标题匹配，再按 类名+序号 匹配，如 Edit1、Button2"""
+    for control in controls:
+        if control.window_text() == name:
+            return control
+    match = re.match(r"^(.*?)(\d*)$", name)
+    class_name, index = match.group(1), int(match.group(2) or 1)
+    candidates = [c for c in controls if c.class_name == class_name]
+    index = max(index, 1) - 1
+    if index < len(candidates):
+        return candidates[index]
+    return None
+
+
+class _SimSpec:
+    """对应 pywinauto 的 WindowSpecification，使用时才查找控件"""
+
+    def __init__(self, parent, criteria: dict):
+        self._parent = parent
+        self._criteria = criteria
+
+    def _resolve(self) -> "_SimControl":
+        parent = self._parent
+        if isinstance(parent, _SimSpec):
+            parent = parent._resolve()
+        with budget.charge("window_search"):
+            control = parent._find(**self._criteria)
+        if control is None:
+            raise ElementNotFoundError(self._criteria)
+        return control
+
+    def wrapper_object(self):
+        return self._resolve()
+
+    def exists(self, timeout=None, retry_interval=None):
+        try:
+            self._resolve()
+        except ElementNotFoundError:
+            return False
+        return True
+
+    def wait(self, wait_for, timeout=None, retry_interval=None):
+        if not self.exists():
+            raise timings.TimeoutError(
+                "timed out waiting for {}".format(self._criteria)
+            )
+        return self
+
+    def child_window(self, **criteria):
+        return _SimSpec(self, criteria)
+
+    window = child_window
+
+    def __getitem__(self, name):
+        return _SimSpec(self, {"best_match": name})
+
+    def __getattr__(self, name):
+        if name.startswith("_"):
+            raise AttributeError(name)
+        return getattr(self._resolve(), name)
+
+
+class _SimControl:
+    def __init__(
+        self,
+        class_name: str,
+        control_id: Optional[int] = None,
+        title="",
+        page: Optional[Tuple[str, ...]] = None,
+    ):
+        """
+        :param title: 控件文本，可以为返回文本的函数
+        :param page: 控件所在的页面，为 None 时始终可见
+        """
+        self.class_name = class_name
+        self.control_id = control_id
+        self.title = title
+        self.page = page
+        self.owner: Optional["_SimWindow"] = None
+        self.handle = None
+
+    @property
+    def app(self) -> "SimulatedApplication":
+        return self.owner.app
+
+    def wrapper_object(self):
+        return self
+
+    def exists(self, timeout=None, retry_interval=None):
+        return self.is_visible()
+
+    def wait(self, wait_for, timeout=None, retry_interval=None):
+        return self
+
+    def is_visible(self):
+        return self.owner.is_visible() and (
+            self.page is None or self.page == self.owner.current_page
+        )
+
+    def _check_visible(self):
+        if not self.is_visible():
+            raise RuntimeError("control {} is not visible".format(self.control_id))
+
+    def window_text(self):
+        return self.title() if callable(self.title) else self.title
+
+    def texts(self):
+        return [self.window_text()]
+
+    def has_style(self, style):
+        return False
+
+    def set_focus(self):
+        return self
+
+    def click(self, coords=(None, None), **kwargs):
+        self._check_visible()
+        self.app._act("click")
+        self.on_click(coords)
+
+    click_input = click
+
+    def double_click(self, coords=(None, None), **kwargs):
+        self._check_visible()
+        self.app._act("click")
+        self.on_double_click(coords)
+
+    def type_keys(self, keys, **kwargs):
+        self._check_visible()
+        self.app._act("key")
+
+    def on_click(self, coords):
+        pass
+
+    def on_double_click(self, coords):
+        self.on_click(coords)
+
+
+class _SimButton(_SimControl):
+    def __init__(
+        self, control_id, title, action: Callable = None, page=None, class_name="Button"
+    ):
+        super().__init__(class_name, control_id, title, page)
+        self.action = action
+
+    def on_click(self, coords):
+        if self.action is not None:
+            self.action()
+
+
+class _SimEdit(_SimControl):
+    def __init__(self, control_id, page=None, on_change: Callable = None):
+        super().__init__("Edit", control_id, "", page)
+        self.on_change = on_change
+        self._selected = False
+
+    def set_edit_text(self, text, pos_start=None, pos_end=None):
+        self._check_visible()
+        self.app._act("input")
+        self._set_value("" if text is None else str(text))
+
+    set_text = set_edit_text
+
+    def select(self, *args, **kwargs):
+        self._selected = True
+        return self
+
+    def type_keys(self, keys, **kwargs):
+        self._check_visible()
+        self.app._act("input")
+        value = "" if self._selected else self.window_text()
+        self._selected = False
+        self._set_value(value + str(keys))
+
+    def _set_value(self, value):
+        self.title = value
+        if self.on_change is not None:
+            self.on_change(value)
+
+
+class _SimComboBox(_SimControl):
+    def __init__(self, control_id, items: List[str], page=None):
+        super().__init__("ComboBox", control_id, "", page)
+        self.set_items(items)
+
+    def set_items(self, items: List[str]):
+        self.items = list(items)
+        self.selected = 0
+
+    def window_text(self):
+        return self.items[self.selected] if self.items else ""
+
+    def texts(self):
+        # 与 pywinauto 一致，第 0 项为当前选中的文本
+        return [self.window_text()] + self.items
+
+    def item_count(self):
+        return len(self.items)
+
+    def selected_index(self):
+        return self.selected
+
+    def selected_text(self):
+        return self.window_text()
+
+    def select(self, item):
+        self._check_visible()
+        self.app._act("input")
+        if isinstance(item, str):
+            item = self.items.index(item)
+        if not 0 <= item < len(self.items):
+            raise IndexError("item {} out of range".format(item))
+        self.selected = item
+        return self
+
+
+class _SimGrid(_SimControl):
+    def __init__(
+        self,
+        control_id,
+        columns: Callable[[], List[str]],
+        rows: Callable[[], List[dict]],
+        page=None,
+        on_click: Callable = None,
+        on_double_click: Callable = None,
+    ):
+        super().__init__("CVirtualGridCtrl", control_id, "", page)
+        self.columns = columns
+        self.rows = rows
+        self._on_click = on_click
+        self._on_double_click = on_double_click
+
+    def content(self) -> str:
+        return _to_tsv(self.columns(), self.rows())
+
+    def type_keys(self, keys, **kwargs):
+        super().type_keys(keys, **kwargs)
+        if keys == "^A^C":
+            self._copy()
+        elif keys == "^s":
+            self.app._act("grid_save")
+            self.app._show_save_dialog(self.content())
+
+    def post_message(self, message, wparam=0, lparam=0):
+        if message == win32defines.WM_COMMAND and wparam == 0xE122:
+            self._copy()
+
+    def _copy(self):
+        self.app._act("grid_copy")
+        self.app.clipboard = self.content()
+
+    def _row(self, coords) -> int:
+        config = self.app.config
+        return (
+            coords[1] - config.COMMON_GRID_FIRST_ROW_HEIGHT
+        ) // config.COMMON_GRID_ROW_HEIGHT
+
+    def on_click(self, coords):
+        if self._on_click is not None:
+            self._on_click(self._row(coords))
+
+    def on_double_click(self, coords):
+        if self._on_double_click is not None:
+            self._on_double_click(self._row(coords))
+
+
+class _SimTreeItem:
+    def __init__(self, tree: "_SimTree", path: Tuple[str, ...]):
+        self._tree = tree
+        self.path = path
+
+    def text(self):
+        return self.path[-1]
+
+    def select(self):
+        self._tree.app._switch_page(self.path)
+        return self
+
+    def is_selected(self):
+        return self._tree.owner.current_page == self.path
+
+    def collapse(self):
+        return self
+
+    def expand(self):
+        return self
+
+
+class _SimTree(_SimControl):
+    def __init__(self, paths: List[Tuple[str, ...]]):
+        super().__init__("SysTreeView32", 129)
+        self.paths = set()
+        for path in paths:
+            for i in range(1, len(path) + 1):
+                self.paths.add(tuple(path[:i]))
+
+    def get_item(self, path, exact=False):
+        path = tuple(path)
+        if path not in self.paths:
+            raise IndexError("menu item {} not found".format(path))
+        return _SimTreeItem(self, path)
+
+    def roots(self):
+        return [_SimTreeItem(self, p) for p in sorted(self.paths) if len(p) == 1]
+
+
+class _SimToolbarButton:
+    def __init__(self, toolbar: "_SimToolbar"):
+        self._toolbar = toolbar
+
+    def click(self):
+        self._toolbar.app._act("click")
+        self._toolbar.app._act("refresh")
+
+
+class _SimToolbar(_SimControl):
+    def __init__(self):
+        super().__init__("ToolbarWindow32", 59392)
+
+    def button(self, index):
+        return _SimToolbarButton(self)
+
+
+class _SimWindow(_SimControl):
+    def __init__(self, app: "SimulatedApplication", title: str):
+        super().__init__("#32770", None, title)
+        self._app = app
+        self.owner = self
+        self.children: List[_SimControl] = []
+        self.current_page: Optional[Tuple[str, ...]] = None
+        self.closed = False
+        self.handle = app._new_handle()
+        self.on_keys: Callable = None
+        self.on_close: Callable = None
+
+    @property
+    def app(self):
+        return self._app
+
+    def add(self, control: _SimControl) -> _SimControl:
+        control.owner = self
+        control.handle = self._app._new_handle()
+        self.children.append(control)
+        return control
+
+    def is_visible(self):
+        return not self.closed and self._app.alive
+
+    def _find(self, **criteria) -> Optional[_SimControl]:
+        self._app._act("find")
+        candidates = [c for c in self.children if c.is_visible()]
+        if "control_id" in criteria:
+            candidates = [
+                c for c in candidates if c.control_id == criteria["control_id"]
+            ]
+        if "class_name" in criteria:
+            candidates = [
+                c for c in candidates if c.class_name == criteria["class_name"]
+            ]
+        if "title" in criteria:
+            candidates = [c for c in candidates if c.window_text() == criteria["title"]]
+        if "title_re" in criteria:
+            candidates = [
+                c for c in candidates if re.match(criteria["title_re"], c.window_text())
+            ]
+        if "best_match" in criteria:
+            return _match_best(candidates, criteria["best_match"])
+        return candidates[0] if candidates else None
+
+    def child_window(self, **criteria):
+        return _SimSpec(self, criteria)
+
+    window = child_window
+
+    def __getitem__(self, name):
+        return _SimSpec(self, {"best_match": name})
+
+    def __getattr__(self, name):
+        if name.startswith("_"):
+            raise AttributeError(name)
+        return _SimSpec(self, {"best_match": name})
+
+    def type_keys(self, keys, **kwargs):
+        if not self.is_visible():
+            raise RuntimeError("window {} is closed".format(self.title))
+        self._app._act("key")
+        if self.on_keys is not None:
+            self.on_keys(keys)
+
+    def close(self):
+        self._app._close_window(self)
+
+
+class SimulatedApplication:
+    """
+    模拟 pywinauto.Application，界面结构（控件 ID、菜单路径）取自券商配置，
+    各操作的耗时可以通过 latency 配置，stats 记录各操作的调用次数
+    """
+
+    def __init__(
+        self,
+        config=client.CommonConfig,
+        latency: Optional[Dict[str, float]] = None,
+        account: Optional[SimulatedAccount] = None,
+        confirm_dialog: bool = True,
+    ):
+        """
+        :param config: 券商配置，如 client.create('ths')
+        :param latency: 各操作的模拟耗时，参见 DEFAULT_LATENCY
+        :param account: 模拟账户，默认新建
+        :param confirm_dialog: 提交委托后是否先弹出委托确认框
+        """
+        self.config = config
+        self.latency = dict(DEFAULT_LATENCY, **(latency or {}))
+        self.account = account or SimulatedAccount()
+        self.confirm_dialog = confirm_dialog
+        self.stats = collections.Counter()
+        self.clipboard = ""
+        self.alive = True
+        self.saved_files = []
+        self._handles = itertools.count(0x10000)
+        self._lock = threading.RLock()
+        # 已弹出的窗口 (出现时间, 窗口)，后出现的在上层
+        self._dialogs: List[Tuple[float, _SimWindow]] = []
+        self._ipo_selected = set()
+        # 页面对应的提交委托函数，按回车时调用
+        self._pages = {}
+        # 切换到页面时调用的函数
+        self._page_hooks = {}
+        self.main = self._build_main()
+
+    # pywinauto.Application 接口
+    def top_window(self):
+        self._check_alive()
+        now = time.monotonic()
+        with budget.charge("window_search"), self._lock:
+            for at, dialog in reversed(self._dialogs):
+                if at <= now:
+                    return dialog
+        return self.main
+
+    def window(self, **criteria):
+        self._check_alive()
+        handle = criteria.get("handle")
+        if handle is not None:
+            for window in self.windows():
+                if window.handle == handle:
+                    return window
+            raise ElementNotFoundError(criteria)
+        title = criteria.get("title")
+        if title is not None and title != self.main.title:
+            for window in self.windows():
+                if window.window_text() == title:
+                    return window
+            raise ElementNotFoundError(criteria)
+        return self.main
+
+    def windows(self, class_name=None, visible_only=True, **criteria):
+        self._check_alive()
+        now = time.monotonic()
+        with self._lock:
+            dialogs = [d for at, d in self._dialogs if at <= now or not visible_only]
+        return [self.main] + dialogs
+
+    def kill(self, soft=False):
+        self.alive = False
+
+    def _check_alive(self):
+        if not self.alive:
+            raise RuntimeError("application is not running")
+
+    # 内部实现
+    def _new_handle(self):
+        return next(self._handles)
+
+    def _act(self, action: str):
+        self.stats[action] += 1
+        seconds = self.latency.get(action, 0)
+        if seconds > 0:
+            time.sleep(seconds)
+
+    def _pop(
+        self,
+        title: str,
+        content: str = "",
+        buttons=("确定",),
+        on_yes: Callable = None,
+    ) -> _SimWindow:
+        """弹出对话框，latency['dialog'] 秒后可见。on_yes 在点击 是(Y)、确定 或 alt+Y 时调用"""
+        dialog = _SimWindow(self, title)
+        dialog.add(_SimControl("Static", 1004, content))
+        dialog.add(
+            _SimControl("Static", self.config.POP_DIALOD_TITLE_CONTROL_ID, title)
+        )
+
+        def confirm():
+            self._close_window(dialog)
+            if on_yes is not None:
+                on_yes()
+
+        for name in buttons:
+            action = confirm if name in ("确定", "是(Y)") else dialog.close
+            dialog.add(_SimButton(None, name, action))
+
+        def on_keys(keys):
+            if keys in ("%Y", "%y", "{ENTER}"):
+                confirm()
+
+        dialog.on_keys = on_keys
+        self._show(dialog)
+        return dialog
+
+    def _show(self, window: _SimWindow):
+        self.stats["dialog"] += 1
+        with self._lock:
+            self._dialogs.append((time.monotonic() + self.latency["dialog"], window))
+
+    def _close_window(self, window: _SimWindow):
+        if window is self.main:
+            self.kill()
+            return
+        with self._lock:
+            self._dialogs = [d for d in self._dialogs if d[1] is not window]
+        window.closed = True
+        if window.on_close is not None:
+            window.on_close()
+
+    def _show_save_dialog(self, content: str):
+        dialog = _SimWindow(self, "另存为")
+        path = dialog.add(_SimEdit(1148))
+
+        def save():
+            with open(path.window_text(), "w", encoding="gbk") as f:
+                f.write(content.replace("\r\n", "\n"))
+            self.saved_files.append(path.window_text())
+            self._close_window(dialog)
+
+        dialog.add(_SimButton(1, "保存(S)", save))
+        dialog.add(_SimButton(2, "取消", dialog.close))
+
+        def on_keys(keys):
+            if keys in ("%{s}%{y}", "%s", "{ENTER}"):
+                save()
+
+        dialog.on_keys = on_keys
+        self._show(dialog)
+
+    def _switch_page(self, path: Tuple[str, ...]):
+        self._act("menu_switch")
+        self.main.current_page = path
+        hook = self._page_hooks.get(path)
+        if hook is not None:
+            hook()
+
+    def _on_main_keys(self, keys: str):
+        shortcuts = {
+            "{F1}": ("买入[F1]",),
+            "{F2}": ("卖出[F2]",),
+            "{F3}": ("撤单[F3]",),
+        }
+        if keys == "{F5}":
+            self._act("refresh")
+        elif keys in shortcuts:
+            self._switch_page(shortcuts[keys])
+        elif keys == "{ENTER}":
+            submit = self._pages.get(self.main.current_page)
+            if submit is not None:
+                submit()
+
+    def _control(self, page, control_id):
+        for control in self.main.children:
+            if control.page == page and control.control_id == control_id:
+                return control
+        raise ElementNotFoundError(control_id)
+
+    def _build_main(self) -> _SimWindow:
+        config = self.config
+        main = _SimWindow(self, config.TITLE)
+        main.on_keys = self._on_main_keys
+        self.main = main
+
+        trade_pages = [
+            ("买入[F1]",),
+            ("卖出[F2]",),
+            ("市价委托", "买入"),
+            ("市价委托", "卖出"),
+        ]
+        query_pages = [
+            tuple(config.BALANCE_MENU_PATH),
+            tuple(config.POSITION_MENU_PATH),
+            tuple(config.TODAY_ENTRUSTS_MENU_PATH),
+            tuple(config.TODAY_TRADES_MENU_PATH),
+        ]
+        ipo_pages = [
+            tuple(config.AUTO_IPO_MENU_PATH),
+            tuple(config.AUTO_IPO_MENU_PATH_ONE),
+        ]
+        main.add(_SimTree(trade_pages + [("撤单[F3]",)] + query_pages + ipo_pages))
+        main.add(_SimToolbar())
+
+        for path, side in zip(trade_pages, ["buy", "sell", "buy", "sell"]):
+            self._build_trade_page(path, side, market=path[0] == "市价委托")
+        self._build_cancel_page()
+        self._build_query_pages()
+        self._build_ipo_pages()
+        return main
+
+    def _build_trade_page(self, page, side, market):
+        config = self.config
+        main = self.main
+        exchange = main.add(
+            _SimComboBox(config.TRADE_STOCK_EXCHANGE_CONTROL_ID, STOCK_EXCHANGES, page)
+        )
+        market_type = None
+        if market:
+            market_type = main.add(
+                _SimComboBox(config.TRADE_MARKET_TYPE_CONTROL_ID, [], page)
+            )
+
+        def on_security_change(code):
+            if market_type is not None:
+                market_type.set_items(
+                    SH_MARKET_TRADE_TYPES
+                    if code.startswith("6")
+                    else SZ_MARKET_TRADE_TYPES
+                )
+            exchange.selected = 1 if code.startswith(("5", "6", "9")) else 0
+
+        security = main.add(
+            _SimEdit(config.TRADE_SECURITY_CONTROL_ID, page, on_security_change)
+        )
+        price = main.add(_SimEdit(config.TRADE_PRICE_CONTROL_ID, page))
+        amount = main.add(_SimEdit(config.TRADE_AMOUNT_CONTROL_ID, page))
+
+        def submit():
+            code = security.window_text().strip()
+            try:
+                if market:
+                    order_price = float(price.window_text() or self.account.price(code))
+                else:
+                    order_price = float(price.window_text())
+                order_amount = int(float(amount.window_text()))
+            except ValueError:
+                self._pop("提示", "委托价格或数量输入有误")
+                return
+
+            def place():
+                try:
+                    entrust = self.account.order(side, code, order_price, order_amount)
+                except SimulatedReject as e:
+                    self._pop("提示", str(e))
+                    return
+                self._pop(
+                    "提示",
+                    "您的{}委托已成功提交，合同编号：{}。".format(
+                        "买入" if side == "buy" else "卖出", entrust["合同编号"]
+                    ),
+                )
+
+            if self.confirm_dialog:
+                self._pop(
+                    "委托确认",
+                    "{} {} 价格 {} 数量 {}".format(
+                        SimulatedAccount.ACTIONS[side], code, order_price, order_amount
+                    ),
+                    buttons=("是(Y)", "否(N)"),
+                    on_yes=place,
+                )
+            else:
+                place()
+
+        main.add(
+            _SimButton(
+                config.TRADE_SUBMIT_CONTROL_ID,
+                "买入" if side == "buy" else "卖出",
+                submit,
+                page,
+            )
+        )
+        self._pages[page] = submit
+
+    def _build_cancel_page(self):
+        config = self.config
+        page = ("撤单[F3]",)
+        account = self.account
+
+        def cancel(entrusts):
+            def do():
+                count = sum(account.cancel(e["合同编号"]) for e in entrusts)
+                self._pop("提示", "撤单申报成功" if count else "没有可撤的委托")
+
+            return do
+
+        def cancel_row(row):
+            entrusts = account.open_entrusts()
+            if 0 <= row < len(entrusts):
+                entrust = entrusts[row]
+                self._pop(
+                    "撤单确认",
+                    "撤销 {} {} 委托".format(entrust["证券代码"], entrust["合同编号"]),
+                    buttons=("是(Y)", "否(N)"),
+                    on_yes=cancel([entrust]),
+                )
+
+        def cancel_by_side(side=None):
+            def do():
+                self._pop(
+                    "提示",
+                    "是否撤销全部{}委托？".format(
+                        {None: "", "buy": "买入", "sell": "卖出"}[side]
+                    ),
+                    buttons=("是(Y)", "否(N)"),
+                    on_yes=lambda: cancel(
+                        [
+                            e
+                            for e in account.open_entrusts()
+                            if side is None or e["side"] == side
+                        ]
+                    )(),
+                )
+
+            return do
+
+        self.main.add(
+            _SimGrid(
+                config.COMMON_GRID_CONTROL_ID,
+                lambda: SimulatedAccount.ENTRUST_COLUMNS,
+                account.open_entrusts,
+                page,
+                on_double_click=cancel_row,
+            )
+        )
+        for control_id, title, side in (
+            (config.TRADE_CANCEL_ALL_ENTRUST_CONTROL_ID, "全撤(Z /)", None),
+            (config.TRADE_CANCEL_BUY_ENTRUST_CONTROL_ID, "撤买(X)", "buy"),
+            (config.TRADE_CANCEL_SELL_ENTRUST_CONTROL_ID, "撤卖(C)", "sell"),
+        ):
+            if control_id is not None:
+                self.main.add(_SimButton(control_id, title, cancel_by_side(side), page))
+
+    def _build_query_pages(self):
+        config = self.config
+        main = self.main
+        account = self.account
+        grids = collections.OrderedDict()
+        grids.setdefault(
+            tuple(config.POSITION_MENU_PATH),
+            (lambda: SimulatedAccount.POSITION_COLUMNS, account.position_rows),
+        )
+        grids.setdefault(
+            tuple(config.TODAY_ENTRUSTS_MENU_PATH),
+            (lambda: SimulatedAccount.ENTRUST_COLUMNS, lambda: list(account.entrusts)),
+        )
+        grids.setdefault(
+            tuple(config.TODAY_TRADES_MENU_PATH),
+            (lambda: SimulatedAccount.TRADE_COLUMNS, lambda: list(account.trades)),
+        )
+        for page, (columns, rows) in grids.items():
+            main.add(_SimGrid(config.COMMON_GRID_CONTROL_ID, columns, rows, page))
+
+        balance_page = tuple(config.BALANCE_MENU_PATH)
+        for name, control_id in config.BALANCE_CONTROL_ID_GROUP.items():
+            main.add(
+                _SimControl(
+                    "Static",
+                    control_id,
+                    lambda name=name: "{:.2f}".format(account.balance()[name]),
+                    balance_page,
+                )
+            )
+        balance_grid_id = getattr(config, "BALANCE_GRID_CONTROL_ID", None)
+        if balance_grid_id is not None:
+            main.add(
+                _SimGrid(
+                    balance_grid_id,
+                    lambda: list(config.BALANCE_CONTROL_ID_GROUP),
+                    lambda: [account.balance()],
+                    balance_page,
+                )
+            )
+
+    def _ipo_rows(self) -> List[dict]:
+        number_field = self.config.AUTO_IPO_NUMBER
+        return [
+            {
+                self.config.AUTO_IPO_SECURITY_FIELD: ipo["code"],
+                "证券名称": self.account.name(ipo["code"]),
+                "申购价格": ipo["price"],
+                number_field: ipo["amount"],
+            }
+            for ipo in self.account.ipo_list
+        ]
+
+    def _ipo_columns(self) -> List[str]:
+        return [
+            self.config.AUTO_IPO_SECURITY_FIELD,
+            "证券名称",
+            "申购价格",
+            self.config.AUTO_IPO_NUMBER,
+        ]
+
+    def _submit_ipo(self, ipo_list: List[dict]):
+        count = 0
+        errors = []
+        for ipo in ipo_list:
+            if ipo["amount"] <= 0:
+                continue
+            try:
+                self.account.order("ipo", ipo["code"], ipo["price"], ipo["amount"])
+            except SimulatedReject as e:
+                errors.append(str(e))
+                continue
+            count += 1
+        if count:
+            self._pop("提示", "新股申购委托已提交{}只".format(count))
+        elif errors:
+            self._pop("提示", errors[0])
+        else:
+            self._pop("提示", "请选择可申购的新股")
+
+    def _build_ipo_pages(self):
+        config = self.config
+        main = self.main
+        account = self.account
+
+        # 批量申购页面，默认全部选中
+        page = tuple(config.AUTO_IPO_MENU_PATH)
+        selected = self._ipo_selected
+
+        def on_switch():
+            selected.clear()
+            selected.update(range(len(account.ipo_list)))
+
+        def toggle(row):
+            if 0 <= row < len(account.ipo_list):
+                selected.symmetric_difference_update({row})
+
+        def submit_selected():
+            self._submit_ipo(
+                [ipo for i, ipo in enumerate(account.ipo_list) if i in selected]
+            )
+
+        main.add(
+            _SimGrid(
+                config.COMMON_GRID_CONTROL_ID,
+                self._ipo_columns,
+                self._ipo_rows,
+                page,
+                on_click=toggle,
+            )
+        )
+        main.add(
+            _SimButton(
+                config.AUTO_IPO_SELECT_ALL_BUTTON_CONTROL_ID,
+                "全部选中",
+                on_switch,
+                page,
+            )
+        )
+        main.add(
+            _SimButton(config.AUTO_IPO_BUTTON_CONTROL_ID, "申购", submit_selected, page)
+        )
+        self._page_hooks[page] = on_switch
+
+        # 单只申购页面，双击表格行填入表单
+        page_one = tuple(config.AUTO_IPO_MENU_PATH_ONE)
+        if page_one == page:
+            return
+        form = {}
+
+        def fill_form(row):
+            if 0 <= row < len(account.ipo_list):
+                form.clear()
+                form.update(account.ipo_list[row])
+                form["amount"] = 0
+
+        def fill_max_amount():
+            for ipo in account.ipo_list:
+                if form and ipo["code"] == form["code"]:
+                    form["amount"] = ipo["amount"]
+
+        def submit_one():
+            self._submit_ipo([dict(form)] if form else [])
+            form.clear()
+
+        main.add(
+            _SimGrid(
+                config.COMMON_GRID_CONTROL_ID,
+                self._ipo_columns,
+                self._ipo_rows,
+                page_one,
+                on_double_click=fill_form,
+            )
+        )
+        main.add(
+            _SimButton(
+                config.AUTO_IPO_STATIC_CONTROL_ID,
+                "",
+                fill_max_amount,
+                page_one,
+                "Static",
+            )
+        )
+        main.add(
+            _SimButton(config.AUTO_IPO_BUTTON_CONTROL_ID, "申购", submit_one, page_one)
+        )
+
+
+class SimulatedCopy(grid_strategies.Copy):
+    """从模拟客户端的剪贴板读取 grid 内容"""
+
+    def _read_clipboard(self) -> str:
+        return self._trader.app.clipboard
+
+
+class SimulatedWMCopy(grid_strategies.WMCopy):
+    """从模拟客户端的剪贴板读取 grid 内容"""
+
+    def _read_clipboard(self) -> str:
+        return self._trader.app.clipboard
+
+
+def attach(
+    trader, app: Optional[SimulatedApplication] = None, **kwargs
+) -> SimulatedApplication:
+    """
+    将 ClientTrader 连接到模拟客户端，用于替代 connect / prepare
+
+    :param trader: ClientTrader 实例
+    :param app: 模拟客户端，默认按 trader 的券商配置新建
+    :param kwargs: 新建 SimulatedApplication 时的其他参数
+    :return: 模拟客户端
+    """
+    if app is None:
+        app = SimulatedApplication(trader.config, **kwargs)
+    trader._app = app
+    trader._main = app.window(title=trader.config.TITLE)
+    trader._init_toolbar()
+    trader._current_menu = None
+    trader._get_left_menus_handle.cache_clear()
+
+    # 通过剪贴板读取的 grid 策略改为读取模拟剪贴板，另存为文件的策略可以直接使用
+    strategy = trader.grid_strategy
+    strategy_class = strategy if isinstance(strategy, type) else type(strategy)
+    for origin, simulated in (
+        (grid_strategies.WMCopy, SimulatedWMCopy),
+        (grid_strategies.Copy, SimulatedCopy),
+    ):
+        if issubclass(strategy_class, origin):
+            if not issubclass(strategy_class, simulated):
+                trader.grid_strategy = simulated
+            break
+    trader._grid_strategy_instance = None
+    return app
@@ -1,7 +1,6 @@
 # -*- coding: utf-8 -*-
 
 import pywinauto
-import pywinauto.clipboard
 
 from easytrader import grid_strategies
 from . import clienttrader
@@ -9,6 +8,8 @@ from . import clienttrader
 
 class UniversalClientTrader(clienttrader.BaseLoginClientTrader):
     grid_strategy = grid_strategies.Xls
+    # 登录窗口，由 login 查找后设置
+    _login_window = None
 
     @property
     def broker_type(self):
@@ -39,17 +40,16 @@ class UniversalClientTrader(clienttrader.BaseLoginClientTrader):
                     login_window = pywinauto.findwindows.find_window(class_name='#32770', found_index=1)
                     break
                 except:
-                    self.wait(1)
+                    self.wait(1, "login_window")
 
-            self.wait(1)
-            self._app.window(handle=login_window).Edit1.set_focus()
-            self._app.window(handle=login_window).Edit1.type_keys(user)
-
-            self._app.window(handle=login_window).button7.click()
+            self.wait(1, "login_window")
+            self._login_window = self._app.window(handle=login_window)
+            self._fill_login_form(user, password, comm_password)
+            self._submit_login()
 
             # detect login is success or not
             # self._app.top_window().wait_not("exists", 100)
-            self.wait(5)
+            self.wait(5, "login_submit")
 
             self._app = pywinauto.Application().connect(
                 path=self._run_exe_path(exe_path), timeout=10
@@ -58,3 +58,9 @@ class UniversalClientTrader(clienttrader.BaseLoginClientTrader):
         self._close_prompt_windows()
         self._main = self._app.window(title="网上股票交易系统5.0")
 
+    def _fill_login_form(self, user, password, comm_password):
+        self._login_window.Edit1.set_focus()
+        self._login_window.Edit1.type_keys(user)
+
+    def _submit_login(self):
+        self._login_window.button7.click()
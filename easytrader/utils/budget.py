@@ -0,0 +1,173 @@
+# coding:utf-8
+"""
+统计每个最外层操作 (如 buy, position) 的耗时构成：
+等待 (sleep)、查找窗口 (window_search)、grid 的剪贴板或文件读写 (grid_io)、解析 (parse)，
+其余时间计为 other，即实际操作界面的时间
+"""
+
+import contextlib
+import functools
+import json
+import sys
+import threading
+import time
+from typing import Optional
+
+CATEGORIES = ("sleep", "window_search", "grid_io", "parse")
+
+# 各线程正在统计的最外层操作保存在 operation 属性中
+_local = threading.local()
+
+# 为 None 时不统计
+_budget: Optional["Budget"] = None
+
+
+class _Operation:
+    __slots__ = ("name", "start", "spent", "charging")
+
+    def __init__(self, name):
+        self.name = name
+        self.spent = dict.fromkeys(CATEGORIES, 0.0)
+        # 正在计入的分类，嵌套的计入不重复统计
+        self.charging = None
+        self.start = time.perf_counter()
+
+
+class Budget:
+    def __init__(self):
+        self._lock = threading.Lock()
+        # {操作名: {'calls': 次数, 'total': 总耗时, 各分类耗时...}}
+        self._stats = {}
+
+    def begin(self, name: str):
+        """
+        开始统计一次操作，已在统计中的嵌套操作返回 None
+        """
+        if _current_operation() is not None:
+            return None
+        operation = _local.operation = _Operation(name)
+        return operation
+
+    def end(self, handle):
+        if handle is None:
+            return
+        operation = handle
+        total = time.perf_counter() - operation.start
+        _local.operation = None
+        with self._lock:
+            stats = self._stats.get(operation.name)
+            if stats is None:
+                stats = self._stats[operation.name] = dict(
+                    calls=0, total=0.0, **dict.fromkeys(CATEGORIES, 0.0)
+                )
+            stats["calls"] += 1
+            stats["total"] += total
+            for category, spent in operation.spent.items():
+                stats[category] += spent
+
+    def reset(self):
+        with self._lock:
+            self._stats.clear()
+
+    def report(self) -> dict:
+        """
+        :return: {操作名: {'calls', 'total', 'sleep', 'window_search', 'grid_io', 'parse',
+            'other', 'share': {分类: 占总耗时的比例}}}，按总耗时降序排列
+        """
+        with self._lock:
+            stats = {name: dict(item) for name, item in self._stats.items()}
+        report = {}
+        for name, item in sorted(stats.items(), key=lambda i: -i[1]["total"]):
+            total = item["total"]
+            item["other"] = max(total - sum(item[c] for c in CATEGORIES), 0.0)
+            item["share"] = {
+                c: item[c] / total if total else 0.0 for c in CATEGORIES + ("other",)
+            }
+            report[name] = item
+        return report
+
+    def format_report(self) -> str:
+        """以表格形式返回 report()，各分类为占总耗时的百分比"""
+        columns = CATEGORIES + ("other",)
+        header = "{:<40} {:>6} {:>10}".format("operation", "calls", "total(s)")
+        header += "".join(" {:>14}".format(c) for c in columns)
+        lines = [header]
+        for name, item in self.report().items():
+            line = "{:<40} {:>6} {:>10.3f}".format(name, item["calls"], item["total"])
+            line += "".join(
+                " {:>13.1f}%".format(item["share"][c] * 100) for c in columns
+            )
+            lines.append(line)
+        return "\n".join(lines)
+
+    def dump(self, path: Optional[str] = None) -> str:
+        """
+        :param path: 保存 json 的文件路径，为 None 时只返回表格
+        :return: format_report() 的结果
+        """
+        if path is not None:
+            with open(path, "w", encoding="utf-8") as f:
+                json.dump(self.report(), f, ensure_ascii=False, indent=2)
+        return self.format_report()
+
+
+def enable() -> Budget:
+    """
+    开启统计，perf_clock 装饰的最外层调用作为一次操作。
+    Windows 下同时统计 pywinauto 查找窗口的耗时
+    """
+    global _budget
+    _budget = Budget()
+    _instrument_pywinauto()
+    return _budget
+
+
+def disable():
+    global _budget
+    _budget = None
+
+
+def get_budget() -> Optional[Budget]:
+    return _budget
+
+
+def _current_operation() -> Optional[_Operation]:
+    return getattr(_local, "operation", None)
+
+
+@contextlib.contextmanager
+def charge(category: str):
+    """
+    将代码块的耗时计入当前操作的 category 分类，不在操作中或未开启时不统计
+    :param category: CATEGORIES 之一
+    """
+    operation = _current_operation()
+    if operation is None or operation.charging is not None:
+        yield
+        return
+    operation.charging = category
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        operation.spent[category] += time.perf_counter() - start
+        operation.charging = None
+
+
+def _instrument_pywinauto():
+    """pywinauto 的窗口查找都经过 findwindows.find_elements，包装后计入 window_search"""
+    if sys.platform != "win32":
+        return
+    from pywinauto import findwindows
+
+    original = findwindows.find_elements
+    if getattr(original, "_easytrader_budget", False):
+        return
+
+    @functools.wraps(original)
+    def find_elements(*args, **kwargs):
+        with charge("window_search"):
+            return original(*args, **kwargs)
+
+    find_elements._easytrader_budget = True
+    findwindows.find_elements = find_elements
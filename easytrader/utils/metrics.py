@@ -0,0 +1,200 @@
+# coding:utf-8
+import bisect
+import itertools
+import json
+import math
+import threading
+from typing import Optional, Sequence
+
+# 耗时直方图的桶上界，单位为秒
+DEFAULT_BUCKETS = (
+    0.001,
+    0.0025,
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1.0,
+    2.5,
+    5.0,
+    10.0,
+    math.inf,
+)
+
+
+def _replace_inf(value):
+    """json 不支持 inf，转换为 '+Inf'"""
+    if isinstance(value, dict):
+        return {k: _replace_inf(v) for k, v in value.items()}
+    if isinstance(value, list):
+        return [_replace_inf(v) for v in value]
+    if value == math.inf:
+        return "+Inf"
+    return value
+
+
+class _Metric:
+    __slots__ = ("calls", "errors", "sampled", "total", "cpu", "max", "buckets")
+
+    def __init__(self, bucket_count):
+        self.calls = 0
+        self.errors = 0
+        self.sampled = 0
+        self.total = 0.0
+        self.cpu = 0.0
+        self.max = 0.0
+        self.buckets = [0] * bucket_count
+
+
+class MetricsRegistry:
+    """
+    perf_clock 的统计数据，记录各函数的调用次数、出错次数、耗时直方图及 CPU 耗时。
+    调用次数与出错次数每次都记录，耗时每 sample_rate 次调用采样一次
+    """
+
+    def __init__(
+        self, sample_rate: int = 1, buckets: Sequence[float] = DEFAULT_BUCKETS
+    ):
+        """
+        :param sample_rate: 每 sample_rate 次调用记录一次耗时，1 为全部记录
+        :param buckets: 直方图的桶上界，最后一个需要为 math.inf
+        """
+        if sample_rate < 1:
+            raise ValueError("sample_rate must be >= 1")
+        self.sample_rate = sample_rate
+        self.buckets = tuple(buckets)
+        self._metrics = {}
+        self._lock = threading.Lock()
+        self._counter = itertools.count()
+
+    def should_sample(self) -> bool:
+        return self.sample_rate == 1 or next(self._counter) % self.sample_rate == 0
+
+    def _get(self, name) -> _Metric:
+        metric = self._metrics.get(name)
+        if metric is None:
+            metric = self._metrics.setdefault(name, _Metric(len(self.buckets)))
+        return metric
+
+    def count(self, name: str, error: bool = False):
+        """记录一次未采样的调用"""
+        with self._lock:
+            metric = self._get(name)
+            metric.calls += 1
+            metric.errors += error
+
+    def record(self, name: str, elapsed: float, cpu: float, error: bool = False):
+        """记录一次采样的调用"""
+        index = bisect.bisect_left(self.buckets, elapsed)
+        with self._lock:
+            metric = self._get(name)
+            metric.calls += 1
+            metric.errors += error
+            metric.sampled += 1
+            metric.total += elapsed
+            metric.cpu += cpu
+            metric.max = max(metric.max, elapsed)
+            metric.buckets[min(index, len(self.buckets) - 1)] += 1
+
+    def reset(self):
+        with self._lock:
+            self._metrics.clear()
+
+    def snapshot(self) -> dict:
+        """
+        :return: {函数名: {'calls', 'errors', 'sampled', 'total', 'cpu', 'mean', 'max',
+            'p50', 'p95', 'p99', 'histogram': [[桶上界, 累计次数], ...]}}，
+            total 与 cpu 为采样调用的合计，分位数为所在桶的上界
+        """
+        with self._lock:
+            metrics = {
+                name: (
+                    metric.calls,
+                    metric.errors,
+                    metric.sampled,
+                    metric.total,
+                    metric.cpu,
+                    metric.max,
+                    list(metric.buckets),
+                )
+                for name, metric in self._metrics.items()
+            }
+        result = {}
+        for name, (calls, errors, sampled, total, cpu, max_, buckets) in sorted(
+            metrics.items()
+        ):
+            cumulative = list(itertools.accumulate(buckets))
+            result[name] = {
+                "calls": calls,
+                "errors": errors,
+                "sampled": sampled,
+                "total": total,
+                "cpu": cpu,
+                "mean": total / sampled if sampled else 0.0,
+                "max": max_,
+                "p50": self._quantile(cumulative, 0.5),
+                "p95": self._quantile(cumulative, 0.95),
+                "p99": self._quantile(cumulative, 0.99),
+                "histogram": [
+                    [bound, count] for bound, count in zip(self.buckets, cumulative)
+                ],
+            }
+        return result
+
+    def _quantile(self, cumulative, q) -> Optional[float]:
+        if not cumulative or cumulative[-1] == 0:
+            return None
+        rank = q * cumulative[-1]
+        return self.buckets[bisect.bisect_left(cumulative, rank)]
+
+    def export(self, fmt: str = "json") -> str:
+        """
+        :param fmt: 'json' 或 'prometheus'
+        """
+        snapshot = self.snapshot()
+        if fmt == "json":
+            return json.dumps(_replace_inf(snapshot), ensure_ascii=False, indent=2)
+        if fmt == "prometheus":
+            return self._export_prometheus(snapshot)
+        raise ValueError("unknown format {}".format(fmt))
+
+    @staticmethod
+    def _export_prometheus(snapshot) -> str:
+        lines = [
+            "# TYPE easytrader_calls_total counter",
+            "# TYPE easytrader_errors_total counter",
+            "# TYPE easytrader_cpu_seconds_total counter",
+            "# TYPE easytrader_duration_seconds histogram",
+        ]
+        for name, metric in snapshot.items():
+            label = 'function="{}"'.format(name)
+            lines.append(
+                "easytrader_calls_total{{{}}} {}".format(label, metric["calls"])
+            )
+            lines.append(
+                "easytrader_errors_total{{{}}} {}".format(label, metric["errors"])
+            )
+            lines.append(
+                "easytrader_cpu_seconds_total{{{}}} {}".format(label, metric["cpu"])
+            )
+            for bound, count in metric["histogram"]:
+                le = "+Inf" if bound == math.inf else repr(bound)
+                lines.append(
+                    'easytrader_duration_seconds_bucket{{{},le="{}"}} {}'.format(
+                        label, le, count
+                    )
+                )
+            lines.append(
+                "easytrader_duration_seconds_sum{{{}}} {}".format(
+                    label, metric["total"]
+                )
+            )
+            lines.append(
+                "easytrader_duration_seconds_count{{{}}} {}".format(
+                    label, metric["sampled"]
+                )
+            )
+        return "\n".join(lines) + "\n"
@@ -1,9 +1,15 @@
 # coding:utf-8
+import collections
+import contextlib
 import functools
 import logging
+import time
 import timeit
+from typing import Optional
 
 from easytrader import logger
+from easytrader.utils import budget, tracing
+from easytrader.utils.metrics import MetricsRegistry
 
 try:
     from time import process_time
@@ -11,36 +17,149 @@ except:
     from time import clock as process_time
 
 
+_listeners = []
+# perf_clock 的统计数据，为 None 时不统计
+_metrics: Optional[MetricsRegistry] = None
+
+
+def add_perf_listener(listener):
+    """
+    注册耗时监听函数，perf_clock 装饰的函数每次调用结束后
+    以 listener(函数名, 耗时, CPU 耗时) 的形式调用，未开启 DEBUG 日志时同样生效
+    """
+    _listeners.append(listener)
+
+
+def remove_perf_listener(listener):
+    _listeners.remove(listener)
+
+
+def enable_metrics(sample_rate=1, **kwargs) -> MetricsRegistry:
+    """
+    开启 perf_clock 的统计，未开启 DEBUG 日志时同样生效
+    :param sample_rate: 每 sample_rate 次调用记录一次耗时，调用次数与出错次数总是记录
+    :param kwargs: 传递给 MetricsRegistry 的其他参数
+    :return: 统计数据，可以通过 snapshot() 或 export() 导出
+    """
+    global _metrics
+    _metrics = MetricsRegistry(sample_rate, **kwargs)
+    return _metrics
+
+
+def disable_metrics():
+    global _metrics
+    _metrics = None
+
+
+def get_metrics() -> Optional[MetricsRegistry]:
+    return _metrics
+
+
 def perf_clock(f):
+    name = f.__qualname__
+
     @functools.wraps(f)
     def wrapper(*args, **kwargs):
-        if not logger.isEnabledFor(logging.DEBUG):
-            return f(*args, **kwargs)
+        debug = logger.isEnabledFor(logging.DEBUG)
+        metrics = _metrics
+        sampled = metrics is not None and metrics.should_sample()
+        tracer = tracing.get_tracer()
+        budget_ = budget.get_budget()
+        if (
+            not debug
+            and not _listeners
+            and tracer is None
+            and budget_ is None
+            and not sampled
+        ):
+            if metrics is None:
+                return f(*args, **kwargs)
+            try:
+                result = f(*args, **kwargs)
+            except Exception:
+                metrics.count(name, error=True)
+                raise
+            metrics.count(name)
+            return result
 
         ts = timeit.default_timer()
         cs = process_time()
         ex = None
         result = None
+        span = tracer.start_span(name) if tracer is not None else None
+        operation = budget_.begin(name) if budget_ is not None else None
 
         try:
             result = f(*args, **kwargs)
         except Exception as ex1:
             ex = ex1
 
+        if operation is not None:
+            budget_.end(operation)
+        if span is not None:
+            tracer.finish_span(span, ex)
+
         te = timeit.default_timer()
         ce = process_time()
-        logger.debug(
-            "%r consume %2.4f sec, cpu %2.4f sec. args %s, extra args %s"
-            % (
-                f.__name__,
-                te - ts,
-                ce - cs,
-                args[1:],
-                kwargs,
+        if debug:
+            logger.debug(
+                "%r consume %2.4f sec, cpu %2.4f sec. args %s, extra args %s"
+                % (
+                    f.__name__,
+                    te - ts,
+                    ce - cs,
+                    args[1:],
+                    kwargs,
+                )
             )
-        )
+        if sampled:
+            metrics.record(name, te - ts, ce - cs, error=ex is not None)
+        elif metrics is not None:
+            metrics.count(name, error=ex is not None)
+        for listener in list(_listeners):
+            listener(name, te - ts, ce - cs)
         if ex is not None:
             raise ex
         return result
 
     return wrapper
+
+
+class OrderTimer:
+    """
+    记录一次委托各阶段的耗时，使用 time.monotonic 计时，单位为秒
+    """
+
+    PHASES = ("menu_switch", "field_entry", "submit", "dialog_wait", "dialog_handle")
+
+    def __init__(self, method, broker=None, security=None):
+        self.method = method
+        self.broker = broker
+        self.security = security
+        self.phases = collections.OrderedDict((phase, 0.0) for phase in self.PHASES)
+        self._start = time.monotonic()
+
+    @contextlib.contextmanager
+    def phase(self, name):
+        start = time.monotonic()
+        try:
+            yield
+        finally:
+            self.phases[name] += time.monotonic() - start
+
+    def finish(self, error=None) -> dict:
+        """
+        :return: 类似 {'method': 'buy', 'broker': 'ths', 'security': '162411',
+            'phases': {'menu_switch': 0.12, ...}, 'other': 0.01, 'total': 0.53, 'error': None}，
+            other 为各阶段以外的耗时
+        """
+        total = time.monotonic() - self._start
+        return {
+            "method": self.method,
+            "broker": self.broker,
+            "security": self.security,
+            "phases": dict(self.phases),
+            "other": max(0.0, total - sum(self.phases.values())),
+            "total": total,
+            "error": None if error is None else repr(error),
+        }
@@ -0,0 +1,145 @@
+# coding:utf-8
+import csv
+import json
+from decimal import ROUND_HALF_UP, Decimal
+from typing import Dict, Iterable, NamedTuple, Optional
+
+from easytrader import exceptions
+
+# (代码前缀, 板块, 涨跌幅限制)，按顺序匹配
+BOARD_RULES = [
+    (("688", "689"), "科创板", Decimal("0.2")),
+    (("300", "301"), "创业板", Decimal("0.2")),
+    (("8", "4"), "北交所", Decimal("0.3")),
+    (("600", "601", "603", "605", "000", "001", "002", "003"), "主板", Decimal("0.1")),
+]
+FUND_BOARD = ("基金", Decimal("0.1"))
+ST_LIMIT = Decimal("0.05")
+
+STOCK_TICK = Decimal("0.01")
+FUND_TICK = Decimal("0.001")
+
+
+class SecurityInfo(NamedTuple):
+    code: str
+    name: str
+    board: str
+    tick: Decimal
+    prev_close: Optional[Decimal]
+    up_limit: Optional[Decimal]
+    down_limit: Optional[Decimal]
+
+
+def _decimal(value) -> Optional[Decimal]:
+    if value is None or value == "":
+        return None
+    return Decimal(str(value))
+
+
+def _quantize(value: Decimal, tick: Decimal) -> Decimal:
+    return (value / tick).quantize(Decimal(1), rounding=ROUND_HALF_UP) * tick
+
+
+def classify(code: str, name: str = ""):
+    """
+    根据代码前缀返回 (板块, 最小价格变动单位, 涨跌幅限制)
+    """
+    for prefixes, board, limit in BOARD_RULES:
+        if code.startswith(prefixes):
+            if board == "主板" and "ST" in name.upper():
+                limit = ST_LIMIT
+            return board, STOCK_TICK, limit
+    board, limit = FUND_BOARD
+    return board, FUND_TICK, limit
+
+
+def make_security_info(
+    code, name="", prev_close=None, up_limit=None, down_limit=None, tick=None
+) -> SecurityInfo:
+    """
+    未提供涨跌停价时按板块的涨跌幅限制由昨收价计算
+    """
+    code = str(code)[-6:]
+    board, default_tick, limit = classify(code, name)
+    tick = _decimal(tick) or default_tick
+    prev_close = _decimal(prev_close)
+    up_limit = _decimal(up_limit)
+    down_limit = _decimal(down_limit)
+    if prev_close is not None:
+        if up_limit is None:
+            up_limit = _quantize(prev_close * (1 + limit), tick)
+        if down_limit is None:
+            down_limit = _quantize(prev_close * (1 - limit), tick)
+    return SecurityInfo(code, name, board, tick, prev_close, up_limit, down_limit)
+
+
+class SecurityTable:
+    """
+    证券参考数据表，保存各证券的最小价格变动单位、板块、昨收价及涨跌停价，
+    用于下单前在本地修正价格精度并拒绝超出涨跌停范围的委托
+    """
+
+    def __init__(self, securities: Iterable[SecurityInfo] = ()):
+        self._securities: Dict[str, SecurityInfo] = {
+            info.code: info for info in securities
+        }
+
+    @classmethod
+    def from_records(cls, records: Iterable[dict]) -> "SecurityTable":
+        """
+        :param records: 类似 [{'code': '162411', 'name': '华宝油气', 'prev_close': 0.5}]，
+            可选字段 up_limit, down_limit, tick
+        """
+        return cls(make_security_info(**record) for record in records)
+
+    @classmethod
+    def load(cls, path: str) -> "SecurityTable":
+        """
+        从 json 或 csv 文件加载，字段同 from_records
+        """
+        with open(path, encoding="utf-8") as f:
+            if path.lower().endswith(".json"):
+                records = json.load(f)
+            else:
+                records = list(csv.DictReader(f))
+        return cls.from_records(records)
+
+    def get(self, security: str) -> Optional[SecurityInfo]:
+        return self._securities.get(security[-6:])
+
+    def __contains__(self, security: str) -> bool:
+        return security[-6:] in self._securities
+
+    def __len__(self) -> int:
+        return len(self._securities)
+
+    def round_price(self, security: str, price) -> str:
+        """
+        按最小价格变动单位四舍五入，返回价格字符串。表中没有的证券按代码前缀确定精度
+        """
+        if isinstance(price, str):
+            return price
+        code = security[-6:]
+        info = self._securities.get(code)
+        tick = info.tick if info is not None else classify(code)[1]
+        return str(_quantize(_decimal(price), tick))
+
+    def check_price(self, security: str, price) -> str:
+        """
+        修正价格精度并检查是否在涨跌停范围内
+
+        :return: 修正后的价格字符串
+        :raises exceptions.TradeError: 超出涨跌停范围
+        """
+        price = self.round_price(security, price)
+        info = self.get(security)
+        if info is None or info.up_limit is None:
+            return price
+        value = Decimal(price)
+        if not info.down_limit <= value <= info.up_limit:
+            raise exceptions.TradeError(
+                "委托价格 {} 超出涨跌停范围 [{}, {}]".format(
+                    price, info.down_limit, info.up_limit
+                )
+            )
+        return price
@@ -0,0 +1,223 @@
+# coding:utf-8
+"""
+记录 trader 调用的嵌套耗时，perf_clock 装饰的函数和界面等待自动生成 span，
+每次最外层调用形成一棵 span 树，可以导出为 Chrome trace event 格式，
+在 chrome://tracing 或 https://ui.perfetto.dev 中查看
+"""
+
+import collections
+import contextlib
+import itertools
+import json
+import os
+import threading
+import time
+from typing import List, Optional
+
+# 各线程当前正在记录的 span 保存在 span 属性中
+_local = threading.local()
+
+# 为 None 时不记录
+_tracer: Optional["Tracer"] = None
+
+
+class Span:
+    __slots__ = (
+        "span_id",
+        "name",
+        "args",
+        "parent",
+        "children",
+        "start",
+        "end",
+        "thread_id",
+        "thread_name",
+        "error",
+        "_previous",
+    )
+
+    def __init__(self, span_id, name, args, parent):
+        self.span_id = span_id
+        self.name = name
+        self.args = args
+        self.parent = parent
+        self.children = []
+        thread = threading.current_thread()
+        self.thread_id = thread.ident
+        self.thread_name = thread.name
+        self.error = None
+        self.end = None
+        # 开始前线程当前的 span，结束时恢复
+        self._previous = None
+        self.start = time.perf_counter()
+
+    @property
+    def duration(self) -> Optional[float]:
+        """耗时，单位为秒，未结束时为 None"""
+        return None if self.end is None else self.end - self.start
+
+    def to_dict(self) -> dict:
+        return {
+            "name": self.name,
+            "args": self.args,
+            "thread": self.thread_name,
+            "duration": self.duration,
+            "error": self.error,
+            "children": [child.to_dict() for child in list(self.children)],
+        }
+
+    def __repr__(self):
+        return "Span({!r}, duration={!r})".format(self.name, self.duration)
+
+
+class Tracer:
+    def __init__(self, max_traces: int = 1000):
+        """
+        :param max_traces: 最多保留的 span 树数量，超出后丢弃最早的
+        """
+        self._traces = collections.deque(maxlen=max_traces)
+        self._lock = threading.Lock()
+        self._ids = itertools.count(1)
+        self._origin = time.perf_counter()
+
+    def start_span(self, name: str, **args) -> Span:
+        parent = current_span()
+        span = Span(next(self._ids), name, args, parent)
+        if parent is not None:
+            with self._lock:
+                parent.children.append(span)
+        span._previous = parent
+        _local.span = span
+        return span
+
+    def finish_span(self, span: Span, error: Optional[BaseException] = None):
+        span.end = time.perf_counter()
+        if error is not None:
+            span.error = "{}: {}".format(type(error).__name__, error)
+        _local.span = span._previous
+        span._previous = None
+        if span.parent is None:
+            with self._lock:
+                self._traces.append(span)
+
+    @property
+    def traces(self) -> List[Span]:
+        """已结束的最外层 span"""
+        with self._lock:
+            return list(self._traces)
+
+    def clear(self):
+        with self._lock:
+            self._traces.clear()
+
+    def chrome_trace(self) -> dict:
+        """
+        :return: Chrome trace event 格式的数据，每个 span 为一个 'X' 事件
+        """
+        events = []
+        threads = {}
+        stack = list(reversed(self.traces))
+        while stack:
+            span = stack.pop()
+            if span.end is None:
+                continue
+            threads[span.thread_id] = span.thread_name
+            args = dict(span.args, span_id=span.span_id)
+            if span.parent is not None:
+                args["parent_id"] = span.parent.span_id
+            if span.error is not None:
+                args["error"] = span.error
+            events.append(
+                {
+                    "name": span.name,
+                    "cat": "easytrader",
+                    "ph": "X",
+                    "ts": (span.start - self._origin) * 1e6,
+                    "dur": (span.end - span.start) * 1e6,
+                    "pid": os.getpid(),
+                    "tid": span.thread_id,
+                    "args": args,
+                }
+            )
+            stack.extend(reversed(span.children))
+        for tid, thread_name in threads.items():
+            events.append(
+                {
+                    "name": "thread_name",
+                    "ph": "M",
+                    "pid": os.getpid(),
+                    "tid": tid,
+                    "args": {"name": thread_name},
+                }
+            )
+        return {"traceEvents": events, "displayTimeUnit": "ms"}
+
+
+def enable(max_traces: int = 1000) -> Tracer:
+    """
+    开启记录
+    :param max_traces: 最多保留的 span 树数量
+    """
+    global _tracer
+    _tracer = Tracer(max_traces)
+    return _tracer
+
+
+def disable():
+    global _tracer
+    _tracer = None
+
+
+def get_tracer() -> Optional[Tracer]:
+    return _tracer
+
+
+@contextlib.contextmanager
+def span(name: str, **args):
+    """
+    记录一段代码的耗时，作为当前 span 的子 span，未开启时不记录
+    :param args: 附加在 span 上的参数，需要可以 json 序列化
+    """
+    tracer = _tracer
+    if tracer is None:
+        yield None
+        return
+    current = tracer.start_span(name, **args)
+    try:
+        yield current
+    except BaseException as e:
+        tracer.finish_span(current, e)
+        raise
+    tracer.finish_span(current)
+
+
+def current_span() -> Optional[Span]:
+    """当前线程正在记录的 span，用于传递到其他线程"""
+    return getattr(_local, "span", None)
+
+
+@contextlib.contextmanager
+def attach(parent: Optional[Span]):
+    """
+    在其他线程中以 parent 为父 span 继续记录
+
+    :param parent: 提交任务的线程中 current_span() 的返回值
+    """
+    previous = current_span()
+    _local.span = parent
+    try:
+        yield
+    finally:
+        _local.span = previous
+
+
+def export_chrome_trace(path: Optional[str] = None) -> dict:
+    """
+    导出 Chrome trace event 格式的数据
+    :param path: 保存的文件路径，为 None 时只返回数据
+    """
+    data = _tracer.chrome_trace() if _tracer is not None else {"traceEvents": []}
+    if path is not None:
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(data, f, ensure_ascii=False)
+    return data
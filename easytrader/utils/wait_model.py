@@ -0,0 +1,196 @@
+# coding:utf-8
+import collections
+import json
+import math
+import os
+import threading
+from typing import Dict, Optional
+
+from easytrader.log import logger
+
+
+class _OpStats:
+    def __init__(self, default: float, window: int):
+        self.default = default
+        self.ewma: Optional[float] = None
+        self.samples = collections.deque(maxlen=window)
+        # 超时后下一次等待的最短时间，探测到就绪后清零
+        self.floor = 0.0
+
+    def add(self, elapsed: float, alpha: float):
+        self.samples.append(elapsed)
+        if self.ewma is None:
+            self.ewma = elapsed
+        else:
+            self.ewma = alpha * elapsed + (1 - alpha) * self.ewma
+
+    def percentile(self, q: float) -> float:
+        ordered = sorted(self.samples)
+        index = min(len(ordered) - 1, max(0, math.ceil(q * len(ordered)) - 1))
+        return ordered[index]
+
+    def to_dict(self) -> dict:
+        return {
+            "default": self.default,
+            "ewma": self.ewma,
+            "samples": list(self.samples),
+            "floor": self.floor,
+        }
+
+
+class WaitModel:
+    """
+    按券商、按操作记录界面实际就绪所需的时间 (EWMA 及高分位数)，
+    并据此调整 ClientTrader.wait 的等待时间：机器快时缩短，机器慢时延长。
+
+    可以探测就绪状态的操作（如等待弹窗）直接使用自身的统计结果，
+    只能盲等的操作则按同一券商下已校准操作的整体快慢比例缩放。
+
+    等待超时也计为一个样本 (实际耗时至少为等待时间)，并且下一次的等待时间
+    至少为本次的 miss_growth 倍，避免等待时间只缩不涨。
+    """
+
+    def __init__(
+        self,
+        path: Optional[str] = None,
+        alpha: float = 0.3,
+        percentile: float = 0.95,
+        margin: float = 1.2,
+        window: int = 50,
+        min_samples: int = 5,
+        min_scale: float = 0.2,
+        min_blind_scale: float = 0.5,
+        max_scale: float = 3.0,
+        save_every: int = 20,
+        miss_growth: float = 2.0,
+    ):
+        """
+        :param path: 统计结果的保存路径，为 None 时不保存
+        :param alpha: EWMA 的平滑系数
+        :param percentile: 使用的高分位数
+        :param margin: 在估计值基础上额外预留的比例
+        :param window: 每个操作保留的最近样本数
+        :param min_samples: 样本数达到该值后才使用统计结果
+        :param min_scale: 已校准操作的等待时间相对默认值的最小比例
+        :param min_blind_scale: 盲等操作的等待时间相对默认值的最小比例
+        :param max_scale: 等待时间相对默认值的最大比例
+        :param save_every: 每记录多少个样本保存一次
+        :param miss_growth: 超时后下一次等待时间相对本次的最小倍数
+        """
+        self.path = path
+        self.alpha = alpha
+        self.percentile = percentile
+        self.margin = margin
+        self.window = window
+        self.min_samples = min_samples
+        self.min_scale = min_scale
+        self.min_blind_scale = min_blind_scale
+        self.max_scale = max_scale
+        self.save_every = save_every
+        self.miss_growth = miss_growth
+
+        self._lock = threading.Lock()
+        self._stats: Dict[str, Dict[str, _OpStats]] = {}
+        self._unsaved = 0
+        if path is not None and os.path.exists(path):
+            self.load()
+
+    def record(self, broker: str, op: str, elapsed: float, default: float):
+        """
+        记录一次操作从开始到界面就绪实际消耗的时间
+
+        :param broker: 券商类型
+        :param op: 操作名
+        :param elapsed: 实际耗时，单位为秒
+        :param default: 该操作的默认等待时间
+        """
+        self._add(broker, op, elapsed, default, miss=False)
+
+    def record_timeout(self, broker: str, op: str, timeout: float, default: float):
+        """
+        记录一次等待超时，界面在 timeout 秒内没有就绪
+
+        :param broker: 券商类型
+        :param op: 操作名
+        :param timeout: 本次使用的等待时间，单位为秒
+        :param default: 该操作的默认等待时间
+        """
+        self._add(broker, op, timeout, default, miss=True)
+
+    def _add(self, broker, op, elapsed, default, miss):
+        with self._lock:
+            stats = self._stats.setdefault(broker, {}).get(op)
+            if stats is None:
+                stats = self._stats[broker][op] = _OpStats(default, self.window)
+            stats.default = default
+            stats.add(elapsed, self.alpha)
+            stats.floor = elapsed * self.miss_growth if miss else 0.0
+            self._unsaved += 1
+            need_save = self.path is not None and self._unsaved >= self.save_every
+        if need_save:
+            self.save()
+
+    def timeout(self, broker: str, op: str, default: float) -> float:
+        """
+        返回操作的建议等待时间
+
+        :param broker: 券商类型
+        :param op: 操作名
+        :param default: 代码中写定的默认等待时间
+        """
+        with self._lock:
+            stats = self._stats.get(broker, {}).get(op)
+            if stats is not None and len(stats.samples) >= self.min_samples:
+                return self._clamp(self._estimate(stats), default, self.min_scale)
+            factor = self._speed_factor(broker)
+        if factor is None:
+            return default
+        return self._clamp(default * factor, default, self.min_blind_scale)
+
+    def _estimate(self, stats: _OpStats) -> float:
+        estimate = max(stats.ewma, stats.percentile(self.percentile)) * self.margin
+        return max(estimate, stats.floor)
+
+    def _speed_factor(self, broker: str) -> Optional[float]:
+        ratios = sorted(
+            self._estimate(stats) / stats.default
+            for stats in self._stats.get(broker, {}).values()
+            if len(stats.samples) >= self.min_samples and stats.default > 0
+        )
+        if not ratios:
+            return None
+        return ratios[len(ratios) // 2]
+
+    def _clamp(self, seconds: float, default: float, min_scale: float) -> float:
+        return min(max(seconds, default * min_scale), default * self.max_scale)
+
+    def load(self):
+        try:
+            with open(self.path, encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            logger.warning("无法读取等待时间统计文件 %s, 将重新统计", self.path)
+            return
+        with self._lock:
+            self._stats = {}
+            for broker, ops in data.items():
+                for op, item in ops.items():
+                    stats = _OpStats(item["default"], self.window)
+                    stats.ewma = item["ewma"]
+                    stats.samples.extend(item["samples"])
+                    stats.floor = item.get("floor", 0.0)
+                    self._stats.setdefault(broker, {})[op] = stats
+
+    def save(self):
+        if self.path is None:
+            return
+        with self._lock:
+            data = {
+                broker: {op: stats.to_dict() for op, stats in ops.items()}
+                for broker, ops in self._stats.items()
+            }
+            self._unsaved = 0
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(data, f, ensure_ascii=False, indent=2)
+        os.replace(tmp_path, self.path)
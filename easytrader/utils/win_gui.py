@@ -1,3 +1,22 @@
 # coding:utf-8
-from pywinauto import win32defines
-from pywinauto.win32functions import SetForegroundWindow, ShowWindow
+import sys
+
+if sys.platform == "win32":
+    from pywinauto import win32defines
+    from pywinauto.findwindows import ElementNotFoundError
+    from pywinauto.win32functions import SetForegroundWindow, ShowWindow
+else:
+    # 非 Windows 平台（如使用 simclient 模拟客户端时）提供同名替代，保证模块可以导入
+
+    class win32defines:
+        WS_MINIMIZE = 0x20000000
+        WM_COMMAND = 0x111
+
+    class ElementNotFoundError(Exception):
+        pass
+
+    def SetForegroundWindow(window):
+        pass
+
+    def ShowWindow(window, cmd):
+        pass
@@ -38,13 +38,8 @@ class WKClientTrader(HTClientTrader):
                 except RuntimeError:
                     pass
 
-            self._app.top_window().Edit1.set_focus()
-            self._app.top_window().Edit1.set_edit_text(user)
-            self._app.top_window().Edit2.set_edit_text(password)
-
-            self._app.top_window().Edit3.set_edit_text(comm_password)
-
-            self._app.top_window().Button1.click()
+            self._fill_login_form(user, password, comm_password)
+            self._submit_login()
 
             # detect login is success or not
             self._app.top_window().wait_not("exists", 100)
@@ -53,4 +48,14 @@ class WKClientTrader(HTClientTrader):
                 path=self._run_exe_path(exe_path), timeout=10
             )
         self._close_prompt_windows()
-        self._main = self._app.window(title="网上股票交易系统5.0")
\ No newline at end of file
+        self._main = self._app.window(title="网上股票交易系统5.0")
+
+    def _fill_login_form(self, user, password, comm_password):
+        self._app.top_window().Edit1.set_focus()
+        self._app.top_window().Edit1.set_edit_text(user)
+        self._app.top_window().Edit2.set_edit_text(password)
+
+        self._app.top_window().Edit3.set_edit_text(comm_password)
+
+    def _submit_login(self):
+        self._app.top_window().Button1.click()
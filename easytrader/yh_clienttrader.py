@@ -2,8 +2,6 @@
 import re
 import tempfile
 
-import pywinauto
-
 from easytrader import clienttrader, grid_strategies
 from easytrader.utils.captcha import recognize_verify_code
 
@@ -18,6 +16,7 @@ class YHClientTrader(clienttrader.BaseLoginClientTrader):
     """
 
     grid_strategy = grid_strategies.Xls
+    login_captcha = True
 
     @property
     def broker_type(self):
@@ -33,54 +32,39 @@ class YHClientTrader(clienttrader.BaseLoginClientTrader):
         :param comm_password: 通讯密码, 华泰需要，可不设
         :return:
         """
-        try:
-            self._app = pywinauto.Application().connect(
-                path=self._run_exe_path(exe_path), timeout=1
-            )
-        # pylint: disable=broad-except
-        except Exception:
-            self._app = pywinauto.Application().start(exe_path)
-            is_xiadan = True if "xiadan.exe" in exe_path else False
-            # wait login window ready
-            while True:
-                try:
-                    self._app.top_window().Edit1.wait("ready")
-                    break
-                except RuntimeError:
-                    pass
-
-            self._app.top_window().Edit1.type_keys(user)
-            self._app.top_window().Edit2.type_keys(password)
-            while True:
-                self._app.top_window().Edit3.type_keys(
-                    self._handle_verify_code(is_xiadan)
-                )
-                if is_xiadan:
-                    self._app.top_window().child_window(control_id=1006, class_name="Button").click()
-                else:
-                    self._app.top_window()["登录"].click()
-
-                # detect login is success or not
-                try:
-                    self._app.top_window().wait_not("exists visible", 10)
-                    break
-                # pylint: disable=broad-except
-                except Exception:
-                    if is_xiadan:
-                        self._app.top_window()["确定"].click()
-
-            self._app = pywinauto.Application().connect(
-                path=self._run_exe_path(exe_path), timeout=10
-            )
-        self._close_prompt_windows()
+        self._is_xiadan = "xiadan.exe" in exe_path
+        super().login(user, password, exe_path, comm_password, **kwargs)
+
+    def _fill_login_form(self, user, password, comm_password):
+        self._app.top_window().Edit1.type_keys(user)
+        self._app.top_window().Edit2.type_keys(password)
+
+    def _input_verify_code(self):
+        self._app.top_window().Edit3.type_keys(
+            self._handle_verify_code(self._is_xiadan)
+        )
+
+    def _submit_login(self):
+        if self._is_xiadan:
+            self._app.top_window().child_window(
+                control_id=1006, class_name="Button"
+            ).click()
+        else:
+            self._app.top_window()["登录"].click()
+
+    def _dismiss_login_error(self):
+        if self._is_xiadan:
+            super()._dismiss_login_error()
+
+    def _attach_main_window(self):
         self._main = self._app.window(title="网上股票交易系统5.0")
-        try:
-            self._main.child_window(
-                control_id=129, class_name="SysTreeView32"
-            ).wait("ready", 2)
-        # pylint: disable=broad-except
-        except Exception:
-            self.wait(2)
+
+    def _after_login(self):
+        self._close_prompt_windows()
+        tree = self._main.child_window(control_id=129, class_name="SysTreeView32")
+        if not self.wait_until(
+            lambda: self._is_control_ready(tree), "main_window", 2
+        ):
             self._switch_window_to_normal_mode()
 
     def _switch_window_to_normal_mode(self):
@@ -106,11 +90,10 @@ class YHClientTrader(clienttrader.BaseLoginClientTrader):
         verify_code = recognize_verify_code(file_path, "yh_client")
         return "".join(re.findall(r"\d+", verify_code))
 
-    @property
-    def balance(self):
-        self._switch_left_menus(self._config.BALANCE_MENU_PATH)
+    def _get_balance(self):
         return self._get_grid_data(self._config.BALANCE_GRID_CONTROL_ID)
 
+    @clienttrader.clear_query_cache_after
     def auto_ipo(self):
         self._switch_left_menus(self._config.AUTO_IPO_MENU_PATH)
         stock_list = self._get_grid_data(self._config.COMMON_GRID_CONTROL_ID)
@@ -121,9 +104,9 @@ class YHClientTrader(clienttrader.BaseLoginClientTrader):
         ]
         if len(stock_list) == len(invalid_list_idx):
             return {"message": "没有发现可以申购的新股"}
-        self.wait(0.1)
+        self.wait(0.1, "ipo_submit")
         # for row in invalid_list_idx:
         # self._click_grid_by_row(row)
         self._click(self._config.AUTO_IPO_BUTTON_CONTROL_ID)
-        self.wait(0.1)
+        self.wait(0.1, "ipo_submit")
         return self._handle_pop_dialogs()
@@ -0,0 +1,122 @@
+# coding: utf-8
+import asyncio
+import os
+import threading
+import time
+import unittest
+
+import easytrader
+from easytrader import simclient, webtrader
+from easytrader.asynctrader import AsyncTrader
+
+
+class FakeWebTrader(webtrader.WebTrader):
+    config_path = os.path.join(
+        os.path.dirname(easytrader.__file__), "config", "xq.json"
+    )
+
+    def __init__(self):
+        super().__init__(debug=False)
+        self.calls = []
+
+    def login(self):
+        pass
+
+    def get_position(self):
+        time.sleep(0.2)
+        return [{"stock_code": "162411"}]
+
+    def get_current_deal(self):
+        time.sleep(0.2)
+        return []
+
+    def buy(self, security, price=0, amount=0, volume=0, entrust_prop=0):
+        time.sleep(0.2)
+        self.calls.append(("buy", security))
+        return {"entrust_no": security}
+
+
+class TestAsyncClientTrader(unittest.TestCase):
+    def setUp(self):
+        self.user = easytrader.use("ths")
+        self.app = simclient.attach(self.user)
+        self.app.account.add_position("162411", 1000, 0.5)
+        self.trader = AsyncTrader(self.user)
+        self.loop = asyncio.new_event_loop()
+
+    def tearDown(self):
+        self.trader.close()
+        self.loop.close()
+
+    def test_gather(self):
+        async def run():
+            return await asyncio.gather(
+                self.trader.buy("162411", 0.55, 100),
+                self.trader.sell("162411", 0.56, 100),
+                self.trader.position(),
+                self.trader.today_trades(),
+            )
+
+        buy, sell, position, trades = self.loop.run_until_complete(run())
+        self.assertEqual({buy["entrust_no"], sell["entrust_no"]}, {"10001", "10002"})
+        self.assertEqual(position[0]["证券代码"], "162411")
+        self.assertEqual(trades, [])
+
+    def test_cancelled_command_not_run(self):
+        gate = threading.Event()
+
+        async def run():
+            blocker = asyncio.ensure_future(self.trader.call(lambda t: gate.wait()))
+            await asyncio.sleep(0.05)
+            with self.assertRaises(asyncio.TimeoutError):
+                await self.trader.buy("162411", 0.55, 100, timeout=0.05)
+            gate.set()
+            await blocker
+            return await self.trader.call("today_entrusts")
+
+        self.assertEqual(self.loop.run_until_complete(run()), [])
+
+    def test_async_with(self):
+        async def run():
+            async with AsyncTrader(self.user) as trader:
+                return await trader.position()
+
+        position = self.loop.run_until_complete(run())
+        self.assertEqual(position[0]["证券代码"], "162411")
+
+
+class TestAsyncWebTrader(unittest.TestCase):
+    def setUp(self):
+        self.user = FakeWebTrader()
+        self.trader = AsyncTrader(self.user)
+        self.loop = asyncio.new_event_loop()
+
+    def tearDown(self):
+        self.trader.close()
+        self.loop.close()
+
+    def test_concurrent_calls(self):
+        async def run():
+            return await asyncio.gather(
+                self.trader.position(),
+                self.trader.today_trades(),
+                self.trader.buy("162411", 0.55, 100),
+            )
+
+        start = time.perf_counter()
+        position, trades, buy = self.loop.run_until_complete(run())
+        self.assertLess(time.perf_counter() - start, 0.5)
+        self.assertEqual(position, [{"stock_code": "162411"}])
+        self.assertEqual(trades, [])
+        self.assertEqual(buy, {"entrust_no": "162411"})
+
+    def test_timeout(self):
+        async def run():
+            await self.trader.position(timeout=0.01)
+
+        with self.assertRaises(asyncio.TimeoutError):
+            self.loop.run_until_complete(run())
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,92 @@
+# coding: utf-8
+import unittest
+from unittest import mock
+
+import easytrader
+from easytrader import simclient
+from easytrader.utils.perf import add_perf_listener, remove_perf_listener
+
+
+class TestAutoIpo(unittest.TestCase):
+    def setUp(self):
+        self.user = easytrader.use("ths")
+        self.app = simclient.attach(self.user)
+        self.account = self.app.account
+
+    def test_auto_ipo(self):
+        self.assertEqual(self.user.auto_ipo(), {"message": "今日无新股"})
+        self.account.add_ipo("787001", 10.0, 500)
+        self.account.add_ipo("787002", 10.0, 0)
+
+        # 批量申购只有一个提示，不伪造每只新股的结果
+        self.assertEqual(self.user.auto_ipo(), {"message": "新股申购委托已提交1只"})
+        self.assertEqual([e["证券代码"] for e in self.account.entrusts], ["787001"])
+
+    def test_auto_ipo_nothing_to_subscribe(self):
+        self.account.add_ipo("787002", 10.0, 0)
+        self.assertEqual(self.user.auto_ipo(), {"message": "没有发现可以申购的新股"})
+        self.assertEqual(
+            self.user.auto_ipo_one(),
+            {
+                "message": "没有发现可以申购的新股",
+                "results": {"787002": {"message": "可申购数量为0"}},
+            },
+        )
+
+    def test_auto_ipo_one(self):
+        self.account.add_ipo("787001", 10.0, 500)
+        self.account.add_ipo("787002", 10.0, 0)
+        self.account.add_ipo("787003", 10.0, 1000)
+        handled = []
+
+        def listener(name, elapsed, cpu):
+            if name.endswith("_handle_pop_dialogs"):
+                handled.append(name)
+
+        add_perf_listener(listener)
+        try:
+            result = self.user.auto_ipo_one()
+        finally:
+            remove_perf_listener(listener)
+        self.assertEqual(
+            result["results"],
+            {
+                "787001": {"message": "新股申购委托已提交1只"},
+                "787002": {"message": "可申购数量为0"},
+                "787003": {"message": "新股申购委托已提交1只"},
+            },
+        )
+        self.assertEqual(
+            [e["证券代码"] for e in self.account.entrusts], ["787001", "787003"]
+        )
+        # 不可申购的新股不处理弹窗
+        self.assertEqual(len(handled), 2)
+
+    def test_auto_ipo_one_results_per_code(self):
+        self.account.add_ipo("787001", 10.0, 500)
+        self.account.add_ipo("787003", 0, 1000)
+
+        result = self.user.auto_ipo_one()
+        # 每只新股的结果来自各自申购后的弹窗
+        self.assertEqual(
+            result["results"],
+            {
+                "787001": {"message": "新股申购委托已提交1只"},
+                "787003": {"message": "委托价格必须大于0"},
+            },
+        )
+        self.assertEqual([e["证券代码"] for e in self.account.entrusts], ["787001"])
+
+    def test_auto_ipo_one_security_field_from_config(self):
+        self.account.add_ipo("787001", 10.0, 500)
+
+        # 部分券商的新股列表中证券代码列名不同
+        with mock.patch.object(
+            self.user._config, "AUTO_IPO_SECURITY_FIELD", "股票代码"
+        ):
+            result = self.user.auto_ipo_one()
+        self.assertEqual(list(result["results"]), ["787001"])
+
+
+if __name__ == "__main__":
+    unittest.main()
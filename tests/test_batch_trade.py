@@ -0,0 +1,125 @@
+# coding: utf-8
+import unittest
+from unittest import mock
+
+import easytrader
+from easytrader import simclient
+
+
+class TestBatchTrade(unittest.TestCase):
+    def setUp(self):
+        self.user = easytrader.use("ths")
+        self.app = simclient.attach(self.user)
+        self.account = self.app.account
+        self.account.add_position("162411", 1000, 0.5)
+
+    def test_validate_before_gui(self):
+        stats = dict(self.app.stats)
+        results = self.user.batch_trade(
+            [
+                {"action": "short", "security": "162411", "price": 0.55, "amount": 1},
+                {"action": "buy", "security": "162411", "price": 0.55},
+                {"action": "buy", "security": "abc", "price": 0.55, "amount": 100},
+                {"action": "buy", "security": "162411", "price": "x", "amount": 100},
+                {"action": "sell", "security": "162411", "price": 0.55, "amount": 0},
+                None,
+            ]
+        )
+        self.assertTrue(all("error" in result for result in results))
+        self.assertIn("amount", results[1]["error"])
+        self.assertEqual(dict(self.app.stats), stats)
+
+    def test_mixed_results(self):
+        trade = self.user.trade
+
+        def flaky_trade(security, price, amount):
+            if security == "000001":
+                raise RuntimeError("control is not visible")
+            return trade(security, price, amount)
+
+        with mock.patch.object(self.user, "trade", side_effect=flaky_trade):
+            results = self.user.batch_trade(
+                [
+                    {
+                        "action": "buy",
+                        "security": "162411",
+                        "price": 0.55,
+                        "amount": 100,
+                    },
+                    {"action": "buy", "security": "000001", "price": 10, "amount": 100},
+                    {
+                        "action": "buy",
+                        "security": "162411",
+                        "price": 1e5,
+                        "amount": 100,
+                    },
+                    {
+                        "action": "sell",
+                        "security": "162411",
+                        "price": 0.56,
+                        "amount": 100,
+                    },
+                    {"action": "sell", "security": "162411", "price": 0.56},
+                    {
+                        "action": "buy",
+                        "security": "162411",
+                        "price": 0.54,
+                        "amount": 100,
+                    },
+                ]
+            )
+
+        # 先卖后买，出错的委托不影响之后的委托
+        self.assertEqual(results[3], {"entrust_no": "10001"})
+        self.assertEqual(results[0], {"entrust_no": "10002"})
+        self.assertEqual(results[5], {"entrust_no": "10003"})
+        self.assertEqual(results[1], {"error": "control is not visible"})
+        self.assertIn("error", results[2])
+        self.assertIn("error", results[4])
+        self.assertEqual(
+            [(e["操作"], e["委托价格"]) for e in self.account.entrusts],
+            [("证券卖出", 0.56), ("证券买入", 0.55), ("证券买入", 0.54)],
+        )
+
+    def test_close_pop_dialog_failure(self):
+        trade = self.user.trade
+        close_pop_dialog = self.user.close_pop_dialog
+        failed = []
+
+        def flaky_trade(security, price, amount):
+            if security == "000001":
+                failed.append(security)
+                raise RuntimeError("control is not visible")
+            return trade(security, price, amount)
+
+        def flaky_close_pop_dialog():
+            # 委托出错后关闭弹窗同样失败
+            if failed:
+                failed.pop()
+                raise RuntimeError("window is not responding")
+            close_pop_dialog()
+
+        with mock.patch.object(
+            self.user, "trade", side_effect=flaky_trade
+        ), mock.patch.object(
+            self.user, "close_pop_dialog", side_effect=flaky_close_pop_dialog
+        ):
+            results = self.user.batch_trade(
+                [
+                    {"action": "buy", "security": "000001", "price": 10, "amount": 100},
+                    {
+                        "action": "buy",
+                        "security": "162411",
+                        "price": 0.55,
+                        "amount": 100,
+                    },
+                ]
+            )
+
+        # 关闭弹窗出错不中断批量委托
+        self.assertEqual(results[0], {"error": "control is not visible"})
+        self.assertEqual(results[1], {"entrust_no": "10001"})
+
+
+if __name__ == "__main__":
+    unittest.main()
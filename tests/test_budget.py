@@ -0,0 +1,82 @@
+# coding: utf-8
+import json
+import os
+import tempfile
+import threading
+import time
+import unittest
+
+import easytrader
+from easytrader import simclient
+from easytrader.utils import budget
+
+
+class TestBudget(unittest.TestCase):
+    def setUp(self):
+        self.user = easytrader.use("ths")
+        self.app = simclient.attach(self.user, latency={"find": 0.001})
+        self.app.account.add_position("162411", 1000, 0.5)
+        self.budget = budget.enable()
+
+    def tearDown(self):
+        budget.disable()
+
+    def test_charge_outside_operation(self):
+        with budget.charge("sleep"):
+            pass
+        self.assertEqual(self.budget.report(), {})
+
+    def test_operations_per_thread(self):
+        handle = self.budget.begin("main")
+        # 其他线程不在 main 操作中，开始的是独立的操作
+        thread = threading.Thread(
+            target=lambda: self.budget.end(self.budget.begin("worker"))
+        )
+        thread.start()
+        thread.join()
+        with budget.charge("sleep"):
+            time.sleep(0.001)
+        self.budget.end(handle)
+
+        report = self.budget.report()
+        self.assertEqual(set(report), {"main", "worker"})
+        self.assertGreater(report["main"]["sleep"], 0)
+        self.assertEqual(report["worker"]["sleep"], 0)
+        # 操作结束后不再计入
+        self.assertIsNone(budget._current_operation())
+
+    def test_report(self):
+        self.user.buy("162411", price=0.55, amount=100)
+        self.user.buy("162411", price=0.55, amount=100)
+        self.user.position
+
+        report = self.budget.report()
+        # 只统计最外层操作
+        self.assertEqual(set(report), {"ClientTrader.buy", "ClientTrader.position"})
+        buy = report["ClientTrader.buy"]
+        self.assertEqual(buy["calls"], 2)
+        self.assertGreater(buy["sleep"], 0)
+        self.assertGreater(buy["window_search"], 0)
+        self.assertAlmostEqual(
+            sum(buy[c] for c in budget.CATEGORIES) + buy["other"], buy["total"]
+        )
+        self.assertAlmostEqual(sum(buy["share"].values()), 1)
+
+        position = report["ClientTrader.position"]
+        self.assertGreater(position["parse"], 0)
+        self.assertGreater(position["grid_io"], 0)
+
+        with tempfile.TemporaryDirectory() as path:
+            file_path = os.path.join(path, "budget.json")
+            table = self.budget.dump(file_path)
+            with open(file_path, encoding="utf-8") as f:
+                self.assertEqual(json.load(f)["ClientTrader.buy"]["calls"], 2)
+        self.assertIn("ClientTrader.buy", table)
+        self.assertTrue(table.startswith("operation"))
+
+        self.budget.reset()
+        self.assertEqual(self.budget.report(), {})
+
+
+if __name__ == "__main__":
+    unittest.main()
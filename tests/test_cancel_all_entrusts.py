@@ -0,0 +1,108 @@
+# coding: utf-8
+import unittest
+from unittest import mock
+
+import easytrader
+from easytrader import exceptions, simclient
+from easytrader.utils.win_gui import ElementNotFoundError
+
+
+class TestCancelAllEntrusts(unittest.TestCase):
+    def setUp(self):
+        self.user = easytrader.use("ths")
+        self.app = simclient.attach(self.user)
+        self.account = self.app.account
+        self.account.add_position("162411", 1000, 0.5)
+
+    def attach_with_side_buttons(self):
+        # 撤买、撤卖按钮默认未配置，模拟已确认按钮 id 的客户端
+        patcher = mock.patch.multiple(
+            self.user._config,
+            TRADE_CANCEL_BUY_ENTRUST_CONTROL_ID=30002,
+            TRADE_CANCEL_SELL_ENTRUST_CONTROL_ID=30003,
+        )
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.app = simclient.attach(self.user)
+        self.account = self.app.account
+        self.account.add_position("162411", 1000, 0.5)
+
+    def cancel_button(self, control_id):
+        for control in self.app.main.children:
+            if control.class_name == "Button" and control.control_id == control_id:
+                return control
+        raise LookupError(control_id)
+
+    def test_cancel_all_entrusts_by_side(self):
+        self.attach_with_side_buttons()
+        self.user.buy("162411", price=0.55, amount=100)
+        self.user.sell("162411", price=0.56, amount=100)
+        copies = self.app.stats["grid_copy"] + self.app.stats["grid_save"]
+
+        # 使用撤买按钮，不需要读取撤单列表
+        self.assertIsNone(self.user.cancel_all_entrusts(side="buy"))
+        self.assertEqual(
+            self.app.stats["grid_copy"] + self.app.stats["grid_save"], copies
+        )
+        self.assertEqual(
+            [e["合同编号"] for e in self.account.open_entrusts()], ["10002"]
+        )
+
+    def test_cancel_all_entrusts_by_filter(self):
+        self.user.buy("162411", price=0.55, amount=100)
+        self.user.buy("000001", price=10, amount=100)
+        self.user.sell("162411", price=0.56, amount=100)
+
+        result = self.user.cancel_all_entrusts(side="buy", securities=["sz162411"])
+        self.assertEqual(list(result), ["10001"])
+
+        self.user.buy("162411", price=0.55, amount=100)
+        for entrust in self.account.entrusts:
+            entrust["委托时间"] = "23:59:59"
+        self.account.entrusts[1]["委托时间"] = "00:00:00"
+        result = self.user.cancel_all_entrusts(older_than=1)
+        self.assertEqual(list(result), ["10002"])
+        self.assertEqual(
+            [e["合同编号"] for e in self.account.open_entrusts()], ["10003", "10004"]
+        )
+
+    def test_reject_unexpected_button_title(self):
+        self.attach_with_side_buttons()
+        self.user.buy("162411", price=0.55, amount=100)
+        self.user.sell("162411", price=0.56, amount=100)
+        # 其他券商的客户端中同一 id 可能是其他按钮
+        button = self.cancel_button(
+            self.user._config.TRADE_CANCEL_BUY_ENTRUST_CONTROL_ID
+        )
+        button.title = "刷新"
+        clicks = self.app.stats["click"]
+
+        with self.assertRaises(exceptions.TradeError):
+            self.user.cancel_all_entrusts(side="buy")
+        self.assertEqual(self.app.stats["click"], clicks)
+        self.assertEqual(len(self.account.open_entrusts()), 2)
+
+    def test_missing_button_does_not_cancel_everything(self):
+        self.user.buy("162411", price=0.55, amount=100)
+        self.user.sell("162411", price=0.56, amount=100)
+        button = self.cancel_button(
+            self.user._config.TRADE_CANCEL_ALL_ENTRUST_CONTROL_ID
+        )
+        self.app.main.children.remove(button)
+
+        with self.assertRaises(ElementNotFoundError):
+            self.user.cancel_all_entrusts()
+        self.assertEqual(len(self.account.open_entrusts()), 2)
+
+    def test_side_without_button_in_config(self):
+        self.user.buy("162411", price=0.55, amount=100)
+        self.user.sell("162411", price=0.56, amount=100)
+        result = self.user.cancel_all_entrusts(side="sell")
+        self.assertEqual(list(result), ["10002"])
+        self.assertEqual(
+            [e["合同编号"] for e in self.account.open_entrusts()], ["10001"]
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
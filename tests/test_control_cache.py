@@ -0,0 +1,70 @@
+# coding: utf-8
+import unittest
+
+import easytrader
+from easytrader import simclient
+
+
+class TestControlCache(unittest.TestCase):
+    def setUp(self):
+        self.user = easytrader.use("ths")
+        self.app = simclient.attach(self.user)
+        self.price_id = self.user._config.TRADE_PRICE_CONTROL_ID
+
+    def get_price_edit(self):
+        return self.user._get_control(self.price_id, "Edit")
+
+    def test_cache_hit(self):
+        self.user._switch_left_menus(["买入[F1]"])
+        finds = self.app.stats["find"]
+        edit = self.get_price_edit()
+        self.assertEqual(self.app.stats["find"], finds + 1)
+
+        self.assertIs(self.get_price_edit(), edit)
+        self.assertEqual(self.app.stats["find"], finds + 1)
+
+    def test_refetch_after_control_hidden(self):
+        self.user._switch_left_menus(["买入[F1]"])
+        buy_edit = self.get_price_edit()
+
+        # 切换页面后缓存的控件不再可见，需要重新查找
+        self.user._switch_left_menus(["卖出[F2]"])
+        self.assertFalse(buy_edit.is_visible())
+        finds = self.app.stats["find"]
+        sell_edit = self.get_price_edit()
+        self.assertIsNot(sell_edit, buy_edit)
+        self.assertTrue(sell_edit.is_visible())
+        self.assertEqual(self.app.stats["find"], finds + 1)
+
+        # 新的结果同样被缓存
+        self.assertIs(self.get_price_edit(), sell_edit)
+        self.assertEqual(self.app.stats["find"], finds + 1)
+
+        self.user._switch_left_menus(["买入[F1]"])
+        self.assertIs(self.get_price_edit(), buy_edit)
+
+    def test_clear_on_main_window_change(self):
+        self.user._switch_left_menus(["买入[F1]"])
+        old_edit = self.get_price_edit()
+
+        # 重新连接客户端后主窗口变化，旧窗口的控件即使仍然可见也不再使用
+        app = simclient.attach(self.user)
+        self.user._switch_left_menus(["买入[F1]"])
+        self.assertTrue(old_edit.is_visible())
+        edit = self.get_price_edit()
+        self.assertIsNot(edit, old_edit)
+        self.assertIs(edit.app, app)
+
+    def test_click_in_top_window(self):
+        clicked = []
+        button_id = self.user._config.AUTO_IPO_BUTTON_CONTROL_ID
+        dialog = self.app._pop("提示")
+        dialog.add(simclient._SimButton(button_id, "确认", lambda: clicked.append(1)))
+
+        # 弹窗上的按钮不在主窗口的控件缓存中查找
+        self.user._click(button_id)
+        self.assertEqual(clicked, [1])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,76 @@
+# coding: utf-8
+import time
+import unittest
+
+from easytrader import dialog_watcher
+
+
+class TestPollingDialogWatcher(unittest.TestCase):
+    def setUp(self):
+        self.backend = dialog_watcher.FakeWindowBackend()
+
+    def test_return_as_soon_as_dialog_appear(self):
+        watcher = dialog_watcher.Polling(timeout=1)
+        handle = self.backend.pop(delay=0.05)
+
+        start = time.monotonic()
+        result = watcher.wait(self.backend)
+        cost = time.monotonic() - start
+
+        self.assertEqual(result, handle)
+        self.assertLess(cost, 0.3)
+
+    def test_return_none_after_timeout(self):
+        watcher = dialog_watcher.Polling(timeout=0.1)
+
+        start = time.monotonic()
+        result = watcher.wait(self.backend)
+        cost = time.monotonic() - start
+
+        self.assertIsNone(result)
+        self.assertGreaterEqual(cost, 0.1)
+        self.assertLess(cost, 0.3)
+
+    def test_timeout_argument_override_default(self):
+        watcher = dialog_watcher.Polling(timeout=10)
+
+        start = time.monotonic()
+        self.assertIsNone(watcher.wait(self.backend, timeout=0.05))
+        self.assertLess(time.monotonic() - start, 0.3)
+
+    def test_ignore_handled_dialog(self):
+        watcher = dialog_watcher.Polling(timeout=1)
+        handled = self.backend.pop()
+        new = self.backend.pop(delay=0.05)
+
+        self.assertEqual(watcher.wait(self.backend, ignore={handled}), new)
+        self.assertIsNone(watcher.wait(self.backend, timeout=0.05, ignore={new}))
+
+    def test_polling_interval_backoff(self):
+        watcher = dialog_watcher.Polling(
+            timeout=0.3, min_interval=0.01, max_interval=0.1, backoff=2
+        )
+        watcher.wait(self.backend)
+        # 0.01 + 0.02 + 0.04 + 0.08 + 0.1 + ... 间隔逐步放大，探测次数有限
+        self.assertLess(self.backend.probe_count, 10)
+
+    def test_faster_than_fixed_sleep(self):
+        sleep_watcher = dialog_watcher.Sleep(timeout=0.5)
+        polling_watcher = dialog_watcher.Polling(timeout=0.5)
+
+        self.backend.pop(delay=0.02)
+        start = time.monotonic()
+        self.assertIsNotNone(sleep_watcher.wait(self.backend))
+        sleep_cost = time.monotonic() - start
+
+        self.backend.close()
+        self.backend.pop(delay=0.02)
+        start = time.monotonic()
+        self.assertIsNotNone(polling_watcher.wait(self.backend))
+        polling_cost = time.monotonic() - start
+
+        self.assertLess(polling_cost * 3, sleep_cost)
+
+
+if __name__ == "__main__":
+    unittest.main()
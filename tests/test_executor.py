@@ -0,0 +1,146 @@
+# coding: utf-8
+import threading
+import time
+import unittest
+
+from easytrader import exceptions
+from easytrader.executor import GuiExecutor
+
+
+class FakeTrader:
+    def __init__(self):
+        self.calls = []
+        self.threads = set()
+        self.gate = threading.Event()
+        self.gate.set()
+
+    def _record(self, name):
+        self.gate.wait()
+        self.threads.add(threading.get_ident())
+        self.calls.append(name)
+
+    @property
+    def position(self):
+        self._record("position")
+        return [{"证券代码": "162411"}]
+
+    def buy(self, security, price, amount):
+        self._record(("buy", security))
+        return {"entrust_no": security}
+
+    def cancel_entrust(self, entrust_no):
+        self._record(("cancel", entrust_no))
+        return {"message": "撤单申报成功"}
+
+    def fail(self):
+        raise exceptions.TradeError("可用资金不足")
+
+
+class TestGuiExecutor(unittest.TestCase):
+    def setUp(self):
+        self.trader = FakeTrader()
+        self.executor = GuiExecutor(self.trader)
+
+    def tearDown(self):
+        self.trader.gate.set()
+        self.executor.shutdown()
+
+    def test_call_method_and_property(self):
+        self.assertEqual(
+            self.executor.call("buy", "162411", 0.55, 100), {"entrust_no": "162411"}
+        )
+        self.assertEqual(self.executor.call("position"), [{"证券代码": "162411"}])
+        with self.assertRaises(exceptions.TradeError):
+            self.executor.call("fail")
+
+    def test_priority_order(self):
+        self.trader.gate.clear()
+        # 执行线程阻塞在第一个命令上，后续命令全部排队
+        blocker = self.executor.submit("position")
+        time.sleep(0.05)
+
+        futures = [
+            self.executor.submit("position"),
+            self.executor.submit("buy", "1", 1, 100),
+            self.executor.submit("cancel_entrust", "a"),
+            self.executor.submit("buy", "2", 1, 100),
+            self.executor.submit("cancel_entrust", "b"),
+            self.executor.submit(
+                lambda trader: trader.calls.append("urgent"), priority=-1
+            ),
+        ]
+        self.trader.gate.set()
+        for future in [blocker] + futures:
+            future.result(timeout=5)
+
+        self.assertEqual(
+            self.trader.calls,
+            [
+                "position",
+                "urgent",
+                ("cancel", "a"),
+                ("cancel", "b"),
+                ("buy", "1"),
+                ("buy", "2"),
+                "position",
+            ],
+        )
+
+    def test_expired_command(self):
+        self.trader.gate.clear()
+        self.executor.submit("position")
+        time.sleep(0.05)
+        expired = self.executor.submit("buy", "162411", 0.55, 100, timeout=0.01)
+        time.sleep(0.05)
+        self.trader.gate.set()
+
+        with self.assertRaises(exceptions.CommandExpiredError):
+            expired.result(timeout=5)
+        self.assertNotIn(("buy", "162411"), self.trader.calls)
+
+    def test_cancelled_command_not_run(self):
+        self.trader.gate.clear()
+        self.executor.submit("position")
+        time.sleep(0.05)
+        future = self.executor.submit("buy", "162411", 0.55, 100)
+        self.assertTrue(future.cancel())
+        self.trader.gate.set()
+        self.executor.shutdown()
+        self.assertEqual(self.trader.calls, ["position"])
+
+    def test_many_producers_share_one_gui_thread(self):
+        proxy = self.executor.proxy()
+        results = []
+
+        def produce(i):
+            results.append(proxy.buy(str(i), 1, 100))
+            results.append(proxy.position)
+
+        threads = [threading.Thread(target=produce, args=(i,)) for i in range(10)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(len(results), 20)
+        self.assertEqual(self.trader.threads, {self.executor._thread.ident})
+
+    def test_factory(self):
+        executor = GuiExecutor(factory=FakeTrader)
+        try:
+            self.assertEqual(
+                executor.call(lambda trader: threading.get_ident()),
+                executor._thread.ident,
+            )
+            self.assertIsInstance(executor.trader, FakeTrader)
+        finally:
+            executor.shutdown()
+
+    def test_reject_after_shutdown(self):
+        self.executor.shutdown()
+        with self.assertRaises(RuntimeError):
+            self.executor.submit("position")
+
+
+if __name__ == "__main__":
+    unittest.main()
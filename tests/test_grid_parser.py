@@ -0,0 +1,53 @@
+# coding: utf-8
+import subprocess
+import sys
+import unittest
+
+from easytrader.config import client
+from easytrader.grid_strategies import parse_grid_text, read_grid_dataframe
+
+GRID_DTYPE = client.create("ths").GRID_DTYPE
+
+CASES = [
+    "证券代码\t证券名称\t股票余额\t成本价\t备注\n"
+    "000001\t平安银行\t100\t10.5\t\n"
+    "162411\t华宝油气\t2000\t0.55\t正常\n",
+    "合同编号\t委托数量\t委托价格\r\n10001\t100\t1\r\n10002\t200\t1.5\r\n\r\n",
+    "证券代码\t数量\n000001\t\n",
+    "a\ta\t\tb\t\n1\t2\t3\t4\t\n",
+    "a\tb\n1\t2\n3\n",
+    "a\tb\n 1 \t1e3\n+2\t-.5\n",
+    "a\tb\tc\nTrue\t1,000\tnan\nfalse\t2\tinf\n",
+    "a\tb\tc\n１\t1_0\t1.\n2\t3\t.5\n",
+    "证券代码\t证券名称\n",
+]
+
+
+class TestGridParser(unittest.TestCase):
+    def test_same_as_pandas(self):
+        for data in CASES:
+            with self.subTest(data=data):
+                expected = read_grid_dataframe(data, GRID_DTYPE).to_dict("records")
+                result = parse_grid_text(data, GRID_DTYPE)
+                self.assertEqual(result, expected)
+                self.assertEqual(
+                    [[type(v) for v in row.values()] for row in result],
+                    [[type(v) for v in row.values()] for row in expected],
+                )
+
+    def test_empty(self):
+        with self.assertRaises(ValueError):
+            parse_grid_text("\n")
+
+    def test_pandas_not_imported(self):
+        code = (
+            "import sys, easytrader, easytrader.clienttrader;"
+            "easytrader.use('ths');"
+            "print('pandas' in sys.modules)"
+        )
+        output = subprocess.check_output([sys.executable, "-c", code], text=True)
+        self.assertEqual(output.strip(), "False")
+
+
+if __name__ == "__main__":
+    unittest.main()
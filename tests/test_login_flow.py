@@ -0,0 +1,184 @@
+# coding: utf-8
+import time
+import unittest
+
+import easytrader
+from easytrader import clienttrader, exceptions
+
+
+class FakeApplication:
+    def __init__(self):
+        self.prompts = []
+
+    def top_window(self):
+        return "login_window"
+
+    def windows(self, class_name=None, visible_only=False):
+        return [w for w in self.prompts if w.created <= time.monotonic()]
+
+
+class FakeMainWindow:
+    def child_window(self, **kwargs):
+        return None
+
+
+class FakePrompt:
+    def __init__(self, app, handle, delay):
+        self.app = app
+        self.handle = handle
+        self.created = time.monotonic() + delay
+
+    def window_text(self):
+        return "提示"
+
+    def close(self):
+        self.app.prompts.remove(self)
+
+
+class FakeLoginTrader(clienttrader.BaseLoginClientTrader):
+    login_captcha = True
+    login_max_attempts = 3
+    login_form_timeout = 1
+    login_submit_timeout = 0.2
+    login_main_timeout = 1
+
+    def __init__(self, running=False, rejects=0, main_ready=True):
+        super().__init__()
+        self.running = running
+        self.rejects = rejects
+        self.main_ready = main_ready
+        self.form_polls = 0
+        self.actions = []
+
+    @property
+    def broker_type(self):
+        return "ths"
+
+    def _connect_client(self, exe_path, timeout):
+        if not self.running:
+            raise RuntimeError("client not running")
+        self.actions.append("connect")
+        return FakeApplication()
+
+    def _start_client(self, exe_path):
+        self.actions.append("start")
+        self.running = True
+        return FakeApplication()
+
+    def _is_login_form_ready(self):
+        self.form_polls += 1
+        return self.form_polls >= 3
+
+    def _fill_login_form(self, user, password, comm_password):
+        self.actions.append(("fill", user, password))
+
+    def _input_verify_code(self):
+        self.actions.append("captcha")
+
+    def _submit_login(self):
+        self.actions.append("submit")
+
+    def _is_login_window_closed(self, login_window):
+        return self.actions.count("submit") > self.rejects
+
+    def _dismiss_login_error(self):
+        self.actions.append("dismiss")
+
+    def _attach_main_window(self):
+        self._main = FakeMainWindow()
+
+    def _is_main_window_ready(self):
+        return self.main_ready
+
+    def _after_login(self):
+        self.actions.append("after_login")
+
+
+class TestLoginFlow(unittest.TestCase):
+    def test_login_with_retry(self):
+        trader = FakeLoginTrader(rejects=1)
+        trader.prepare(user="user", password="password", exe_path="xiadan.exe")
+
+        self.assertEqual(
+            trader.actions,
+            [
+                "start",
+                ("fill", "user", "password"),
+                "captcha",
+                "submit",
+                "dismiss",
+                "captcha",
+                "submit",
+                "connect",
+                "after_login",
+            ],
+        )
+        self.assertEqual(
+            list(trader.login_timings),
+            ["starting", "form_ready", "captcha", "submitted", "main_ready"],
+        )
+        self.assertEqual(trader._login_flow.attempts, 2)
+
+    def test_connect_running_client(self):
+        trader = FakeLoginTrader(running=True)
+        trader.prepare(user="user", password="password", exe_path="xiadan.exe")
+
+        self.assertEqual(trader.actions, ["connect", "after_login"])
+        self.assertEqual(list(trader.login_timings), ["starting", "main_ready"])
+
+    def test_bounded_retries(self):
+        trader = FakeLoginTrader(rejects=10)
+        with self.assertRaises(exceptions.LoginError):
+            trader.prepare(user="user", password="password", exe_path="xiadan.exe")
+        self.assertEqual(trader.actions.count("submit"), 3)
+
+    def test_main_window_not_ready(self):
+        trader = FakeLoginTrader(running=True, main_ready=False)
+        trader.login_main_timeout = 0.1
+        with self.assertRaises(exceptions.LoginError):
+            trader.prepare(user="user", password="password", exe_path="xiadan.exe")
+
+    def test_login_steps_are_abstract(self):
+        class IncompleteTrader(clienttrader.BaseLoginClientTrader):
+            broker_type = "ths"
+
+            def _fill_login_form(self, user, password, comm_password):
+                pass
+
+        with self.assertRaises(TypeError):
+            IncompleteTrader()
+
+    def test_all_login_clients_implement_login_steps(self):
+        for broker in [
+            "ht_client",
+            "wk_client",
+            "htzq_client",
+            "gj_client",
+            "gf_client",
+            "yh_client",
+            "universal_client",
+        ]:
+            with self.subTest(broker=broker):
+                self.assertIsInstance(
+                    easytrader.use(broker), clienttrader.BaseLoginClientTrader
+                )
+
+
+class TestClosePromptWindows(unittest.TestCase):
+    def test_close_prompt_windows(self):
+        trader = FakeLoginTrader()
+        trader._app = FakeApplication()
+        trader._app.prompts = [
+            FakePrompt(trader._app, 1, 0),
+            FakePrompt(trader._app, 2, 0.1),
+        ]
+
+        start = time.monotonic()
+        trader._close_prompt_windows(timeout=0.3)
+        self.assertEqual(trader._app.prompts, [])
+        # 最后一个窗口关闭后只等待 timeout 秒
+        self.assertLess(time.monotonic() - start, 0.8)
+
+
+if __name__ == "__main__":
+    unittest.main()
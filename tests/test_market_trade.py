@@ -0,0 +1,41 @@
+# coding: utf-8
+import unittest
+from unittest import mock
+
+import easytrader
+from easytrader import simclient
+
+
+class TestMarketTrade(unittest.TestCase):
+    def setUp(self):
+        self.user = easytrader.use("ths")
+        self.app = simclient.attach(self.user)
+        self.account = self.app.account
+        self.account.add_position("162411", 1000, 0.5)
+
+    def test_market_trade_type_index_cache(self):
+        config = self.user.config
+        self.user.market_buy("000001", 100, ttype="即时成交剩余撤销")
+        self.user.market_buy("600000", 100, ttype="最优五档成交剩余转限价")
+        selects = self.user._get_control(
+            config.TRADE_MARKET_TYPE_CONTROL_ID, "ComboBox"
+        )
+        self.assertEqual(selects.selected_text(), "最优五档成交剩余转限价")
+
+        # 之后按缓存的序号直接选择，不再读取全部选项
+        with mock.patch.object(
+            simclient._SimComboBox, "texts", side_effect=AssertionError
+        ):
+            self.user.market_buy("000002", 100, ttype="即时成交剩余撤销")
+            self.assertEqual(selects.selected_text(), "即时成交剩余撤销")
+
+        # 选项变化后重新查找
+        key = (config.TRADE_MARKET_TYPE_CONTROL_ID, ("sz", "即时成交剩余撤销"))
+        self.user._combo_index_cache[key] = 0
+        self.user.market_buy("000002", 100, ttype="即时成交剩余撤销")
+        self.assertEqual(selects.selected_text(), "即时成交剩余撤销")
+        self.assertEqual(self.user._combo_index_cache[key], 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,60 @@
+# coding: utf-8
+import unittest
+
+import easytrader
+from easytrader import simclient
+
+
+class TestMenuSwitch(unittest.TestCase):
+    def setUp(self):
+        self.user = easytrader.use("ths")
+        self.app = simclient.attach(self.user)
+        self.app.account.add_position("162411", 1000, 0.5)
+
+    def select_by_hand(self, path):
+        """模拟用户在客户端中手动点击左侧菜单"""
+        self.app.main.child_window(control_id=129, class_name="SysTreeView32").get_item(
+            path
+        ).select()
+
+    def test_is_current_menu(self):
+        self.assertFalse(self.user._is_current_menu(["买入[F1]"]))
+        self.user._switch_left_menus(["买入[F1]"])
+        self.assertTrue(self.user._is_current_menu(["买入[F1]"]))
+        self.assertFalse(self.user._is_current_menu(["卖出[F2]"]))
+
+        # 通过快捷键切换页面后不再认为位于原页面
+        self.user._switch_left_menus_by_shortcut("{F4}")
+        self.assertFalse(self.user._is_current_menu(["买入[F1]"]))
+
+    def test_skip_menu_switch_on_active_page(self):
+        self.user.buy("162411", price=0.55, amount=100)
+        switches = self.app.stats["menu_switch"]
+        self.user.buy("162411", price=0.55, amount=100)
+        self.assertEqual(self.app.stats["menu_switch"], switches)
+
+    def test_switch_after_manual_page_change(self):
+        self.user.buy("162411", price=0.55, amount=100)
+        self.select_by_hand(["卖出[F2]"])
+        # 记录的当前页面已经过期，需要根据菜单的选中状态判断
+        self.assertEqual(self.user._current_menu[0], ("买入[F1]",))
+        self.assertFalse(self.user._is_current_menu(["买入[F1]"]))
+
+        switches = self.app.stats["menu_switch"]
+        self.assertEqual(
+            self.user.buy("162411", price=0.55, amount=100), {"entrust_no": "10002"}
+        )
+        self.assertEqual(self.app.stats["menu_switch"], switches + 1)
+        self.assertEqual(self.app.main.current_page, ("买入[F1]",))
+        self.assertEqual(
+            [e["操作"] for e in self.app.account.entrusts], ["证券买入", "证券买入"]
+        )
+
+    def test_switch_after_main_window_change(self):
+        self.user._switch_left_menus(["买入[F1]"])
+        simclient.attach(self.user)
+        self.assertFalse(self.user._is_current_menu(["买入[F1]"]))
+
+
+if __name__ == "__main__":
+    unittest.main()
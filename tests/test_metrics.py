@@ -0,0 +1,73 @@
+# coding: utf-8
+import json
+import unittest
+
+from easytrader.utils import perf
+from easytrader.utils.metrics import MetricsRegistry
+
+
+class Worker:
+    @perf.perf_clock
+    def run(self, fail=False):
+        if fail:
+            raise ValueError("fail")
+        return 1
+
+
+class TestMetrics(unittest.TestCase):
+    def tearDown(self):
+        perf.disable_metrics()
+
+    def test_disabled(self):
+        self.assertIsNone(perf.get_metrics())
+        self.assertEqual(Worker().run(), 1)
+
+    def test_perf_clock_records(self):
+        metrics = perf.enable_metrics()
+        worker = Worker()
+        for _ in range(3):
+            worker.run()
+        with self.assertRaises(ValueError):
+            worker.run(fail=True)
+
+        stats = metrics.snapshot()["Worker.run"]
+        self.assertEqual((stats["calls"], stats["errors"], stats["sampled"]), (4, 1, 4))
+        self.assertEqual(stats["histogram"][-1][1], 4)
+        self.assertEqual(stats["p50"], 0.001)
+
+    def test_sampling(self):
+        metrics = perf.enable_metrics(sample_rate=5)
+        worker = Worker()
+        for _ in range(10):
+            worker.run()
+        with self.assertRaises(ValueError):
+            worker.run(fail=True)
+
+        stats = metrics.snapshot()["Worker.run"]
+        # 调用次数与出错次数不受采样影响
+        self.assertEqual((stats["calls"], stats["errors"]), (11, 1))
+        self.assertEqual(stats["sampled"], 3)
+
+    def test_export(self):
+        metrics = MetricsRegistry()
+        metrics.record("f", 0.3, 0.1)
+        metrics.record("f", 20, 0.1, error=True)
+
+        data = json.loads(metrics.export())
+        self.assertEqual(data["f"]["histogram"][-1], ["+Inf", 2])
+        self.assertEqual(data["f"]["p50"], 0.5)
+        self.assertEqual(data["f"]["p99"], "+Inf")
+
+        text = metrics.export("prometheus")
+        self.assertIn('easytrader_errors_total{function="f"} 1', text)
+        self.assertIn(
+            'easytrader_duration_seconds_bucket{function="f",le="0.5"} 1', text
+        )
+        self.assertIn('easytrader_duration_seconds_count{function="f"} 2', text)
+
+        metrics.reset()
+        self.assertEqual(metrics.snapshot(), {})
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,42 @@
+# coding: utf-8
+import unittest
+
+import easytrader
+from easytrader import exceptions, simclient
+
+
+class TestOrderTiming(unittest.TestCase):
+    def setUp(self):
+        self.user = easytrader.use("ths")
+        self.app = simclient.attach(self.user)
+        self.account = self.app.account
+        self.account.add_position("162411", 1000, 0.5)
+
+    def test_order_timing(self):
+        records = []
+        self.user.enable_order_timing(callback=records.append)
+
+        result = self.user.buy("162411", price=0.55, amount=100)
+        self.assertEqual(result["entrust_no"], "10001")
+        timing = result["timing"]
+        self.assertEqual(timing["method"], "buy")
+        self.assertEqual(
+            list(timing["phases"]),
+            ["menu_switch", "field_entry", "submit", "dialog_wait", "dialog_handle"],
+        )
+        self.assertGreater(timing["phases"]["field_entry"], 0)
+        self.assertAlmostEqual(
+            sum(timing["phases"].values()) + timing["other"], timing["total"]
+        )
+
+        with self.assertRaises(exceptions.TradeError):
+            self.user.sell("162411", price=0.55, amount=100000)
+        self.assertEqual([r["method"] for r in records], ["buy", "sell"])
+        self.assertIn("TradeError", records[-1]["error"])
+
+        self.user.disable_order_timing()
+        self.assertNotIn("timing", self.user.buy("162411", price=0.55, amount=100))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,77 @@
+# coding: utf-8
+import functools
+import time
+import unittest
+
+import easytrader
+from easytrader import exceptions, simclient
+from easytrader.pool import TraderPool
+
+
+def sim_trader(amount, latency=None):
+    user = easytrader.use("ths")
+    app = simclient.attach(user, latency=latency)
+    app.account.add_position("162411", amount, 0.5)
+    return user
+
+
+def broken_trader():
+    raise exceptions.TradeError("登录失败")
+
+
+def entrust_count(trader):
+    return len(trader.today_entrusts)
+
+
+class TestTraderPool(unittest.TestCase):
+    def setUp(self):
+        self.pool = TraderPool(
+            {
+                "a": functools.partial(sim_trader, 1000),
+                "b": functools.partial(sim_trader, 2000),
+                "c": functools.partial(sim_trader, 3000),
+            }
+        )
+
+    def tearDown(self):
+        self.pool.close()
+
+    def test_route_by_account(self):
+        self.assertEqual(self.pool.accounts, ["a", "b", "c"])
+        self.assertIn("entrust_no", self.pool.call("a", "buy", "162411", 0.55, 100))
+        self.assertEqual(self.pool.call("b", "position")[0]["股票余额"], 2000)
+        self.assertEqual(self.pool.call("b", entrust_count), 0)
+        with self.assertRaises(exceptions.TradeError):
+            self.pool.call("c", "buy", "162411", 100000, 100)
+        with self.assertRaises(ValueError):
+            self.pool.submit("d", "position")
+
+    def test_broadcast(self):
+        positions = self.pool.broadcast("position")
+        self.assertEqual(list(positions), ["a", "b", "c"])
+        self.assertEqual(
+            [p[0]["股票余额"] for p in positions.values()], [1000, 2000, 3000]
+        )
+
+        results = self.pool.broadcast(
+            "sell", "162411", 0.56, 1500, accounts=["a", "b"], return_exceptions=True
+        )
+        self.assertIsInstance(results["a"], exceptions.TradeError)
+        self.assertIn("entrust_no", results["b"])
+
+
+class TestTraderPoolParallel(unittest.TestCase):
+    def test_broadcast_runs_accounts_in_parallel(self):
+        factory = functools.partial(sim_trader, 1000, latency={"grid_copy": 0.5})
+        with TraderPool({i: factory for i in range(4)}) as pool:
+            start = time.perf_counter()
+            pool.broadcast("position")
+            self.assertLess(time.perf_counter() - start, 1.5)
+
+    def test_start_failure(self):
+        with self.assertRaises(exceptions.TradeError):
+            TraderPool({"a": functools.partial(sim_trader, 1000), "b": broken_trader})
+
+
+if __name__ == "__main__":
+    unittest.main()
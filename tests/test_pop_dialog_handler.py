@@ -0,0 +1,108 @@
+# coding: utf-8
+import unittest
+
+from easytrader import exceptions, pop_dialog_handler
+from easytrader.pop_dialog_handler import PopDialogHandler, Rule, TradePopDialogHandler
+
+
+class FakeControl:
+    def __init__(self, window, text=""):
+        self.window = window
+        self.text = text
+
+    def window_text(self):
+        self.window.reads += 1
+        return self.text
+
+    def click(self):
+        self.window.actions.append("click")
+
+
+class FakeWindow:
+    def __init__(self, content):
+        self.Static = FakeControl(self, content)
+        self.reads = 0
+        self.actions = []
+
+    def __getitem__(self, name):
+        return FakeControl(self)
+
+    def has_style(self, style):
+        return False
+
+    def wrapper_object(self):
+        return self
+
+    def type_keys(self, keys, **kwargs):
+        self.actions.append(keys)
+
+    def close(self):
+        self.actions.append("close")
+
+
+class FakeApp:
+    def __init__(self, content=""):
+        self.window = FakeWindow(content)
+        self.lookups = 0
+
+    def top_window(self):
+        self.lookups += 1
+        return self.window
+
+
+class TestPopDialogHandler(unittest.TestCase):
+    def setUp(self):
+        pop_dialog_handler.reset_rule_stats()
+
+    def test_trade_success(self):
+        app = FakeApp("您的买入委托已成功提交，合同编号：10001。")
+        result = TradePopDialogHandler(app).handle("提示")
+
+        self.assertEqual(result, {"entrust_no": "10001"})
+        self.assertEqual(app.window.actions, ["click"])
+        # 查找窗口与读取内容各一次
+        self.assertEqual((app.lookups, app.window.reads), (1, 1))
+        stats = pop_dialog_handler.get_rule_stats()
+        self.assertEqual(stats["TradePopDialogHandler.entrust_success"]["hits"], 1)
+
+    def test_trade_error(self):
+        app = FakeApp("可用资金不足")
+        with self.assertRaises(exceptions.TradeError):
+            TradePopDialogHandler(app).handle("提示")
+        self.assertEqual(app.window.actions, ["click"])
+        self.assertIn(
+            "TradePopDialogHandler.trade_error", pop_dialog_handler.get_rule_stats()
+        )
+
+    def test_trade_price_warning(self):
+        app = FakeApp("委托价格超出涨跌停")
+        self.assertIsNone(TradePopDialogHandler(app).handle("提示信息"))
+        self.assertEqual(app.window.actions, ["%Y"])
+
+        app = FakeApp("其他提示")
+        self.assertIsNone(TradePopDialogHandler(app).handle("提示信息"))
+        self.assertEqual(app.window.actions, [])
+
+    def test_default_rules(self):
+        app = FakeApp("撤单申报成功")
+        handler = PopDialogHandler(app)
+        self.assertIsNone(handler.handle("撤单确认"))
+        self.assertEqual(handler.handle("提示"), {"message": "撤单申报成功"})
+        self.assertEqual(
+            handler.handle("其他"), {"message": "unknown message: 撤单申报成功"}
+        )
+        self.assertEqual(app.window.actions, ["%Y", "click", "close"])
+
+    def test_custom_rules(self):
+        class Handler(TradePopDialogHandler):
+            rules = TradePopDialogHandler.rules.prepend(
+                Rule("ignore_warning", "^提示$", content="风险", action="close")
+            )
+
+        app = FakeApp("风险警示")
+        self.assertIsNone(Handler(app).handle("提示"))
+        self.assertEqual(app.window.actions, ["close"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,83 @@
+# coding: utf-8
+import time
+import unittest
+from unittest import mock
+
+import easytrader
+from easytrader import exceptions, simclient
+
+
+class TestQueryCache(unittest.TestCase):
+    def setUp(self):
+        self.user = easytrader.use("ths")
+        self.app = simclient.attach(self.user)
+        self.app.account.add_position("162411", 1000, 0.5)
+
+    def grid_reads(self):
+        return self.app.stats["grid_copy"] + self.app.stats["grid_save"]
+
+    def test_disabled_by_default(self):
+        self.user.position
+        reads = self.grid_reads()
+        self.user.position
+        self.assertEqual(self.grid_reads(), reads + 1)
+
+    def test_hit_within_ttl(self):
+        self.user.enable_query_cache(ttl=60)
+        position = self.user.position
+        reads = self.grid_reads()
+        self.assertIs(self.user.position, position)
+        self.assertEqual(self.grid_reads(), reads)
+
+        # 各查询分别缓存
+        self.user.today_entrusts
+        self.assertEqual(self.grid_reads(), reads + 1)
+
+    def test_expire_after_ttl(self):
+        self.user.enable_query_cache(ttl=1)
+        now = time.monotonic()
+        with mock.patch("easytrader.clienttrader.time.monotonic", return_value=now):
+            self.user.position
+        reads = self.grid_reads()
+        with mock.patch(
+            "easytrader.clienttrader.time.monotonic", return_value=now + 0.5
+        ):
+            self.user.position
+        self.assertEqual(self.grid_reads(), reads)
+        with mock.patch(
+            "easytrader.clienttrader.time.monotonic", return_value=now + 1.5
+        ):
+            self.user.position
+        self.assertEqual(self.grid_reads(), reads + 1)
+
+    def test_invalidate_after_trade(self):
+        self.user.enable_query_cache(ttl=60)
+        self.assertEqual(self.user.position[0]["可用余额"], 1000)
+        self.user.sell("162411", price=0.56, amount=100)
+        self.assertEqual(self.user.position[0]["可用余额"], 900)
+        self.assertEqual(len(self.user.today_entrusts), 1)
+
+        # 委托失败时客户端状态同样可能已经改变，缓存也需要失效
+        self.user.position
+        with self.assertRaises(exceptions.TradeError):
+            self.user.buy("162411", price=100000, amount=100)
+        self.assertEqual(self.user._query_cache, {})
+
+    def test_invalidate_after_cancel(self):
+        self.user.enable_query_cache(ttl=60)
+        self.user.buy("162411", price=0.55, amount=100)
+        self.assertEqual(len(self.user.cancel_entrusts), 1)
+        self.user.cancel_entrust("10001")
+        self.assertEqual(self.user.cancel_entrusts, [])
+
+    def test_disable(self):
+        self.user.enable_query_cache(ttl=60)
+        self.user.position
+        self.user.enable_query_cache(ttl=None)
+        reads = self.grid_reads()
+        self.user.position
+        self.assertEqual(self.grid_reads(), reads + 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
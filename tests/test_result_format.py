@@ -0,0 +1,50 @@
+# coding: utf-8
+import unittest
+
+import easytrader
+from easytrader import simclient
+
+
+class TestResultFormat(unittest.TestCase):
+    broker = "ths"
+
+    def setUp(self):
+        self.user = easytrader.use(self.broker)
+        self.app = simclient.attach(self.user)
+        self.account = self.app.account
+        self.account.add_position("162411", 1000, 0.5)
+
+    def test_result_format(self):
+        self.user.buy("162411", price=0.55, amount=100)
+        self.user.sell("162411", price=0.56, amount=100)
+        with self.assertRaises(ValueError):
+            self.user.set_result_format("json")
+
+        self.user.set_result_format("dataframe")
+        position = self.user.position
+        self.assertEqual(position["证券代码"].tolist(), ["162411"])
+        self.assertEqual(position["可用余额"].tolist(), [900])
+        self.assertEqual(
+            self.user.today_entrusts["合同编号"].tolist(), ["10001", "10002"]
+        )
+        self.assertEqual(len(self.user.snapshot()["today_entrusts"]), 2)
+
+        self.user.set_result_format("numpy")
+        entrusts = self.user.cancel_entrusts
+        self.assertEqual(list(entrusts["合同编号"]), ["10001", "10002"])
+        # 内部逻辑仍使用 list of dict
+        self.assertEqual(self.user.cancel_entrust("10002"), {"message": "撤单申报成功"})
+        self.assertEqual(len(self.user.today_trades), 0)
+
+        self.user.set_result_format()
+        self.assertEqual(self.user.position[0]["证券代码"], "162411")
+
+
+class TestResultFormatXls(TestResultFormat):
+    """华泰客户端通过另存为 xls 文件读取表格"""
+
+    broker = "ht_client"
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,123 @@
+# coding: utf-8
+import json
+import os
+import tempfile
+import unittest
+from decimal import Decimal
+
+import easytrader
+from easytrader import exceptions, simclient
+from easytrader.utils.security_table import SecurityTable
+
+
+class TestSecurityTable(unittest.TestCase):
+    def setUp(self):
+        self.table = SecurityTable.from_records(
+            [
+                {"code": "162411", "name": "华宝油气", "prev_close": 0.5},
+                {"code": "688001", "name": "华兴源创", "prev_close": "33.33"},
+                {"code": "600001", "name": "*ST 邯钢", "prev_close": 3.33},
+                {
+                    "code": "000001",
+                    "name": "平安银行",
+                    "prev_close": 10,
+                    "up_limit": 10.5,
+                    "down_limit": 9.5,
+                },
+            ]
+        )
+
+    def test_limits_by_board(self):
+        fund = self.table.get("sz162411")
+        self.assertEqual((fund.board, fund.tick), ("基金", Decimal("0.001")))
+        self.assertEqual(
+            (fund.down_limit, fund.up_limit), (Decimal("0.45"), Decimal("0.55"))
+        )
+
+        star = self.table.get("688001")
+        self.assertEqual((star.board, star.tick), ("科创板", Decimal("0.01")))
+        self.assertEqual(
+            (star.down_limit, star.up_limit), (Decimal("26.66"), Decimal("40.00"))
+        )
+
+        st = self.table.get("600001")
+        self.assertEqual(
+            (st.down_limit, st.up_limit), (Decimal("3.16"), Decimal("3.50"))
+        )
+
+        bank = self.table.get("000001")
+        self.assertEqual(
+            (bank.down_limit, bank.up_limit), (Decimal("9.5"), Decimal("10.5"))
+        )
+
+    def test_round_price(self):
+        self.assertEqual(self.table.round_price("688001", 33.335), "33.34")
+        self.assertEqual(self.table.round_price("162411", 0.5555), "0.556")
+        # 表中没有的证券按代码前缀确定精度
+        self.assertEqual(self.table.round_price("300001", 12.345), "12.35")
+        self.assertEqual(self.table.round_price("300001", "12.3"), "12.3")
+
+    def test_check_price(self):
+        self.assertEqual(self.table.check_price("162411", 0.55), "0.550")
+        with self.assertRaises(exceptions.TradeError):
+            self.table.check_price("162411", 0.551)
+        with self.assertRaises(exceptions.TradeError):
+            self.table.check_price("000001", 9.49)
+        self.assertEqual(self.table.check_price("300001", 100), "100.00")
+
+    def test_load(self):
+        with tempfile.TemporaryDirectory() as path:
+            json_path = os.path.join(path, "securities.json")
+            with open(json_path, "w", encoding="utf-8") as f:
+                json.dump([{"code": "162411", "prev_close": 0.5}], f)
+            csv_path = os.path.join(path, "securities.csv")
+            with open(csv_path, "w", encoding="utf-8") as f:
+                f.write("code,name,prev_close,up_limit,down_limit\n")
+                f.write("162411,华宝油气,0.5,,\n")
+
+            for file_path in (json_path, csv_path):
+                table = SecurityTable.load(file_path)
+                self.assertEqual(len(table), 1)
+                self.assertEqual(table.get("162411").up_limit, Decimal("0.55"))
+
+
+class TestSecurityTableTrade(unittest.TestCase):
+    def setUp(self):
+        self.user = easytrader.use("ths")
+        self.app = simclient.attach(self.user)
+        self.account = self.app.account
+        self.account.add_position("162411", 1000, 0.5)
+
+    def test_security_table_rejects_before_gui(self):
+        self.user.set_security_table(
+            SecurityTable.from_records([{"code": "162411", "prev_close": 0.5}])
+        )
+        stats = dict(self.app.stats)
+        with self.assertRaises(exceptions.TradeError):
+            self.user.buy("162411", price=0.56, amount=100)
+        self.assertEqual(dict(self.app.stats), stats)
+
+        self.assertEqual(
+            self.user.batch_trade(
+                [
+                    {
+                        "action": "buy",
+                        "security": "162411",
+                        "price": 0.56,
+                        "amount": 100,
+                    },
+                    {
+                        "action": "buy",
+                        "security": "162411",
+                        "price": 0.5499,
+                        "amount": 100,
+                    },
+                ]
+            )[1],
+            {"entrust_no": "10001"},
+        )
+        self.assertEqual(self.account.entrusts[0]["委托价格"], 0.55)
+
+
+if __name__ == "__main__":
+    unittest.main()
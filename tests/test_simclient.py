@@ -0,0 +1,109 @@
+# coding: utf-8
+import unittest
+
+import easytrader
+from easytrader import exceptions, simclient
+
+
+class TestSimulatedClientTrader(unittest.TestCase):
+    broker = "ths"
+
+    def setUp(self):
+        self.user = easytrader.use(self.broker)
+        self.app = simclient.attach(self.user)
+        self.account = self.app.account
+        self.account.add_position("162411", 1000, 0.5)
+
+    def test_buy_and_sell(self):
+        result = self.user.buy("162411", price=0.55, amount=100)
+        self.assertEqual(result, {"entrust_no": "10001"})
+        result = self.user.sell("162411", price=0.56, amount=200)
+        self.assertEqual(result, {"entrust_no": "10002"})
+
+        entrusts = self.user.today_entrusts
+        self.assertEqual([e["合同编号"] for e in entrusts], ["10001", "10002"])
+        position = self.user.position
+        self.assertEqual(position[0]["证券代码"], "162411")
+        self.assertEqual(position[0]["可用余额"], 800)
+        self.assertAlmostEqual(self.user.balance["可用金额"], 1000000 - 55)
+
+    def test_trade_error(self):
+        with self.assertRaises(exceptions.TradeError):
+            self.user.buy("162411", price=100000, amount=100)
+        # 出错后弹窗已经关闭，可以继续交易
+        self.assertIn("entrust_no", self.user.buy("162411", price=0.55, amount=100))
+
+    def test_cancel_entrust(self):
+        self.user.buy("162411", price=0.55, amount=100)
+        self.user.sell("162411", price=0.56, amount=100)
+
+        self.assertEqual(self.user.cancel_entrust("10002"), {"message": "撤单申报成功"})
+        self.assertEqual([e["合同编号"] for e in self.user.cancel_entrusts], ["10001"])
+        self.assertIn("不能撤单", self.user.cancel_entrust("10002")["message"])
+
+        self.user.cancel_all_entrusts()
+        self.assertEqual(self.account.open_entrusts(), [])
+
+    def test_cancel_entrusts_by_ids(self):
+        for _ in range(4):
+            self.user.buy("162411", price=0.55, amount=100)
+        copies = self.app.stats["grid_copy"] + self.app.stats["grid_save"]
+
+        result = self.user.cancel_entrusts_by_ids(["10001", "10003", "10004", "999"])
+        self.assertEqual(list(result), ["10001", "10003", "10004", "999"])
+        for entrust_no in ("10001", "10003", "10004"):
+            self.assertEqual(result[entrust_no], {"message": "撤单申报成功"})
+        self.assertIn("不能撤单", result["999"]["message"])
+        # 只读取一次撤单列表
+        self.assertEqual(
+            self.app.stats["grid_copy"] + self.app.stats["grid_save"], copies + 1
+        )
+        self.assertEqual(
+            [e["合同编号"] for e in self.account.open_entrusts()], ["10002"]
+        )
+
+    def test_snapshot(self):
+        self.user.buy("162411", price=0.55, amount=100)
+        self.account.fill("10001")
+
+        refreshes = self.app.stats["refresh"]
+        snapshot = self.user.snapshot()
+        # 资金与持仓共用一个页面，三个页面各刷新一次
+        self.assertEqual(self.app.stats["refresh"], refreshes + 3)
+        self.assertEqual(len(snapshot["today_trades"]), 1)
+        self.assertEqual(snapshot["today_entrusts"][0]["备注"], "已成")
+        self.assertEqual(snapshot["position"][0]["股票余额"], 1100)
+        self.assertAlmostEqual(snapshot["balance"]["可用金额"], 1000000 - 55)
+
+    def test_pop_dialog_title_from_handle(self):
+        dialog = self.app._pop("提示", "委托已提交")
+        # 之后弹出的窗口位于顶层，标题仍然从指定的弹窗读取
+        self.app._pop("风险提示", "其他弹窗")
+        self.assertEqual(self.user._get_pop_dialog_title(dialog.handle), "提示")
+
+
+class TestSimulatedHTClientTrader(TestSimulatedClientTrader):
+    """华泰客户端通过另存为 xls 文件读取表格，只重复运行基本的交易、撤单与查询流程"""
+
+    broker = "ht_client"
+
+
+class TestSimulatedAccount(unittest.TestCase):
+    def test_fill_and_cancel(self):
+        account = simclient.SimulatedAccount(cash=10000)
+        entrust = account.order("buy", "000001", 10.0, 500)
+        self.assertEqual(account.cash, 5000)
+
+        account.fill(entrust["合同编号"], amount=200, price=9.5)
+        self.assertEqual(account.positions["000001"]["amount"], 200)
+        self.assertTrue(account.cancel(entrust["合同编号"]))
+        self.assertEqual(entrust["备注"], "部撤")
+        self.assertAlmostEqual(account.cash, 10000 - 9.5 * 200)
+        self.assertEqual(account.frozen, 0)
+
+        with self.assertRaises(simclient.SimulatedReject):
+            account.order("sell", "000001", 10.0, 300)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,143 @@
+# coding: utf-8
+import datetime
+import json
+import os
+import tempfile
+import threading
+import unittest
+from unittest import mock
+
+import easytrader
+from easytrader import simclient
+from easytrader.executor import GuiExecutor
+from easytrader.utils import tracing
+from easytrader.xq_follower import XueQiuFollower
+
+
+def span_names(span):
+    return [span.name] + [name for child in span.children for name in span_names(child)]
+
+
+class TestTracing(unittest.TestCase):
+    def setUp(self):
+        self.tracer = tracing.enable()
+
+    def tearDown(self):
+        tracing.disable()
+
+    def test_span_tree(self):
+        with tracing.span("outer", a=1):
+            with tracing.span("inner"):
+                pass
+            with self.assertRaises(ValueError):
+                with tracing.span("failed"):
+                    raise ValueError("x")
+
+        (root,) = self.tracer.traces
+        self.assertEqual(span_names(root), ["outer", "inner", "failed"])
+        self.assertEqual(root.args, {"a": 1})
+        self.assertEqual(root.children[1].error, "ValueError: x")
+        self.assertIsNone(tracing.current_span())
+
+    def test_threads_keep_separate_spans(self):
+        started = threading.Barrier(2)
+
+        def run(name):
+            with tracing.span(name):
+                started.wait()
+                with tracing.span(name + ".child"):
+                    pass
+
+        threads = [threading.Thread(target=run, args=(n,)) for n in ("a", "b")]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        trees = sorted(span_names(root) for root in self.tracer.traces)
+        self.assertEqual(trees, [["a", "a.child"], ["b", "b.child"]])
+
+        # attach 结束后恢复原来的 span
+        with tracing.span("outer") as outer:
+            with tracing.attach(None):
+                self.assertIsNone(tracing.current_span())
+            self.assertIs(tracing.current_span(), outer)
+
+    def test_buy_trace(self):
+        user = easytrader.use("ths")
+        simclient.attach(user)
+        self.tracer.clear()
+        user.buy("162411", price=0.55, amount=100)
+
+        (root,) = self.tracer.traces
+        self.assertEqual(root.name, "ClientTrader.buy")
+        names = span_names(root)
+        for name in (
+            "ClientTrader._switch_left_menus",
+            "ClientTrader._set_trade_params",
+            "ClientTrader._submit_trade_by_shortcut",
+            "ClientTrader._handle_pop_dialogs",
+            "PopDialogHandler.handle",
+            "sleep",
+        ):
+            self.assertIn(name, names)
+
+        with tempfile.TemporaryDirectory() as path:
+            file_path = os.path.join(path, "trace.json")
+            tracing.export_chrome_trace(file_path)
+            with open(file_path, encoding="utf-8") as f:
+                events = json.load(f)["traceEvents"]
+        complete = [e for e in events if e["ph"] == "X"]
+        self.assertEqual(len(complete), len(names))
+        self.assertEqual(complete[0]["name"], "ClientTrader.buy")
+        self.assertTrue(all(e["dur"] >= 0 for e in complete))
+        self.assertEqual(complete[1]["args"]["parent_id"], root.span_id)
+
+    def test_executor_propagation(self):
+        user = easytrader.use("ths")
+        simclient.attach(user)
+        self.tracer.clear()
+        with GuiExecutor(user) as executor:
+            with tracing.span("caller"):
+                executor.call("buy", "162411", price=0.55, amount=100)
+
+        (root,) = self.tracer.traces
+        buy = root.children[0]
+        self.assertEqual(buy.name, "ClientTrader.buy")
+        self.assertNotEqual(buy.thread_id, root.thread_id)
+
+    def test_follower_propagation(self):
+        follower = XueQiuFollower()
+        user = mock.MagicMock()
+        executed = threading.Event()
+
+        def buy(**kwargs):
+            with tracing.span("user.buy"):
+                executed.set()
+
+        user.buy.side_effect = buy
+        with tracing.span("follower.signal"):
+            follower.trade_queue.put(
+                {
+                    "strategy_name": "test",
+                    "stock_code": "162411",
+                    "action": "buy",
+                    "amount": 100,
+                    "price": 0.55,
+                    "datetime": datetime.datetime.now(),
+                    "trace_span": tracing.current_span(),
+                }
+            )
+        threading.Thread(
+            target=follower.trade_worker, args=([user],), daemon=True
+        ).start()
+        self.assertTrue(executed.wait(5))
+
+        (root,) = self.tracer.traces
+        execute = root.children[0]
+        self.assertEqual(execute.name, "follower.execute")
+        self.assertEqual(execute.children[0].name, "user.buy")
+
+
+if __name__ == "__main__":
+    unittest.main()
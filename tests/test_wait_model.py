@@ -0,0 +1,138 @@
+# coding: utf-8
+import os
+import tempfile
+import unittest
+
+import easytrader
+from easytrader import pop_dialog_handler, simclient
+from easytrader.utils.wait_model import WaitModel
+
+
+class TestWaitModel(unittest.TestCase):
+    def test_use_default_without_enough_samples(self):
+        model = WaitModel(min_samples=5)
+        for _ in range(4):
+            model.record("ths", "pop_dialog", 0.05, 0.5)
+        self.assertEqual(model.timeout("ths", "pop_dialog", 0.5), 0.5)
+
+    def test_shrink_on_fast_machine(self):
+        model = WaitModel(margin=1.2, min_scale=0.1)
+        for _ in range(10):
+            model.record("ths", "pop_dialog", 0.1, 0.5)
+        self.assertAlmostEqual(model.timeout("ths", "pop_dialog", 0.5), 0.12)
+
+    def test_grow_on_slow_machine(self):
+        model = WaitModel(margin=1.0, max_scale=3)
+        for _ in range(10):
+            model.record("ths", "pop_dialog", 0.8, 0.5)
+        self.assertAlmostEqual(model.timeout("ths", "pop_dialog", 0.5), 0.8)
+
+        for _ in range(10):
+            model.record("ths", "pop_dialog", 5, 0.5)
+        self.assertAlmostEqual(model.timeout("ths", "pop_dialog", 0.5), 1.5)
+
+    def test_high_percentile_cover_slow_samples(self):
+        model = WaitModel(margin=1.0, percentile=0.95, alpha=0.01, min_scale=0.01)
+        for _ in range(9):
+            model.record("ths", "pop_dialog", 0.1, 0.5)
+        model.record("ths", "pop_dialog", 0.4, 0.5)
+        self.assertAlmostEqual(model.timeout("ths", "pop_dialog", 0.5), 0.4)
+
+    def test_scale_blind_wait_by_calibrated_ops(self):
+        model = WaitModel(margin=1.0, window=10, min_blind_scale=0.5)
+        for _ in range(10):
+            model.record("ths", "pop_dialog", 0.35, 0.5)
+        self.assertAlmostEqual(model.timeout("ths", "menu_switch", 0.2), 0.14)
+        # 不同券商的统计互不影响
+        self.assertEqual(model.timeout("ht", "menu_switch", 0.2), 0.2)
+
+        for _ in range(10):
+            model.record("ths", "pop_dialog", 0.01, 0.5)
+        self.assertAlmostEqual(model.timeout("ths", "menu_switch", 0.2), 0.1)
+
+    def test_grow_after_timeout(self):
+        model = WaitModel(margin=1.0, min_scale=0.2, miss_growth=2.0)
+        for _ in range(20):
+            model.record("ths", "trade_dialog", 0.01, 0.5)
+        self.assertAlmostEqual(model.timeout("ths", "trade_dialog", 0.5), 0.1)
+
+        model.record_timeout("ths", "trade_dialog", 0.1, 0.5)
+        self.assertAlmostEqual(model.timeout("ths", "trade_dialog", 0.5), 0.2)
+        model.record_timeout("ths", "trade_dialog", 0.2, 0.5)
+        self.assertAlmostEqual(model.timeout("ths", "trade_dialog", 0.5), 0.4)
+
+        # 再次探测到弹窗后按统计结果估计
+        model.record("ths", "trade_dialog", 0.3, 0.5)
+        self.assertLess(model.timeout("ths", "trade_dialog", 0.5), 0.4)
+
+    def test_persist(self):
+        path = os.path.join(tempfile.mkdtemp(), "wait_model.json")
+        model = WaitModel(path, margin=1.0, save_every=100)
+        for _ in range(10):
+            model.record("ths", "pop_dialog", 0.2, 0.5)
+        self.assertFalse(os.path.exists(path))
+        model.save()
+
+        reloaded = WaitModel(path, margin=1.0)
+        self.assertAlmostEqual(reloaded.timeout("ths", "pop_dialog", 0.5), 0.2)
+
+    def test_auto_save(self):
+        path = os.path.join(tempfile.mkdtemp(), "wait_model.json")
+        model = WaitModel(path, save_every=3)
+        for _ in range(3):
+            model.record("ths", "pop_dialog", 0.2, 0.5)
+        self.assertTrue(os.path.exists(path))
+
+
+class TestAdaptiveWait(unittest.TestCase):
+    def setUp(self):
+        self.user = easytrader.use("ths")
+        self.app = simclient.attach(self.user)
+        self.account = self.app.account
+        self.account.add_position("162411", 1000, 0.5)
+
+    def test_late_dialog_after_fast_samples(self):
+        self.user.enable_adaptive_wait(None)
+        for i in range(20):
+            self.assertEqual(
+                self.user.buy("162411", price=0.55, amount=100),
+                {"entrust_no": str(10001 + i)},
+            )
+        # 大量快速样本之后，委托结果弹窗突然变慢，仍然需要等到它
+        self.app.latency["dialog"] = 0.3
+        self.assertEqual(
+            self.user.buy("162411", price=0.55, amount=100), {"entrust_no": "10021"}
+        )
+
+    def trade_dialog_timeout(self):
+        return self.user._wait_model.timeout(
+            self.user.broker_type,
+            "trade_dialog",
+            self.user.pop_dialog_watcher.timeout,
+        )
+
+    def test_timeout_after_handled_dialogs_is_not_a_miss(self):
+        class CloseDialog(pop_dialog_handler.PopDialogHandler):
+            def handle(self, title):
+                self._app.top_window().close()
+
+        self.user.enable_adaptive_wait(None)
+        self.user.trade_dialog_min_timeout = 0.05
+        default = self.user.pop_dialog_watcher.timeout
+        # 每次处理完弹窗后等待超时才结束，这是正常流程
+        for _ in range(6):
+            self.app._pop("提示", "已处理")
+            self.assertEqual(
+                self.user._handle_pop_dialogs(handler_class=CloseDialog),
+                {"message": "success"},
+            )
+        self.assertLess(self.trade_dialog_timeout(), default)
+
+        # 完全没有出现弹窗才计为未等到，之后的等待时间变长
+        before = self.trade_dialog_timeout()
+        self.user._handle_pop_dialogs()
+        self.assertAlmostEqual(self.trade_dialog_timeout(), before * 2)
+
+
+if __name__ == "__main__":
+    unittest.main()